@@ -0,0 +1,137 @@
+"""Bitmap slot storage for doctor_availability
+
+Revision ID: 3f6c2a9d81b4
+Revises: 179024e729b9
+Create Date: 2026-01-12 10:04:51.118203
+
+"""
+from math import gcd
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f6c2a9d81b4'
+down_revision: Union[str, Sequence[str], None] = '179024e729b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+GRANULARITY = 30
+
+
+def _width(granularity):
+    return (24 * 60 // granularity + 7) // 8
+
+
+def _minutes(time_str):
+    hours, minutes = time_str.split(":")[:2]
+    return int(hours) * 60 + int(minutes)
+
+
+def _bounds(slot):
+    start = _minutes(slot["start_time"])
+    end = _minutes(slot["end_time"]) if slot.get("end_time") else start + GRANULARITY
+    return start, end if end > start else start + GRANULARITY
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('doctor_availability', sa.Column('slot_granularity', sa.Integer(), nullable=True))
+    op.add_column('doctor_availability', sa.Column('open_slots', sa.LargeBinary(), nullable=True))
+    op.add_column('doctor_availability', sa.Column('booked_slots', sa.LargeBinary(), nullable=True))
+    op.add_column('doctor_availability', sa.Column('blocked_slots', sa.LargeBinary(), nullable=True))
+
+    # Backfill bitmaps from the JSON slot lists
+    availability = sa.table(
+        'doctor_availability',
+        sa.column('id', sa.UUID()),
+        sa.column('slots', sa.JSON()),
+        sa.column('slot_granularity', sa.Integer()),
+        sa.column('open_slots', sa.LargeBinary()),
+        sa.column('booked_slots', sa.LargeBinary()),
+        sa.column('blocked_slots', sa.LargeBinary()),
+    )
+    conn = op.get_bind()
+    rows = conn.execute(sa.select(availability.c.id, availability.c.slots)).fetchall()
+    for row_id, slots in rows:
+        bounds = [(_bounds(slot), slot.get("status")) for slot in slots or []]
+        # Slots added from off-grid times (e.g. 09:15-09:45) get a finer grid for the row, so none are lost
+        granularity = GRANULARITY
+        for (start, end), _ in bounds:
+            granularity = gcd(gcd(granularity, start), end)
+        masks = {"open": 0, "booked": 0, "blocked": 0}
+        for (start, end), status in bounds:
+            first, last = start // granularity, min(end, 24 * 60) // granularity
+            cells = ((1 << (last - first)) - 1) << first if last > first else 0
+            masks["open"] |= cells
+            if status in masks:
+                masks[status] |= cells
+        width = _width(granularity)
+        conn.execute(
+            availability.update().where(availability.c.id == row_id).values(
+                slot_granularity=granularity,
+                open_slots=masks["open"].to_bytes(width, "big"),
+                booked_slots=masks["booked"].to_bytes(width, "big"),
+                blocked_slots=masks["blocked"].to_bytes(width, "big"),
+            )
+        )
+
+    op.alter_column('doctor_availability', 'slot_granularity', nullable=False)
+    op.alter_column('doctor_availability', 'open_slots', nullable=False)
+    op.alter_column('doctor_availability', 'booked_slots', nullable=False)
+    op.alter_column('doctor_availability', 'blocked_slots', nullable=False)
+    op.drop_column('doctor_availability', 'slots')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('doctor_availability', sa.Column('slots', sa.JSON(), nullable=True))
+
+    availability = sa.table(
+        'doctor_availability',
+        sa.column('id', sa.UUID()),
+        sa.column('slots', sa.JSON()),
+        sa.column('slot_granularity', sa.Integer()),
+        sa.column('open_slots', sa.LargeBinary()),
+        sa.column('booked_slots', sa.LargeBinary()),
+        sa.column('blocked_slots', sa.LargeBinary()),
+    )
+    conn = op.get_bind()
+    rows = conn.execute(sa.select(
+        availability.c.id,
+        availability.c.slot_granularity,
+        availability.c.open_slots,
+        availability.c.booked_slots,
+        availability.c.blocked_slots,
+    )).fetchall()
+    for row_id, granularity, open_slots, booked_slots, blocked_slots in rows:
+        open_mask = int.from_bytes(open_slots, "big")
+        booked_mask = int.from_bytes(booked_slots, "big")
+        blocked_mask = int.from_bytes(blocked_slots, "big")
+        slots = []
+        for bit in range(open_mask.bit_length()):
+            if not open_mask >> bit & 1:
+                continue
+            start = bit * granularity
+            end = start + granularity
+            if booked_mask >> bit & 1:
+                status = "booked"
+            elif blocked_mask >> bit & 1:
+                status = "blocked"
+            else:
+                status = "available"
+            slots.append({
+                "start_time": f"{start // 60:02d}:{start % 60:02d}",
+                "end_time": f"{end // 60:02d}:{end % 60:02d}",
+                "status": status,
+                "appointment_id": None,
+            })
+        conn.execute(availability.update().where(availability.c.id == row_id).values(slots=slots))
+
+    op.alter_column('doctor_availability', 'slots', nullable=False)
+    op.drop_column('doctor_availability', 'blocked_slots')
+    op.drop_column('doctor_availability', 'booked_slots')
+    op.drop_column('doctor_availability', 'open_slots')
+    op.drop_column('doctor_availability', 'slot_granularity')
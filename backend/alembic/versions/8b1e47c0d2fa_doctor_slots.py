@@ -0,0 +1,43 @@
+"""Materialized per-date doctor_slots table
+
+Revision ID: 8b1e47c0d2fa
+Revises: 3f6c2a9d81b4
+Create Date: 2026-01-19 14:22:37.540916
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b1e47c0d2fa'
+down_revision: Union[str, Sequence[str], None] = '3f6c2a9d81b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('doctor_slots',
+    sa.Column('doctor_id', sa.UUID(), nullable=False),
+    sa.Column('slot_date', sa.Date(), nullable=False),
+    sa.Column('start_minute', sa.Integer(), nullable=False),
+    sa.Column('duration_minutes', sa.Integer(), nullable=False),
+    sa.Column('status', sa.Enum('AVAILABLE', 'BOOKED', 'BLOCKED', name='doctorslotstatus'), nullable=False),
+    sa.Column('appointment_id', sa.UUID(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['appointment_id'], ['appointments.id'], ),
+    sa.ForeignKeyConstraint(['doctor_id'], ['doctors.id'], ),
+    sa.PrimaryKeyConstraint('doctor_id', 'slot_date', 'start_minute')
+    )
+    op.create_index('ix_doctor_slots_appointment_id', 'doctor_slots', ['appointment_id'], unique=False)
+    # Rows are filled by app.utils.slot_materializer.roll_forward_slots on startup
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_doctor_slots_appointment_id', table_name='doctor_slots')
+    op.drop_table('doctor_slots')
+    sa.Enum(name='doctorslotstatus').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,32 @@
+"""Doctor consultation length and buffer
+
+Revision ID: a6f0d2c8e391
+Revises: e27a4b9c3d15
+Create Date: 2026-02-02 10:21:44.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6f0d2c8e391'
+down_revision: Union[str, Sequence[str], None] = 'e27a4b9c3d15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('doctors', sa.Column('consultation_minutes', sa.Integer(), nullable=False, server_default='30'))
+    op.add_column('doctors', sa.Column('buffer_minutes', sa.Integer(), nullable=False, server_default='0'))
+    # Existing appointments without a length get the old fixed 30 minutes
+    op.execute("UPDATE appointments SET duration_minutes = 30 WHERE duration_minutes IS NULL")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('doctors', 'buffer_minutes')
+    op.drop_column('doctors', 'consultation_minutes')
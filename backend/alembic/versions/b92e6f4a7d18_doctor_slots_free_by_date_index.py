@@ -0,0 +1,33 @@
+"""Partial index for searching free doctor slots by date
+
+Revision ID: b92e6f4a7d18
+Revises: f8c3a5d1b276
+Create Date: 2026-02-12 11:26:05.730614
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b92e6f4a7d18'
+down_revision: Union[str, Sequence[str], None] = 'f8c3a5d1b276'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_doctor_slots_free_by_date',
+        'doctor_slots',
+        ['slot_date', 'doctor_id', 'start_minute'],
+        postgresql_where=sa.text("status = 'AVAILABLE'")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_doctor_slots_free_by_date', table_name='doctor_slots')
@@ -0,0 +1,43 @@
+"""Partial unique indexes on active appointment slots
+
+Revision ID: c5d93e1f6a07
+Revises: 8b1e47c0d2fa
+Create Date: 2026-01-26 11:48:03.672150
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d93e1f6a07'
+down_revision: Union[str, Sequence[str], None] = '8b1e47c0d2fa'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Fails if duplicate active bookings already exist; cancel them first
+    op.create_index(
+        'uq_appointments_doctor_active_slot',
+        'appointments',
+        ['doctor_id', 'appointment_date', 'appointment_time'],
+        unique=True,
+        postgresql_where=sa.text("status IN ('PENDING', 'CONFIRMED')")
+    )
+    op.create_index(
+        'uq_appointments_patient_active_slot',
+        'appointments',
+        ['patient_id', 'appointment_date', 'appointment_time'],
+        unique=True,
+        postgresql_where=sa.text("status IN ('PENDING', 'CONFIRMED')")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_appointments_patient_active_slot', table_name='appointments')
+    op.drop_index('uq_appointments_doctor_active_slot', table_name='appointments')
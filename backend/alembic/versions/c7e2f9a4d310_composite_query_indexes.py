@@ -0,0 +1,46 @@
+"""Composite indexes for the owner-scoped list and lookup queries
+
+Revision ID: c7e2f9a4d310
+Revises: b92e6f4a7d18
+Create Date: 2026-02-19 10:04:51.218337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e2f9a4d310'
+down_revision: Union[str, Sequence[str], None] = 'b92e6f4a7d18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns); the trailing id matches the keyset cursor of the list endpoints
+INDEXES = [
+    # Patient/doctor appointment lists, day calendars and weekly views
+    ('ix_appointments_patient_date_time', 'appointments', ['patient_id', 'appointment_date', 'appointment_time', 'id']),
+    ('ix_appointments_doctor_date_time', 'appointments', ['doctor_id', 'appointment_date', 'appointment_time', 'id']),
+    # Admin list filtered by status
+    ('ix_appointments_status_date_time', 'appointments', ['status', 'appointment_date', 'appointment_time', 'id']),
+    ('ix_patients_created_at_id', 'patients', ['created_at', 'id']),
+    ('ix_doctors_created_at_id', 'doctors', ['created_at', 'id']),
+    ('ix_doctors_status_created_at_id', 'doctors', ['status', 'created_at', 'id']),
+    ('ix_reviews_doctor_created_at', 'reviews', ['doctor_id', 'created_at', 'id']),
+    ('ix_reviews_patient_created_at', 'reviews', ['patient_id', 'created_at', 'id']),
+    ('ix_prescriptions_patient_created_at', 'prescriptions', ['patient_id', 'created_at', 'id']),
+    ('ix_prescriptions_doctor_created_at', 'prescriptions', ['doctor_id', 'created_at', 'id']),
+    ('ix_notifications_user_created_at', 'notifications', ['user_id', 'created_at']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
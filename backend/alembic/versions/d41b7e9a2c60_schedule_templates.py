@@ -0,0 +1,148 @@
+"""Shared schedule templates for doctor_availability
+
+Revision ID: d41b7e9a2c60
+Revises: a6f0d2c8e391
+Create Date: 2026-02-05 14:37:12.904517
+
+"""
+import hashlib
+import json
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41b7e9a2c60'
+down_revision: Union[str, Sequence[str], None] = 'a6f0d2c8e391'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _width(granularity):
+    return (24 * 60 // granularity + 7) // 8
+
+
+def _time(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _ranges(mask, granularity):
+    # Same canonical form as app.utils.slot_manager.mask_to_ranges
+    ranges = []
+    bit = 0
+    while mask >> bit:
+        if mask >> bit & 1:
+            start = bit
+            while mask >> bit & 1:
+                bit += 1
+            ranges.append({"start_time": _time(start * granularity), "end_time": _time(bit * granularity)})
+        else:
+            bit += 1
+    return ranges
+
+
+def _key(mask, granularity):
+    # Same as app.utils.slot_manager.template_key
+    canonical = json.dumps({"slot_duration": granularity, "time_ranges": _ranges(mask, granularity)}, sort_keys=True)
+    return hashlib.sha1(canonical.encode()).hexdigest()
+
+
+availability = sa.table(
+    'doctor_availability',
+    sa.column('id', sa.UUID()),
+    sa.column('slot_granularity', sa.Integer()),
+    sa.column('open_slots', sa.LargeBinary()),
+    sa.column('template_id', sa.String()),
+    sa.column('added_slots', sa.LargeBinary()),
+    sa.column('removed_slots', sa.LargeBinary()),
+)
+
+templates = sa.table(
+    'schedule_templates',
+    sa.column('id', sa.String()),
+    sa.column('slot_granularity', sa.Integer()),
+    sa.column('time_ranges', sa.JSON()),
+    sa.column('open_slots', sa.LargeBinary()),
+    sa.column('created_at', sa.DateTime()),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'schedule_templates',
+        sa.Column('id', sa.String(length=40), nullable=False),
+        sa.Column('slot_granularity', sa.Integer(), nullable=False),
+        sa.Column('time_ranges', sa.JSON(), nullable=False),
+        sa.Column('open_slots', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.add_column('doctor_availability', sa.Column('template_id', sa.String(length=40), nullable=True))
+    op.add_column('doctor_availability', sa.Column('added_slots', sa.LargeBinary(), nullable=True))
+    op.add_column('doctor_availability', sa.Column('removed_slots', sa.LargeBinary(), nullable=True))
+    op.create_foreign_key(
+        'doctor_availability_template_id_fkey', 'doctor_availability', 'schedule_templates', ['template_id'], ['id']
+    )
+    op.create_index('ix_doctor_availability_template_id', 'doctor_availability', ['template_id'])
+
+    # Every existing day becomes a template of its own open slots with an empty delta
+    conn = op.get_bind()
+    rows = conn.execute(sa.select(availability.c.id, availability.c.slot_granularity, availability.c.open_slots)).fetchall()
+    created = set()
+    for row_id, granularity, open_slots in rows:
+        mask = int.from_bytes(open_slots, "big")
+        template_id = _key(mask, granularity)
+        if template_id not in created:
+            conn.execute(templates.insert().values(
+                id=template_id,
+                slot_granularity=granularity,
+                time_ranges=_ranges(mask, granularity),
+                open_slots=mask.to_bytes(_width(granularity), "big"),
+                created_at=datetime.utcnow(),
+            ))
+            created.add(template_id)
+        empty = bytes(_width(granularity))
+        conn.execute(availability.update().where(availability.c.id == row_id).values(
+            template_id=template_id,
+            added_slots=empty,
+            removed_slots=empty,
+        ))
+
+    op.alter_column('doctor_availability', 'added_slots', nullable=False)
+    op.alter_column('doctor_availability', 'removed_slots', nullable=False)
+    op.drop_column('doctor_availability', 'open_slots')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('doctor_availability', sa.Column('open_slots', sa.LargeBinary(), nullable=True))
+
+    conn = op.get_bind()
+    rows = conn.execute(
+        sa.select(
+            availability.c.id,
+            availability.c.slot_granularity,
+            availability.c.added_slots,
+            availability.c.removed_slots,
+            templates.c.slot_granularity,
+            templates.c.open_slots,
+        ).select_from(availability.outerjoin(templates, availability.c.template_id == templates.c.id))
+    ).fetchall()
+    for row_id, granularity, added, removed, template_granularity, template_open in rows:
+        base = int.from_bytes(template_open, "big") if template_open and template_granularity == granularity else 0
+        mask = (base & ~int.from_bytes(removed, "big")) | int.from_bytes(added, "big")
+        conn.execute(availability.update().where(availability.c.id == row_id).values(
+            open_slots=mask.to_bytes(_width(granularity), "big")
+        ))
+
+    op.alter_column('doctor_availability', 'open_slots', nullable=False)
+    op.drop_index('ix_doctor_availability_template_id', table_name='doctor_availability')
+    op.drop_constraint('doctor_availability_template_id_fkey', 'doctor_availability', type_='foreignkey')
+    op.drop_column('doctor_availability', 'removed_slots')
+    op.drop_column('doctor_availability', 'added_slots')
+    op.drop_column('doctor_availability', 'template_id')
+    op.drop_table('schedule_templates')
@@ -0,0 +1,43 @@
+"""Link notifications to appointment reminders
+
+Revision ID: d8a3f1c6b529
+Revises: c7e2f9a4d310
+Create Date: 2026-02-23 09:41:17.803915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8a3f1c6b529'
+down_revision: Union[str, Sequence[str], None] = 'c7e2f9a4d310'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('notifications', sa.Column('appointment_id', postgresql.UUID(as_uuid=True), nullable=True))
+    op.add_column('notifications', sa.Column('reminder_offset_minutes', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'notifications_appointment_id_fkey', 'notifications', 'appointments', ['appointment_id'], ['id']
+    )
+    # Makes reminder generation idempotent (INSERT ... ON CONFLICT DO NOTHING); rows without an appointment never conflict
+    op.create_index(
+        'uq_notifications_appointment_reminder',
+        'notifications',
+        ['appointment_id', 'reminder_offset_minutes'],
+        unique=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_notifications_appointment_reminder', table_name='notifications')
+    op.drop_constraint('notifications_appointment_id_fkey', 'notifications', type_='foreignkey')
+    op.drop_column('notifications', 'reminder_offset_minutes')
+    op.drop_column('notifications', 'appointment_id')
@@ -0,0 +1,49 @@
+"""Sequences for appointment, prescription, lab report and payment numbers
+
+Revision ID: e27a4b9c3d15
+Revises: c5d93e1f6a07
+Create Date: 2026-02-02 09:15:44.208371
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e27a4b9c3d15'
+down_revision: Union[str, Sequence[str], None] = 'c5d93e1f6a07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# sequence, table, column holding the formatted number
+SEQUENCES = [
+    ('appointment_number_seq', 'appointments', 'appointment_number'),
+    ('prescription_number_seq', 'prescriptions', 'prescription_number'),
+    ('lab_report_number_seq', 'lab_reports', 'report_number'),
+]
+
+# Not seeded: payments.transaction_id holds gateway ids, so TXN numbers start at 1
+UNSEEDED_SEQUENCES = ['payment_transaction_id_seq']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for sequence, table, column in SEQUENCES:
+        op.execute(sa.schema.CreateSequence(sa.Sequence(sequence)))
+        # Continue after the highest number already issued
+        op.execute(
+            f"SELECT setval('{sequence}', COALESCE(MAX(CAST(substring({column} from '[0-9]+$') AS BIGINT)), 0) + 1, false) "
+            f"FROM {table}"
+        )
+    for sequence in UNSEEDED_SEQUENCES:
+        op.execute(sa.schema.CreateSequence(sa.Sequence(sequence, start=1)))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for sequence in reversed(UNSEEDED_SEQUENCES):
+        op.execute(sa.schema.DropSequence(sa.Sequence(sequence)))
+    for sequence, _, _ in reversed(SEQUENCES):
+        op.execute(sa.schema.DropSequence(sa.Sequence(sequence)))
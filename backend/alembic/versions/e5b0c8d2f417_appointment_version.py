@@ -0,0 +1,29 @@
+"""Version column on appointments for optimistic concurrency
+
+Revision ID: e5b0c8d2f417
+Revises: d8a3f1c6b529
+Create Date: 2026-02-26 14:12:38.550291
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b0c8d2f417'
+down_revision: Union[str, Sequence[str], None] = 'd8a3f1c6b529'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing rows start at version 1
+    op.add_column('appointments', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('appointments', 'version')
@@ -0,0 +1,33 @@
+"""Next available slot and weekly free-slot count per doctor
+
+Revision ID: f8c3a5d1b276
+Revises: d41b7e9a2c60
+Create Date: 2026-02-09 16:02:37.441920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f8c3a5d1b276'
+down_revision: Union[str, Sequence[str], None] = 'd41b7e9a2c60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Filled in by the roll-forward job on its first run after deploy
+    op.add_column('doctors', sa.Column('next_available_at', sa.DateTime(), nullable=True))
+    op.add_column('doctors', sa.Column('free_slots_7d', sa.Integer(), nullable=False, server_default='0'))
+    op.create_index('ix_doctors_status_next_available_at', 'doctors', ['status', 'next_available_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_doctors_status_next_available_at', table_name='doctors')
+    op.drop_column('doctors', 'free_slots_7d')
+    op.drop_column('doctors', 'next_available_at')
@@ -1,5 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List, Optional
 from uuid import UUID
@@ -12,6 +12,10 @@ from app.schemas.doctor import DoctorResponse, DoctorUpdate
 from app.schemas.patient import PatientResponse, PatientUpdate
 from app.schemas.appointment import AppointmentResponse
 from app.api import deps
+from app.core.cache import availability_cache, invalidate_availability
+from app.core.fieldsets import AppointmentView
+from app.core.pagination import paginate
+from app.utils.slot_materializer import refresh_doctor_slots
 
 router = APIRouter()
 
@@ -37,6 +41,13 @@ def get_admin_dashboard_stats(
         "pending_doctors": pending_doctors
     }
 
+@router.get("/cache/stats")
+def get_cache_stats(
+    current_user: User = Depends(check_admin)
+):
+    """Availability cache hit/miss counters, overall and per (doctor_id, date) key"""
+    return availability_cache.stats()
+
 @router.get("/doctors/pending", response_model=List[DoctorResponse])
 def get_pending_doctors(
     db: Session = Depends(get_db),
@@ -56,8 +67,10 @@ def get_pending_doctors(
 
 @router.get("/patients", response_model=List[PatientResponse])
 def list_patients(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
     search: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(check_admin)
@@ -71,8 +84,7 @@ def list_patients(
             func.lower(Patient.full_name).like(search_term)
         )
     
-    patients = query.order_by(Patient.created_at.desc()).offset(skip).limit(limit).all()
-    return patients
+    return paginate(query, [Patient.created_at, Patient.id], response, limit, cursor, skip)
 
 @router.get("/patients/{patient_id}", response_model=PatientResponse)
 def get_patient_by_id(
@@ -89,6 +101,8 @@ def get_patient_by_id(
 @router.get("/patients/{patient_id}/appointments", response_model=List[AppointmentResponse])
 def get_patient_appointments(
     patient_id: UUID,
+    response: Response,
+    view: AppointmentView = Depends(),
     db: Session = Depends(get_db),
     current_user: User = Depends(check_admin)
 ):
@@ -97,21 +111,20 @@ def get_patient_appointments(
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
     
-    appointments = db.query(Appointment).options(
-        joinedload(Appointment.doctor),
-        joinedload(Appointment.patient)
-    ).filter(Appointment.patient_id == patient_id).order_by(
+    appointments = view.apply(db.query(Appointment)).filter(Appointment.patient_id == patient_id).order_by(
         Appointment.appointment_date.desc(),
         Appointment.appointment_time.desc()
     ).all()
     
-    return appointments
+    return view.render(appointments, response)
 
 
 @router.get("/doctors", response_model=List[DoctorResponse])
 def list_doctors(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
     status: Optional[DoctorStatus] = None,
     search: Optional[str] = None,
     db: Session = Depends(get_db),
@@ -129,7 +142,7 @@ def list_doctors(
             func.lower(Doctor.full_name).like(search_term)
         )
     
-    doctors = query.order_by(Doctor.created_at.desc()).offset(skip).limit(limit).all()
+    doctors = paginate(query, [Doctor.created_at, Doctor.id], response, limit, cursor, skip)
     # Ensure None values are handled properly before returning
     for doctor in doctors:
         # Set defaults if None
@@ -144,43 +157,42 @@ def list_doctors(
 @router.get("/appointments/{appointment_id}", response_model=AppointmentResponse)
 def get_appointment_by_id(
     appointment_id: UUID,
+    response: Response,
+    view: AppointmentView = Depends(),
     db: Session = Depends(get_db),
     current_user: User = Depends(check_admin)
 ):
     """Get appointment details by ID (admin only)"""
-    appointment = db.query(Appointment).options(
-        joinedload(Appointment.doctor),
-        joinedload(Appointment.patient)
-    ).filter(Appointment.id == appointment_id).first()
+    appointment = view.apply(db.query(Appointment)).filter(Appointment.id == appointment_id).first()
     
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
     
-    return appointment
+    return view.render(appointment, response)
 
 @router.get("/appointments", response_model=List[AppointmentResponse])
 def list_all_appointments(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
     status: Optional[AppointmentStatus] = None,
+    view: AppointmentView = Depends(),
     db: Session = Depends(get_db),
     current_user: User = Depends(check_admin)
 ):
     """List all appointments"""
-    query = db.query(Appointment).options(
-        joinedload(Appointment.doctor),
-        joinedload(Appointment.patient)
-    )
+    query = view.apply(db.query(Appointment))
     
     if status:
         query = query.filter(Appointment.status == status)
     
-    appointments = query.order_by(
-        Appointment.appointment_date.desc(),
-        Appointment.appointment_time.desc()
-    ).offset(skip).limit(limit).all()
-    
-    return appointments
+    appointments = paginate(
+        query,
+        [Appointment.appointment_date, Appointment.appointment_time, Appointment.id],
+        response, limit, cursor, skip
+    )
+    return view.render(appointments, response)
 
 
 @router.put("/patients/{patient_id}", response_model=PatientResponse)
@@ -259,6 +271,8 @@ def verify_doctor(
     
     doctor.status = DoctorStatus.ACTIVE
     db.commit()
+    refresh_doctor_slots(db, doctor.id)
+    invalidate_availability(doctor.id)
     return {"message": "Doctor verified successfully"}
 
 
@@ -275,4 +289,5 @@ def suspend_doctor(
     
     doctor.status = DoctorStatus.SUSPENDED
     db.commit()
+    invalidate_availability(doctor.id)
     return {"message": "Doctor suspended successfully"}
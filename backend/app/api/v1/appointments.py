@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from pydantic import BaseModel
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
 from typing import List, Optional
 from uuid import UUID
 from datetime import date, datetime
@@ -13,24 +15,120 @@ from app.models.doctor import Doctor
 from app.models.appointment import Appointment, AppointmentStatus, AppointmentType
 from app.schemas.appointment import AppointmentCreate, AppointmentUpdate, AppointmentResponse
 from app.api import deps
+from app.core.cache import invalidate_availability
+from app.core.etag import check_if_match, make_etag
+from app.core.events import slot_events
+from app.core.fieldsets import AppointmentView
+from app.core.pagination import paginate
+from app.core.holds import held_by_others, slot_holds
+from app.models.doctor_slot import DoctorSlot
+from app.utils.slot_materializer import claim_slot, ensure_slots_materialized, refresh_availability_summary, release_slot
+from app.utils.number_allocator import appointment_numbers
+from app.utils.intervals import IntervalSet
 
 router = APIRouter()
 
+DOCTOR_SLOT_TAKEN = "This time slot is already booked. Please select another time."
+PATIENT_SLOT_TAKEN = "You already have an appointment at this time. Please select another time slot."
+SLOT_HELD = "This time slot is being held by another patient. Please select another time."
+APPOINTMENT_CHANGED = "This appointment was changed by someone else. Reload it and try again."
+
+def _appointment_etag(appointment: Appointment) -> str:
+    """Strong ETag of the appointment's current version, for If-Match on writes"""
+    return make_etag("appointment", appointment.id, appointment.version, weak=False)
+
+def _check_version(request: Request, appointment: Appointment, expected: Optional[int] = None) -> None:
+    """412 if If-Match names another version, 409 if the expected version in the body is stale"""
+    check_if_match(request, _appointment_etag(appointment))
+    if expected is not None and expected != appointment.version:
+        raise HTTPException(status_code=409, detail=APPOINTMENT_CHANGED)
+
+def _commit_versioned(db: Session) -> None:
+    """Commit; the versioned UPDATE matching no row means a concurrent write won, reported as 409"""
+    try:
+        db.commit()
+    except StaleDataError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=APPOINTMENT_CHANGED)
+
+def _booking_conflict(error: IntegrityError) -> HTTPException:
+    """Map an active-slot unique index violation to the matching 400 response"""
+    constraint = getattr(getattr(error.orig, "diag", None), "constraint_name", None) or str(error.orig)
+    if "uq_appointments_patient_active_slot" in constraint:
+        return HTTPException(status_code=400, detail=PATIENT_SLOT_TAKEN)
+    if "uq_appointments_doctor_active_slot" in constraint:
+        return HTTPException(status_code=400, detail=DOCTOR_SLOT_TAKEN)
+    raise error
+
+def _active_calendar(db: Session, on_date: date, buffer_minutes: int = 0, exclude_id: Optional[UUID] = None, **owner) -> IntervalSet:
+    """A doctor's or patient's active appointments on one date as [start, end + buffer) intervals"""
+    query = db.query(Appointment.id, Appointment.appointment_time, Appointment.duration_minutes).filter(
+        Appointment.appointment_date == on_date,
+        Appointment.status.in_([AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED]),
+        *[getattr(Appointment, column) == value for column, value in owner.items()]
+    )
+    if exclude_id is not None:
+        query = query.filter(Appointment.id != exclude_id)
+    calendar = IntervalSet()
+    for apt in query.all():
+        start = apt.appointment_time.hour * 60 + apt.appointment_time.minute
+        try:
+            calendar.add(start, start + (apt.duration_minutes or 30) + buffer_minutes, apt.id)
+        except ValueError:
+            pass  # Already overlapping; one interval is enough to detect a clash
+    return calendar
+
+def _check_patient_free(db: Session, patient_id: UUID, appointment: Appointment) -> None:
+    """400 if the patient already has an overlapping active appointment that day"""
+    # Lock the patient row so two overlapping bookings for one patient cannot both pass
+    db.query(Patient.id).filter(Patient.id == patient_id).with_for_update().one()
+    start = appointment.appointment_time.hour * 60 + appointment.appointment_time.minute
+    calendar = _active_calendar(db, appointment.appointment_date, exclude_id=appointment.id, patient_id=patient_id)
+    if calendar.overlaps(start, start + appointment.duration_minutes):
+        raise HTTPException(status_code=400, detail=PATIENT_SLOT_TAKEN)
+
+def _check_not_held(appointment: Appointment, patient_id: UUID, buffer_minutes: int) -> None:
+    """400 if another patient holds any of the appointment's time (including the buffer)"""
+    start = appointment.appointment_time.hour * 60 + appointment.appointment_time.minute
+    end = start + appointment.duration_minutes + buffer_minutes
+    if held_by_others(appointment.doctor_id, appointment.appointment_date, start, end, patient_id):
+        raise HTTPException(status_code=400, detail=SLOT_HELD)
+
+def _release_patient_holds(appointment: Appointment) -> None:
+    """Drop the patient's hold on the booked doctor and date once the appointment exists"""
+    for hold in slot_holds.holds_for(appointment.doctor_id, appointment.appointment_date):
+        if hold["patient_id"] == str(appointment.patient_id):
+            slot_holds.release(hold["token"])
+
+def _claim_or_raise(db: Session, appointment: Appointment, buffer_minutes: int) -> None:
+    """Claim the doctor's cells for an appointment; on failure roll back and raise the matching 400"""
+    if claim_slot(
+        db, appointment.doctor_id, appointment.appointment_date, appointment.appointment_time,
+        appointment.id, appointment.duration_minutes, buffer_minutes
+    ):
+        return
+    db.rollback()
+    start = appointment.appointment_time.hour * 60 + appointment.appointment_time.minute
+    calendar = _active_calendar(db, appointment.appointment_date, buffer_minutes, exclude_id=appointment.id, doctor_id=appointment.doctor_id)
+    if calendar.overlaps(start, start + appointment.duration_minutes + buffer_minutes):
+        raise HTTPException(status_code=400, detail=DOCTOR_SLOT_TAKEN)
+    raise HTTPException(status_code=400, detail="Doctor is not available at this time. Please select an available time slot.")
+
 @router.get("/", response_model=List[AppointmentResponse])
 def list_appointments(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
     status: Optional[AppointmentStatus] = None,
     appointment_date: Optional[date] = None,
     doctor_id: Optional[UUID] = None,
+    view: AppointmentView = Depends(),
     current_user: User = Depends(deps.get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """List appointments with filters and pagination"""
-    query = db.query(Appointment).options(
-        joinedload(Appointment.doctor),
-        joinedload(Appointment.patient)
-    )
+    query = view.apply(db.query(Appointment))
     
     # Role-based filtering
     if current_user.role == UserRole.PATIENT:
@@ -55,12 +153,12 @@ def list_appointments(
         query = query.filter(Appointment.doctor_id == doctor_id)
     
     # Order by date and time
-    appointments = query.order_by(
-        Appointment.appointment_date.desc(),
-        Appointment.appointment_time.desc()
-    ).offset(skip).limit(limit).all()
-    
-    return appointments
+    appointments = paginate(
+        query,
+        [Appointment.appointment_date, Appointment.appointment_time, Appointment.id],
+        response, limit, cursor, skip
+    )
+    return view.render(appointments, response)
 
 
 @router.post("/", response_model=AppointmentResponse)
@@ -87,110 +185,74 @@ def create_appointment(
     if not doctor:
         raise HTTPException(status_code=404, detail="Doctor not found")
     
-    # Check for duplicate appointment - doctor already booked
-    existing_doctor = db.query(Appointment).filter(
-        and_(
-            Appointment.doctor_id == appointment_in.doctor_id,
-            Appointment.appointment_date == appointment_in.appointment_date,
-            Appointment.appointment_time == appointment_in.appointment_time,
-            Appointment.status.in_([AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED])
-        )
-    ).first()
-    
-    if existing_doctor:
-        raise HTTPException(status_code=400, detail="This time slot is already booked. Please select another time.")
-    
-    # Check for duplicate appointment - patient already has appointment at this time
-    existing_patient = db.query(Appointment).filter(
-        and_(
-            Appointment.patient_id == patient.id,
-            Appointment.appointment_date == appointment_in.appointment_date,
-            Appointment.appointment_time == appointment_in.appointment_time,
-            Appointment.status.in_([AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED])
-        )
-    ).first()
-    
-    if existing_patient:
-        raise HTTPException(status_code=400, detail="You already have an appointment at this time. Please select another time slot.")
-    
-    # Verify doctor availability for this date and time
-    day_of_week_name = appointment_in.appointment_date.strftime("%A").lower()
-    from app.models.availability import DayOfWeek
-    day_map = {
-        "monday": DayOfWeek.MONDAY,
-        "tuesday": DayOfWeek.TUESDAY,
-        "wednesday": DayOfWeek.WEDNESDAY,
-        "thursday": DayOfWeek.THURSDAY,
-        "friday": DayOfWeek.FRIDAY,
-        "saturday": DayOfWeek.SATURDAY,
-        "sunday": DayOfWeek.SUNDAY
-    }
-    
-    day_of_week = day_map.get(day_of_week_name)
-    if day_of_week:
-        from app.models.availability import DoctorAvailability
-        availability = db.query(DoctorAvailability).filter(
-            DoctorAvailability.doctor_id == appointment_in.doctor_id,
-            DoctorAvailability.day_of_week == day_of_week,
-            DoctorAvailability.is_available == True
-        ).first()
-        
-        if availability and availability.slots:
-            # Check if the requested time slot exists in doctor's availability
-            requested_time = appointment_in.appointment_time.strftime("%H:%M") if hasattr(appointment_in.appointment_time, 'strftime') else str(appointment_in.appointment_time)[:5]
-            slot_exists = any(
-                slot.get("start_time") == requested_time and slot.get("status") != "booked"
-                for slot in availability.slots
-            )
-            
-            if not slot_exists:
-                raise HTTPException(status_code=400, detail="Doctor is not available at this time. Please select an available time slot.")
-    
     # Generate Appointment Number
-    count = db.query(Appointment).count()
-    apt_number = f"APT-{str(count + 1).zfill(6)}"
+    apt_number = appointment_numbers.next(db)
     
+    appointment_data = appointment_in.dict()
+    hold_token = appointment_data.pop("hold_token", None)
+    if hold_token:
+        hold = slot_holds.get(hold_token)
+        if hold and hold["patient_id"] != str(patient.id):
+            raise HTTPException(status_code=403, detail="Not authorized to use this hold")
+    if not appointment_data.get("duration_minutes"):
+        appointment_data["duration_minutes"] = doctor.consultation_minutes or 30
     appointment = Appointment(
-        **appointment_in.dict(),
+        **appointment_data,
         id=uuid.uuid4(),
         appointment_number=apt_number,
         patient_id=patient.id,
         status=AppointmentStatus.PENDING
     )
     
+    # Overlaps with the patient's other appointments are checked on an interval set,
+    # then the doctor's cells for [start, end + buffer) are claimed with one conditional UPDATE
+    ensure_slots_materialized(db, [doctor.id], appointment.appointment_date)
+    _check_not_held(appointment, patient.id, doctor.buffer_minutes or 0)
+    _check_patient_free(db, patient.id, appointment)
     db.add(appointment)
+    try:
+        db.flush()
+    except IntegrityError as e:
+        db.rollback()
+        raise _booking_conflict(e)
+    _claim_or_raise(db, appointment, doctor.buffer_minutes or 0)
+    
     db.commit()
+    _release_patient_holds(appointment)
+    invalidate_availability(appointment.doctor_id, appointment.appointment_date)
+    slot_events.publish(appointment.doctor_id, appointment.appointment_date)
+    refresh_availability_summary(db, appointment.doctor_id)
     db.refresh(appointment)
     return appointment
 
 @router.get("/{appointment_id}", response_model=AppointmentResponse)
 def read_appointment(
     appointment_id: UUID,
+    response: Response,
+    view: AppointmentView = Depends(),
     current_user: User = Depends(deps.get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Get appointment by ID with permission check"""
-    appointment = db.query(Appointment).options(
-        joinedload(Appointment.doctor),
-        joinedload(Appointment.patient)
-    ).filter(Appointment.id == appointment_id).first()
+    appointment = view.apply(db.query(Appointment)).filter(Appointment.id == appointment_id).first()
     
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
+    response.headers["ETag"] = _appointment_etag(appointment)
     
     # Permission check
     if current_user.role == UserRole.ADMIN:
-        return appointment
+        return view.render(appointment, response)
     
     if current_user.role == UserRole.PATIENT:
         patient = db.query(Patient).filter(Patient.user_id == current_user.id).first()
         if patient and appointment.patient_id == patient.id:
-            return appointment
+            return view.render(appointment, response)
     
     if current_user.role == UserRole.DOCTOR:
         doctor = db.query(Doctor).filter(Doctor.user_id == current_user.id).first()
         if doctor and appointment.doctor_id == doctor.id:
-            return appointment
+            return view.render(appointment, response)
     
     raise HTTPException(status_code=403, detail="Not authorized to view this appointment")
 
@@ -198,6 +260,8 @@ def read_appointment(
 def update_appointment(
     appointment_id: UUID,
     appointment_in: AppointmentUpdate,
+    request: Request,
+    response: Response,
     current_user: User = Depends(deps.get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -224,6 +288,9 @@ def update_appointment(
         raise HTTPException(status_code=403, detail="Not authorized")
     
     update_data = appointment_in.dict(exclude_unset=True)
+    _check_version(request, appointment, update_data.pop("version", None))
+    if update_data.get("status") in [AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED]:
+        ensure_slots_materialized(db, [appointment.doctor_id], appointment.appointment_date)
     
     # Handle status changes
     if "status" in update_data:
@@ -236,9 +303,30 @@ def update_appointment(
     for field, value in update_data.items():
         setattr(appointment, field, value)
     
+    # Keep the doctor's slot in step with the appointment status
+    if "status" in update_data:
+        if update_data["status"] in [AppointmentStatus.CANCELLED, AppointmentStatus.NO_SHOW]:
+            release_slot(db, appointment.id)
+        elif update_data["status"] in [AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED]:
+            held = db.query(DoctorSlot.appointment_id).filter(DoctorSlot.appointment_id == appointment.id).first()
+            if not held:
+                buffer_minutes = db.query(Doctor.buffer_minutes).filter(Doctor.id == appointment.doctor_id).scalar()
+                _check_not_held(appointment, appointment.patient_id, buffer_minutes or 0)
+                _check_patient_free(db, appointment.patient_id, appointment)
+                _claim_or_raise(db, appointment, buffer_minutes or 0)
+    
     db.add(appointment)
-    db.commit()
+    try:
+        _commit_versioned(db)
+    except IntegrityError as e:
+        db.rollback()
+        raise _booking_conflict(e)
+    if "status" in update_data:
+        invalidate_availability(appointment.doctor_id, appointment.appointment_date)
+        slot_events.publish(appointment.doctor_id, appointment.appointment_date)
+        refresh_availability_summary(db, appointment.doctor_id)
     db.refresh(appointment)
+    response.headers["ETag"] = _appointment_etag(appointment)
     return appointment
 
 
@@ -248,6 +336,8 @@ class CancelRequest(BaseModel):
 @router.post("/{appointment_id}/cancel", response_model=AppointmentResponse)
 def cancel_appointment(
     appointment_id: UUID,
+    request: Request,
+    response: Response,
     cancel_request: CancelRequest = CancelRequest(),
     current_user: User = Depends(deps.get_current_active_user),
     db: Session = Depends(get_db)
@@ -271,13 +361,19 @@ def cancel_appointment(
             raise HTTPException(status_code=403, detail="Not authorized")
     elif current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Not authorized")
+    _check_version(request, appointment)
     
     appointment.status = AppointmentStatus.CANCELLED
     appointment.cancelled_at = datetime.utcnow()
     if cancel_request.cancellation_reason:
         appointment.cancellation_reason = cancel_request.cancellation_reason
     
+    release_slot(db, appointment.id)
     db.add(appointment)
-    db.commit()
+    _commit_versioned(db)
+    invalidate_availability(appointment.doctor_id, appointment.appointment_date)
+    slot_events.publish(appointment.doctor_id, appointment.appointment_date)
+    refresh_availability_summary(db, appointment.doctor_id)
     db.refresh(appointment)
+    response.headers["ETag"] = _appointment_etag(appointment)
     return appointment
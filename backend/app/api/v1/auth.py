@@ -79,18 +79,23 @@ def signup(user_in: UserSignup, db: Session = Depends(get_db)):
             
             # Create default availability if provided
             if user_in.available_from and user_in.available_to:
-                from app.utils.slot_manager import generate_slots_from_ranges
+                from app.utils.slot_manager import generate_slots_from_ranges, SlotBitmap
+                from app.utils.schedule_templates import get_or_create_template
                 weekdays = [DayOfWeek.MONDAY, DayOfWeek.TUESDAY, DayOfWeek.WEDNESDAY, DayOfWeek.THURSDAY, DayOfWeek.FRIDAY]
-                # Generate 30-minute slots from the time range
+                # Generate slots from the time range
+                granularity = settings.SLOT_GRANULARITY_MINUTES
                 time_ranges = [{"start_time": user_in.available_from, "end_time": user_in.available_to}]
-                slots = generate_slots_from_ranges(time_ranges)
+                slots = SlotBitmap(granularity, open=generate_slots_from_ranges(time_ranges, granularity))
+                # All five weekdays share one template and store an empty delta
+                template = get_or_create_template(db, slots.open, granularity)
                 for day in weekdays:
                     availability = DoctorAvailability(
                         doctor_id=doctor.id,
                         day_of_week=day,
                         is_available=True,
-                        slots=slots
+                        template=template
                     )
+                    slots.store(availability)
                     db.add(availability)
         
         db.commit()
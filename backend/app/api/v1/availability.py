@@ -1,14 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import asyncio
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Dict, List, Optional
 from uuid import UUID
-from datetime import date, datetime
-from app.database import get_db
-from app.models.user import User
+from datetime import date, datetime, timedelta
+from app.database import SessionLocal, get_db
+from app.models.user import User, UserRole
+from app.models.patient import Patient
 from app.models.doctor import Doctor, DoctorStatus
 from app.models.availability import DoctorAvailability, DayOfWeek
 from app.models.appointment import Appointment, AppointmentStatus
 from app.api import deps
+from app.config import settings
+from app.core.log import StageTimer, get_logger
+from app.core.cache import availability_cache, availability_key, invalidate_availability
+from app.core.etag import make_etag, not_modified
+from app.core.events import slot_events
+from app.core.holds import SlotHeld, slot_holds, without_held
+from app.utils.schedule_templates import get_or_create_template
+from app.utils.slot_materializer import ensure_slots_materialized, free_slots, refresh_doctor_slots
 from pydantic import BaseModel
 from app.utils.slot_manager import (
     generate_slots_from_ranges,
@@ -16,10 +29,16 @@ from app.utils.slot_manager import (
     update_slot_statuses,
     add_individual_slot,
     remove_individual_slot,
-    SlotStatus
+    slots_to_dicts,
+    next_date_for_weekday,
+    off_grid_times,
+    slot_grid,
+    time_to_minutes,
+    SlotBitmap
 )
 
 router = APIRouter()
+logger = get_logger(__name__)
 
 # Input schemas
 class TimeRange(BaseModel):
@@ -33,6 +52,10 @@ class AvailabilitySetRequest(BaseModel):
     is_available: bool = True
     time_ranges: List[TimeRange]  # e.g., [{"start_time": "09:00", "end_time": "13:00"}, {"start_time": "15:00", "end_time": "21:00"}]
 
+class AvailabilityWeekRequest(BaseModel):
+    """Set several days at once; days that are not listed are left unchanged"""
+    days: List[AvailabilitySetRequest]
+
 class SlotAddRequest(BaseModel):
     """Add individual slot(s)"""
     start_time: str  # Format: "HH:MM"
@@ -42,6 +65,17 @@ class SlotRemoveRequest(BaseModel):
     """Remove individual slot"""
     start_time: str  # Format: "HH:MM"
 
+class AvailabilityBatchRequest(BaseModel):
+    """Look up free slots for several doctors on one date"""
+    doctor_ids: List[UUID]
+    appointment_date: date
+
+class SlotHoldRequest(BaseModel):
+    """Hold a free slot while the patient checks out"""
+    doctor_id: UUID
+    appointment_date: date
+    start_time: str  # Format: "HH:MM", one of the free slots for that date
+
 # Response schemas
 class SlotDetail(BaseModel):
     """Detailed slot information"""
@@ -54,15 +88,111 @@ class AvailabilityResponse(BaseModel):
     id: str
     doctor_id: str
     day_of_week: DayOfWeek
+    slot_date: Optional[date] = None  # Concrete date this day's statuses were computed for
     is_available: bool
     slots: List[SlotDetail]
     
     class Config:
         from_attributes = True
 
+class AvailabilityCalendarResponse(BaseModel):
+    """Free slot start times per date for a date window"""
+    doctor_id: str
+    from_date: date
+    to_date: date
+    days: Dict[date, List[str]]  # e.g. {"2025-12-08": ["09:00", "09:30"], "2025-12-09": []}
+
+class AvailabilityBatchResponse(BaseModel):
+    """Free slots per doctor; doctors that are missing or not active are omitted"""
+    appointment_date: date
+    doctors: Dict[str, List[SlotDetail]]
+
+class SlotHoldResponse(BaseModel):
+    """A held slot; pass hold_token when creating the appointment"""
+    hold_token: str
+    doctor_id: str
+    appointment_date: date
+    start_time: str
+    end_time: str
+    expires_at: datetime
+
+# Longest window a single calendar request may cover
+MAX_CALENDAR_DAYS = 62
+
+# Most doctors a single batch request may ask for
+MAX_BATCH_DOCTORS = 100
+
+def _check_on_grid(time_ranges: List[Dict[str, str]], granularity: int) -> None:
+    """400 if a range starts or ends between grid points (it would otherwise be truncated)"""
+    off_grid = off_grid_times(time_ranges, granularity)
+    if off_grid:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Times must be on the {granularity}-minute grid; off-grid: {', '.join(off_grid)}"
+        )
+
+def _apply_day(
+    db: Session,
+    doctor: Doctor,
+    existing: Optional[DoctorAvailability],
+    day_in: AvailabilitySetRequest,
+    booked_slots_map: Dict[str, UUID]
+) -> DoctorAvailability:
+    """Merge one day's time ranges into its availability row (created if missing); does not commit"""
+    # Existing days keep their granularity, new days use a grid that fits the doctor's consultation length
+    existing_slots = SlotBitmap.from_record(existing) if existing else SlotBitmap(
+        slot_grid(doctor.consultation_minutes, doctor.buffer_minutes, settings.SLOT_GRANULARITY_MINUTES)
+    )
+    
+    # Convert time ranges to slots
+    time_ranges_dict = [{"start_time": tr.start_time, "end_time": tr.end_time} for tr in day_in.time_ranges]
+    _check_on_grid(time_ranges_dict, existing_slots.granularity)
+    new_slots = generate_slots_from_ranges(time_ranges_dict, existing_slots.granularity)
+    
+    # Merge new slots with existing, preserving booked status
+    merged_slots = merge_slots_with_existing(
+        new_slots=new_slots,
+        existing=existing_slots,
+        booked_slots_map=booked_slots_map
+    )
+    template = get_or_create_template(db, merged_slots.open, merged_slots.granularity)
+    
+    if existing:
+        existing.is_available = day_in.is_available
+        existing.template = template
+        merged_slots.store(existing)
+        return existing
+    
+    availability = DoctorAvailability(
+        doctor_id=doctor.id,
+        day_of_week=day_in.day_of_week,
+        is_available=day_in.is_available,
+        template=template
+    )
+    merged_slots.store(availability)
+    db.add(availability)
+    return availability
+
+def _day_response(availability: DoctorAvailability) -> AvailabilityResponse:
+    """A stored day with statuses computed for its next occurrence"""
+    updated_slots = update_slot_statuses(
+        slots=SlotBitmap.from_record(availability),
+        day_of_week=availability.day_of_week.value
+    )
+    return AvailabilityResponse(
+        id=str(availability.id),
+        doctor_id=str(availability.doctor_id),
+        day_of_week=availability.day_of_week,
+        slot_date=next_date_for_weekday(availability.day_of_week.value),
+        is_available=availability.is_available,
+        slots=[SlotDetail(**slot) for slot in slots_to_dicts(updated_slots)]
+    )
+
 @router.get("/doctor/{doctor_id}", response_model=List[SlotDetail])
 def get_doctor_availability_for_date(
     doctor_id: UUID,
+    request: Request,
+    response: Response,
     appointment_date: date = Query(..., description="Appointment date in YYYY-MM-DD format"),
     db: Session = Depends(get_db)
 ):
@@ -77,27 +207,96 @@ def get_doctor_availability_for_date(
         raise HTTPException(status_code=400, detail="Invalid date format")
     
     today = date.today()
-    is_future = appointment_date > today
     is_today = appointment_date == today
-    is_past = appointment_date < today
-    
-    print(f"\n{'='*70}")
-    print(f"[Availability API] ===== REQUEST RECEIVED =====")
-    print(f"{'='*70}")
-    print(f"[Availability API] doctor_id: {doctor_id}")
-    print(f"[Availability API] appointment_date: {appointment_date} (type: {type(appointment_date).__name__})")
-    print(f"[Availability API] today: {today} (type: {type(today).__name__})")
-    print(f"[Availability API] Date comparison:")
-    print(f"  appointment_date > today: {is_future}")
-    print(f"  appointment_date == today: {is_today}")
-    print(f"  appointment_date < today: {is_past}")
-    if is_future:
-        print(f"[Availability API] ✓✓✓ FUTURE DATE - All slots should be AVAILABLE ✓✓✓")
-    elif is_today:
-        print(f"[Availability API] ✓ TODAY - Will check time for each slot")
-    else:
-        print(f"[Availability API] ✗ PAST DATE - All slots will be PAST")
-    print(f"{'='*70}\n")
+    timer = StageTimer()
+    logger.debug("availability.for_date.request", extra={"fields": {
+        "doctor_id": str(doctor_id),
+        "appointment_date": appointment_date,
+        "today": today
+    }})
+    
+    # Served from cache until an appointment or availability change invalidates it
+    cache_key = availability_key(doctor_id, appointment_date)
+    with timer.stage("cache"):
+        cached_slots = availability_cache.get(cache_key)
+    if cached_slots is not None:
+        if is_today:
+            # Slots may have started since the entry was cached
+            now = datetime.now()
+            current_minutes = now.hour * 60 + now.minute
+            cached_slots = [slot for slot in cached_slots if time_to_minutes(slot["start_time"]) >= current_minutes]
+        # Holds expire on their own, so they are applied after the cache rather than cached
+        with timer.stage("holds"):
+            cached_slots = without_held(doctor_id, appointment_date, cached_slots)
+        # The ETag is a hash of the slots themselves, so a cache hit answers 304 without touching the database
+        cached = not_modified(request, response, make_etag("availability", doctor_id, appointment_date, cached_slots))
+        if cached:
+            return cached
+        with timer.stage("serialize"):
+            available_slots = [SlotDetail(**slot) for slot in cached_slots]
+        logger.info("availability.for_date", extra={"fields": {
+            "doctor_id": str(doctor_id),
+            "appointment_date": appointment_date,
+            "cache": "hit",
+            "slots": len(available_slots),
+            **timer.fields()
+        }})
+        return available_slots
+    
+    with timer.stage("query"):
+        doctor = db.query(Doctor).filter(Doctor.id == doctor_id).first()
+    if not doctor:
+        raise HTTPException(status_code=404, detail="Doctor not found")
+    
+    if doctor.status != DoctorStatus.ACTIVE:
+        raise HTTPException(status_code=400, detail="Doctor is not available for appointments")
+    
+    # Indexed range scan over the materialized slots for this date
+    with timer.stage("materialize"):
+        ensure_slots_materialized(db, [doctor.id], appointment_date)
+    with timer.stage("query"):
+        slots_by_day = free_slots(db, [doctor.id], appointment_date, appointment_date)
+    available_slot_dicts = slots_by_day.get((doctor.id, appointment_date), [])
+    availability_cache.set(cache_key, available_slot_dicts)
+    with timer.stage("holds"):
+        available_slot_dicts = without_held(doctor.id, appointment_date, available_slot_dicts)
+    cached = not_modified(request, response, make_etag("availability", doctor_id, appointment_date, available_slot_dicts))
+    if cached:
+        return cached
+    with timer.stage("serialize"):
+        available_slots = [SlotDetail(**slot) for slot in available_slot_dicts]
+    
+    logger.info("availability.for_date", extra={"fields": {
+        "doctor_id": str(doctor_id),
+        "appointment_date": appointment_date,
+        "cache": "miss",
+        "slots": len(available_slots),
+        **timer.fields()
+    }})
+    
+    return available_slots
+
+@router.get("/doctor/{doctor_id}/calendar", response_model=AvailabilityCalendarResponse)
+def get_doctor_availability_calendar(
+    doctor_id: UUID,
+    request: Request,
+    response: Response,
+    from_date: date = Query(..., alias="from", description="First date in YYYY-MM-DD format"),
+    to_date: date = Query(..., alias="to", description="Last date (inclusive) in YYYY-MM-DD format"),
+    db: Session = Depends(get_db)
+):
+    """
+    Public endpoint to get free time slots for a doctor over a range of dates
+    Used by the booking date strip instead of one request per date
+    
+    Example: GET /api/v1/availability/doctor/{doctor_id}/calendar?from=2025-12-08&to=2025-12-21
+    """
+    if to_date < from_date:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    
+    day_count = (to_date - from_date).days + 1
+    if day_count > MAX_CALENDAR_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range cannot exceed {MAX_CALENDAR_DAYS} days")
     
     doctor = db.query(Doctor).filter(Doctor.id == doctor_id).first()
     if not doctor:
@@ -106,116 +305,251 @@ def get_doctor_availability_for_date(
     if doctor.status != DoctorStatus.ACTIVE:
         raise HTTPException(status_code=400, detail="Doctor is not available for appointments")
     
-    # Get day of week from date
-    day_of_week_name = appointment_date.strftime("%A").lower()
-    day_map = {
-        "monday": DayOfWeek.MONDAY,
-        "tuesday": DayOfWeek.TUESDAY,
-        "wednesday": DayOfWeek.WEDNESDAY,
-        "thursday": DayOfWeek.THURSDAY,
-        "friday": DayOfWeek.FRIDAY,
-        "saturday": DayOfWeek.SATURDAY,
-        "sunday": DayOfWeek.SUNDAY
-    }
+    # One indexed range scan over the materialized slots for the whole window
+    ensure_slots_materialized(db, [doctor.id], to_date)
+    slots_by_day = free_slots(db, [doctor.id], from_date, to_date)
     
-    day_of_week = day_map.get(day_of_week_name)
-    if not day_of_week:
-        return []
+    days = {}
+    for offset in range(day_count):
+        current = from_date + timedelta(days=offset)
+        days[current] = [
+            slot["start_time"]
+            for slot in without_held(doctor.id, current, slots_by_day.get((doctor.id, current), []))
+        ]
     
-    # Get availability for this day
-    availability = db.query(DoctorAvailability).filter(
-        DoctorAvailability.doctor_id == doctor.id,
-        DoctorAvailability.day_of_week == day_of_week,
-        DoctorAvailability.is_available == True
-    ).first()
+    cached = not_modified(request, response, make_etag("calendar", doctor_id, {str(day): starts for day, starts in days.items()}))
+    if cached:
+        return cached
     
-    if not availability or not availability.slots:
-        return []
+    return AvailabilityCalendarResponse(
+        doctor_id=str(doctor.id),
+        from_date=from_date,
+        to_date=to_date,
+        days=days
+    )
+
+def _doctor_status(doctor_id: UUID) -> Optional[DoctorStatus]:
+    db = SessionLocal()
+    try:
+        return db.query(Doctor.status).filter(Doctor.id == doctor_id).scalar()
+    finally:
+        db.close()
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@router.get("/doctor/{doctor_id}/stream")
+async def stream_doctor_availability(
+    doctor_id: UUID,
+    request: Request,
+    stream_date: date = Query(..., alias="date", description="Date in YYYY-MM-DD format")
+):
+    """
+    Public Server-Sent Events stream of a doctor's free slots on one date
+    Replaces polling GET /availability/doctor/{doctor_id} on the booking screen
     
-    # Get all appointments for this doctor on this date
-    appointments = db.query(Appointment).filter(
-        Appointment.doctor_id == doctor.id,
-        Appointment.appointment_date == appointment_date,
-        Appointment.status.in_([AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED])
-    ).all()
+    Sends a "snapshot" event with the free slots on connect, then a "diff" event
+    whenever an appointment or hold for that doctor and date changes them:
+    {"added": [{"start_time": "09:30", ...}], "removed": ["10:00"]}
     
-    # Create booked slots map
-    booked_slots_map = {}
-    for apt in appointments:
-        if apt.appointment_time:
-            time_str = apt.appointment_time.strftime("%H:%M")
-            booked_slots_map[time_str] = str(apt.id)
+    Example: GET /api/v1/availability/doctor/{doctor_id}/stream?date=2025-12-08
+    """
+    if stream_date < date.today():
+        raise HTTPException(status_code=400, detail="Cannot stream availability for a past date")
     
-    # Update slot statuses with proper date+time checking
-    # For future dates: all slots available
-    # For today: check if time has passed
-    # For past dates: all slots are past
-    updated_slots = update_slot_statuses(
-        slots=availability.slots,
-        day_of_week=day_of_week.value,
-        appointments=[{
-            "id": str(apt.id),
-            "appointment_date": apt.appointment_date,
-            "appointment_time": apt.appointment_time,
-            "status": apt.status.value
-        } for apt in appointments],
-        reference_date=date.today(),
-        specific_date=appointment_date  # Use appointment date for proper checking
+    # The session is not held open for the lifetime of the stream
+    status = await run_in_threadpool(_doctor_status, doctor_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Doctor not found")
+    if status != DoctorStatus.ACTIVE:
+        raise HTTPException(status_code=400, detail="Doctor is not available for appointments")
+    
+    async def events():
+        # Subscribe before the first load so no change between the two is missed
+        snapshots = slot_events.subscribe(doctor_id, stream_date)
+        try:
+            slots = await run_in_threadpool(slot_events.snapshot, doctor_id, stream_date)
+            last = {slot["start_time"]: slot for slot in slots}
+            yield f"retry: 5000\n{_sse('snapshot', {'appointment_date': stream_date, 'slots': slots})}"
+            
+            while not await request.is_disconnected():
+                try:
+                    slots = await asyncio.wait_for(snapshots.get(), settings.SLOT_STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                current = {slot["start_time"]: slot for slot in slots}
+                added = [slot for start_time, slot in current.items() if start_time not in last]
+                removed = [start_time for start_time in last if start_time not in current]
+                last = current
+                if added or removed:
+                    yield _sse("diff", {"added": added, "removed": removed})
+        finally:
+            slot_events.unsubscribe(doctor_id, stream_date, snapshots)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
+
+@router.post("/batch", response_model=AvailabilityBatchResponse)
+def get_availability_batch(
+    batch_in: AvailabilityBatchRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Public endpoint to get available time slots for many doctors on one date
+    Used by the doctor listing to show the next free slots for every result
     
-    # Filter: Return only available slots (exclude booked and past)
-    print(f"[Availability API] ===== FILTERING SLOTS =====")
-    print(f"[Availability API] Total slots from update_slot_statuses: {len(updated_slots)}")
-    
-    # Debug: Show status breakdown
-    status_breakdown = {}
-    for slot in updated_slots:
-        status = slot.get("status", "unknown")
-        status_breakdown[status] = status_breakdown.get(status, 0) + 1
-    
-    print(f"[Availability API] Status breakdown:")
-    for status, count in status_breakdown.items():
-        print(f"  - {status}: {count}")
-    
-    available_slots = []
-    excluded_count = 0
-    for slot in updated_slots:
-        slot_status = slot.get("status", "unknown")
-        # Use SlotStatus constants for comparison
-        if slot_status == SlotStatus.AVAILABLE:
-            available_slots.append(SlotDetail(
-                start_time=slot["start_time"],
-                end_time=slot["end_time"],
-                status=slot["status"],
-                appointment_id=slot.get("appointment_id")
-            ))
-        else:
-            excluded_count += 1
-            # Debug: Log why slot was excluded (first 10 only)
-            if excluded_count <= 10:
-                print(f"[Availability API] Excluded slot {slot['start_time']}: status='{slot_status}'")
-    
-    print(f"[Availability API] ===== FINAL RESULT =====")
-    print(f"[Availability API] Returning {len(available_slots)} available slots for {appointment_date}")
-    if is_future:
-        expected = len(updated_slots) - status_breakdown.get("booked", 0)
-        if len(available_slots) == expected:
-            print(f"[Availability API] ✓✓✓ SUCCESS: All {expected} non-booked slots are available ✓✓✓")
-        else:
-            print(f"[Availability API] ⚠️  WARNING: Expected {expected} available, got {len(available_slots)}")
-    print(f"{'='*70}\n")
+    Example:
+    {
+        "doctor_ids": ["uuid-1", "uuid-2"],
+        "appointment_date": "2025-12-08"
+    }
+    """
+    doctor_ids = list(dict.fromkeys(batch_in.doctor_ids))
+    if len(doctor_ids) > MAX_BATCH_DOCTORS:
+        raise HTTPException(status_code=400, detail=f"Cannot request more than {MAX_BATCH_DOCTORS} doctors at once")
+    
+    appointment_date = batch_in.appointment_date
+    result = AvailabilityBatchResponse(appointment_date=appointment_date, doctors={})
+    if not doctor_ids:
+        return result
+    
+    # Set-based lookups: one query for doctors, one for their slots
+    active_ids = {
+        doctor_id for (doctor_id,) in db.query(Doctor.id).filter(
+            Doctor.id.in_(doctor_ids),
+            Doctor.status == DoctorStatus.ACTIVE
+        ).all()
+    }
+    if not active_ids:
+        return result
+    
+    # One indexed lookup over the materialized slots for every doctor
+    ensure_slots_materialized(db, active_ids, appointment_date)
+    slots_by_day = free_slots(db, active_ids, appointment_date, appointment_date)
+    
+    for doctor_id in doctor_ids:
+        if doctor_id not in active_ids:
+            continue
+        result.doctors[str(doctor_id)] = [
+            SlotDetail(**slot)
+            for slot in without_held(doctor_id, appointment_date, slots_by_day.get((doctor_id, appointment_date), []))
+        ]
     
-    return available_slots
+    return result
+
+@router.post("/hold", response_model=SlotHoldResponse)
+def hold_slot(
+    hold_in: SlotHoldRequest,
+    current_user: User = Depends(deps.get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Hold a free slot for SLOT_HOLD_MINUTES while the patient checks out
+    
+    The slot disappears from the public availability endpoints and only the
+    holder can book it until the hold expires or the appointment is created.
+    A new hold on the same doctor and date replaces the patient's previous one.
+    
+    Example:
+    {
+        "doctor_id": "uuid",
+        "appointment_date": "2025-12-08",
+        "start_time": "09:30"
+    }
+    """
+    if current_user.role != UserRole.PATIENT:
+        raise HTTPException(status_code=403, detail="Only patients can hold time slots")
+    
+    patient = db.query(Patient).filter(Patient.user_id == current_user.id).first()
+    if not patient:
+        raise HTTPException(status_code=404, detail="Patient profile not found")
+    
+    doctor = db.query(Doctor).filter(Doctor.id == hold_in.doctor_id).first()
+    if not doctor:
+        raise HTTPException(status_code=404, detail="Doctor not found")
+    
+    if doctor.status != DoctorStatus.ACTIVE:
+        raise HTTPException(status_code=400, detail="Doctor is not available for appointments")
+    
+    try:
+        start_minute = time_to_minutes(hold_in.start_time)
+    except (ValueError, IndexError):
+        raise HTTPException(status_code=400, detail="Invalid time format. Use HH:MM")
+    
+    ensure_slots_materialized(db, [doctor.id], hold_in.appointment_date)
+    slots = free_slots(db, [doctor.id], hold_in.appointment_date, hold_in.appointment_date)
+    slot = next(
+        (slot for slot in slots.get((doctor.id, hold_in.appointment_date), [])
+         if time_to_minutes(slot["start_time"]) == start_minute),
+        None
+    )
+    if slot is None:
+        raise HTTPException(status_code=400, detail="Doctor is not available at this time. Please select an available time slot.")
+    
+    buffer_minutes = doctor.buffer_minutes or 0
+    try:
+        hold = slot_holds.create(
+            doctor.id,
+            hold_in.appointment_date,
+            start_minute,
+            time_to_minutes(slot["end_time"]) + buffer_minutes,
+            patient.id,
+            settings.SLOT_HOLD_MINUTES * 60,
+            buffer_minutes
+        )
+    except SlotHeld:
+        raise HTTPException(status_code=409, detail="This time slot is being held by another patient. Please select another time.")
+    
+    slot_events.publish(doctor.id, hold_in.appointment_date)
+    logger.info("availability.hold", extra={"fields": {
+        "doctor_id": str(doctor.id),
+        "appointment_date": hold_in.appointment_date,
+        "start_time": slot["start_time"]
+    }})
+    
+    return SlotHoldResponse(
+        hold_token=hold["token"],
+        doctor_id=str(doctor.id),
+        appointment_date=hold_in.appointment_date,
+        start_time=slot["start_time"],
+        end_time=slot["end_time"],
+        expires_at=datetime.fromtimestamp(hold["expires_at"])
+    )
+
+@router.delete("/hold/{hold_token}")
+def release_hold(
+    hold_token: str,
+    current_user: User = Depends(deps.get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Release a hold early, e.g. when the patient abandons checkout"""
+    hold = slot_holds.get(hold_token)
+    if not hold:
+        raise HTTPException(status_code=404, detail="Hold not found or expired")
+    
+    patient = db.query(Patient).filter(Patient.user_id == current_user.id).first()
+    if not patient or hold["patient_id"] != str(patient.id):
+        raise HTTPException(status_code=403, detail="Not authorized to release this hold")
+    
+    slot_holds.release(hold_token)
+    slot_events.publish(hold["doctor_id"], date.fromisoformat(hold["date"]))
+    return {"message": "Hold released"}
 
 @router.get("", response_model=List[AvailabilityResponse])
 def get_availability(
     current_user: User = Depends(deps.get_current_active_user),
     db: Session = Depends(get_db),
-    reference_date: Optional[date] = None
+    reference_date: Optional[date] = Query(None, description="First day of the 7-day window (default: today)")
 ):
     """
     Get doctor's weekly availability with detailed slot status
     
+    Covers the 7 days starting at reference_date; each day carries its real date.
+    
     Each slot shows:
     - available: Slot is available for booking
     - booked: Slot has an active appointment
@@ -226,77 +560,74 @@ def get_availability(
     if not doctor:
         raise HTTPException(status_code=404, detail="Doctor profile not found")
     
-    # Get all availability records
-    availability_records = db.query(DoctorAvailability).filter(
-        DoctorAvailability.doctor_id == doctor.id
-    ).all()
-    
-    # Get all appointments for this doctor to check booked slots
-    all_appointments = db.query(Appointment).filter(
-        Appointment.doctor_id == doctor.id,
-        Appointment.status.in_([AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED])
-    ).all()
+    timer = StageTimer()
+    week_start = reference_date or date.today()
+    week_end = week_start + timedelta(days=6)
+    week_dates = {
+        (week_start + timedelta(days=offset)).strftime("%A").lower(): week_start + timedelta(days=offset)
+        for offset in range(7)
+    }
     
-    # Convert appointments to dict format for slot manager
-    all_appointments_data = []
-    for apt in all_appointments:
-        all_appointments_data.append({
+    with timer.stage("query"):
+        # Get all availability records
+        availability_records = db.query(DoctorAvailability).filter(
+            DoctorAvailability.doctor_id == doctor.id
+        ).all()
+        
+        # Active appointments in this week only, grouped by date in one pass
+        appointments = db.query(
+            Appointment.id,
+            Appointment.appointment_date,
+            Appointment.appointment_time,
+            Appointment.duration_minutes,
+            Appointment.status
+        ).filter(
+            Appointment.doctor_id == doctor.id,
+            Appointment.appointment_date.between(week_start, week_end),
+            Appointment.status.in_([AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED])
+        ).all()
+    
+    appointments_by_date = {}
+    for apt in appointments:
+        appointments_by_date.setdefault(apt.appointment_date, []).append({
             "id": str(apt.id),
             "appointment_date": apt.appointment_date,
             "appointment_time": apt.appointment_time,
+            "duration_minutes": (apt.duration_minutes or 30) + (doctor.buffer_minutes or 0),
             "status": apt.status.value
         })
     
     # Process each availability record
     result = []
     for avail in availability_records:
-        # Filter appointments for this specific day of week
-        day_appointments = []
-        day_map = {
-            "monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3,
-            "friday": 4, "saturday": 5, "sunday": 6
-        }
-        target_weekday = day_map.get(avail.day_of_week.value.lower(), 0)
-        
-        for apt in all_appointments_data:
-            apt_date = apt["appointment_date"]
-            if isinstance(apt_date, date):
-                apt_date_obj = apt_date
-            elif isinstance(apt_date, str):
-                apt_date_obj = datetime.strptime(apt_date, "%Y-%m-%d").date()
-            else:
-                continue
-            
-            if apt_date_obj.weekday() == target_weekday:
-                day_appointments.append(apt)
-        
-        # Update slot statuses based on appointments and current date
-        updated_slots = update_slot_statuses(
-            slots=avail.slots or [],
-            day_of_week=avail.day_of_week.value,
-            appointments=day_appointments,
-            reference_date=reference_date
-        )
-        
-        # Convert to response format
-        slot_details = [
-            SlotDetail(
-                start_time=slot["start_time"],
-                end_time=slot["end_time"],
-                status=slot["status"],
-                appointment_id=slot.get("appointment_id")
+        day_date = week_dates[avail.day_of_week.value]
+        with timer.stage("statuses"):
+            updated_slots = update_slot_statuses(
+                slots=SlotBitmap.from_record(avail),
+                day_of_week=avail.day_of_week.value,
+                appointments=appointments_by_date.get(day_date, []),
+                reference_date=week_start,
+                specific_date=day_date
             )
-            for slot in updated_slots
-        ]
         
-        result.append(AvailabilityResponse(
-            id=str(avail.id),
-            doctor_id=str(avail.doctor_id),
-            day_of_week=avail.day_of_week,
-            is_available=avail.is_available,
-            slots=slot_details
-        ))
+        with timer.stage("serialize"):
+            result.append(AvailabilityResponse(
+                id=str(avail.id),
+                doctor_id=str(avail.doctor_id),
+                day_of_week=avail.day_of_week,
+                slot_date=day_date,
+                is_available=avail.is_available,
+                slots=[SlotDetail(**slot) for slot in slots_to_dicts(updated_slots)]
+            ))
     
+    result.sort(key=lambda day: day.slot_date)
+    logger.info("availability.week", extra={"fields": {
+        "doctor_id": str(doctor.id),
+        "week_start": week_start,
+        "days": len(result),
+        "appointments": len(appointments),
+        **timer.fields()
+    }})
     return result
 
 @router.post("/set", response_model=AvailabilityResponse)
@@ -326,10 +657,6 @@ def set_availability(
     if not doctor:
         raise HTTPException(status_code=404, detail="Doctor profile not found")
     
-    # Convert time ranges to 30-minute slots
-    time_ranges_dict = [{"start_time": tr.start_time, "end_time": tr.end_time} for tr in availability_in.time_ranges]
-    new_slots = generate_slots_from_ranges(time_ranges_dict)
-    
     # Check if availability exists for this day
     existing = db.query(DoctorAvailability).filter(
         DoctorAvailability.doctor_id == doctor.id,
@@ -348,84 +675,96 @@ def set_availability(
             time_str = apt.appointment_time.strftime("%H:%M")
             booked_slots_map[time_str] = apt.id
     
-    # Merge new slots with existing, preserving booked status
-    if existing and existing.slots:
-        merged_slots = merge_slots_with_existing(
-            new_slots=new_slots,
-            existing_slots=existing.slots,
-            booked_slots_map=booked_slots_map
-        )
-    else:
-        # Mark booked slots in new slots
-        for slot in new_slots:
-            if slot["start_time"] in booked_slots_map:
-                slot["status"] = "booked"
-                slot["appointment_id"] = str(booked_slots_map[slot["start_time"]])
-        merged_slots = new_slots
+    availability = _apply_day(db, doctor, existing, availability_in, booked_slots_map)
+    db.commit()
+    refresh_doctor_slots(db, doctor.id)
+    invalidate_availability(doctor.id)
+    db.refresh(availability)
     
-    if existing:
-        # Update existing
-        existing.is_available = availability_in.is_available
-        existing.slots = merged_slots
-        db.commit()
-        db.refresh(existing)
-        
-        # Return with updated statuses
-        updated_slots = update_slot_statuses(
-            slots=existing.slots,
-            day_of_week=existing.day_of_week.value
-        )
-        slot_details = [
-            SlotDetail(
-                start_time=slot["start_time"],
-                end_time=slot["end_time"],
-                status=slot["status"],
-                appointment_id=slot.get("appointment_id")
-            )
-            for slot in updated_slots
+    # Return with updated statuses
+    return _day_response(availability)
+
+@router.put("/week", response_model=List[AvailabilityResponse])
+def set_week_availability(
+    week_in: AvailabilityWeekRequest,
+    current_user: User = Depends(deps.get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Set availability for several days (up to the whole week) in one transaction
+    
+    Each entry has the same shape as POST /availability/set; days that are not
+    listed are left unchanged.
+    
+    Example:
+    {
+        "days": [
+            {"day_of_week": "monday", "is_available": true, "time_ranges": [{"start_time": "09:00", "end_time": "17:00"}]},
+            {"day_of_week": "tuesday", "is_available": true, "time_ranges": [{"start_time": "09:00", "end_time": "13:00"}]}
         ]
+    }
+    """
+    doctor = db.query(Doctor).filter(Doctor.user_id == current_user.id).first()
+    if not doctor:
+        raise HTTPException(status_code=404, detail="Doctor profile not found")
+    
+    days = [day_in.day_of_week for day_in in week_in.days]
+    if len(set(days)) != len(days):
+        raise HTTPException(status_code=400, detail="Each day_of_week can only appear once")
+    if not days:
+        raise HTTPException(status_code=400, detail="At least one day is required")
+    
+    timer = StageTimer()
+    with timer.stage("query"):
+        existing_by_day = {
+            avail.day_of_week: avail
+            for avail in db.query(DoctorAvailability).filter(DoctorAvailability.doctor_id == doctor.id).all()
+        }
         
-        return AvailabilityResponse(
-            id=str(existing.id),
-            doctor_id=str(existing.doctor_id),
-            day_of_week=existing.day_of_week,
-            is_available=existing.is_available,
-            slots=slot_details
-        )
-    else:
-        # Create new
-        new_availability = DoctorAvailability(
-            doctor_id=doctor.id,
-            day_of_week=availability_in.day_of_week,
-            is_available=availability_in.is_available,
-            slots=merged_slots
-        )
-        db.add(new_availability)
-        db.commit()
-        db.refresh(new_availability)
-        
-        # Return with updated statuses
-        updated_slots = update_slot_statuses(
-            slots=new_availability.slots,
-            day_of_week=new_availability.day_of_week.value
-        )
-        slot_details = [
-            SlotDetail(
-                start_time=slot["start_time"],
-                end_time=slot["end_time"],
-                status=slot["status"],
-                appointment_id=slot.get("appointment_id")
+        # One scan of the upcoming active appointments, grouped by weekday
+        appointments = db.query(
+            Appointment.id,
+            Appointment.appointment_date,
+            Appointment.appointment_time
+        ).filter(
+            Appointment.doctor_id == doctor.id,
+            Appointment.appointment_date >= date.today(),
+            Appointment.status.in_([AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED])
+        ).all()
+    
+    booked_by_day: Dict[str, Dict[str, UUID]] = {}
+    for apt in appointments:
+        if apt.appointment_time:
+            day_map = booked_by_day.setdefault(apt.appointment_date.strftime("%A").lower(), {})
+            day_map[apt.appointment_time.strftime("%H:%M")] = apt.id
+    
+    with timer.stage("merge"):
+        for day_in in week_in.days:
+            _apply_day(
+                db, doctor, existing_by_day.get(day_in.day_of_week), day_in,
+                booked_by_day.get(day_in.day_of_week.value, {})
             )
-            for slot in updated_slots
-        ]
-        
-        return AvailabilityResponse(
-            id=str(new_availability.id),
-            doctor_id=str(new_availability.doctor_id),
-            day_of_week=new_availability.day_of_week,
-            is_available=new_availability.is_available,
-            slots=slot_details
-        )
+    
+    # Days, materialized slots and the summary are written in one transaction
+    with timer.stage("write"):
+        db.flush()
+        refresh_doctor_slots(db, doctor.id)
+    invalidate_availability(doctor.id)
+    
+    with timer.stage("serialize"):
+        records = db.query(DoctorAvailability).filter(
+            DoctorAvailability.doctor_id == doctor.id,
+            DoctorAvailability.day_of_week.in_(days)
+        ).all()
+        result = sorted((_day_response(avail) for avail in records), key=lambda day: day.slot_date)
+    
+    logger.info("availability.set_week", extra={"fields": {
+        "doctor_id": str(doctor.id),
+        "days": len(result),
+        "appointments": len(appointments),
+        **timer.fields()
+    }})
+    return result
 
 @router.post("/{day_of_week}/add-slot", response_model=AvailabilityResponse)
 def add_slot(
@@ -452,35 +791,32 @@ def add_slot(
         raise HTTPException(status_code=404, detail="Availability not found for this day")
     
     # Add slot(s)
+    existing_slots = SlotBitmap.from_record(availability)
+    _check_on_grid([{"start_time": slot_request.start_time, "end_time": slot_request.end_time}], existing_slots.granularity)
     updated_slots = add_individual_slot(
-        existing_slots=availability.slots or [],
+        existing=existing_slots,
         start_time=slot_request.start_time,
         end_time=slot_request.end_time
     )
     
-    availability.slots = updated_slots
+    updated_slots.store(availability)
     db.commit()
+    refresh_doctor_slots(db, doctor.id)
+    invalidate_availability(doctor.id)
     db.refresh(availability)
     
     # Return with updated statuses
     updated_slots_with_status = update_slot_statuses(
-        slots=availability.slots,
+        slots=SlotBitmap.from_record(availability),
         day_of_week=availability.day_of_week.value
     )
-    slot_details = [
-        SlotDetail(
-            start_time=slot["start_time"],
-            end_time=slot["end_time"],
-            status=slot["status"],
-            appointment_id=slot.get("appointment_id")
-        )
-        for slot in updated_slots_with_status
-    ]
+    slot_details = [SlotDetail(**slot) for slot in slots_to_dicts(updated_slots_with_status)]
     
     return AvailabilityResponse(
         id=str(availability.id),
         doctor_id=str(availability.doctor_id),
         day_of_week=availability.day_of_week,
+        slot_date=next_date_for_weekday(availability.day_of_week.value),
         is_available=availability.is_available,
         slots=slot_details
     )
@@ -513,33 +849,28 @@ def remove_slot(
     try:
         # Remove slot
         updated_slots = remove_individual_slot(
-            existing_slots=availability.slots or [],
+            existing=SlotBitmap.from_record(availability),
             start_time=slot_request.start_time
         )
         
-        availability.slots = updated_slots
+        updated_slots.store(availability)
         db.commit()
+        refresh_doctor_slots(db, doctor.id)
+        invalidate_availability(doctor.id)
         db.refresh(availability)
         
         # Return with updated statuses
         updated_slots_with_status = update_slot_statuses(
-            slots=availability.slots,
+            slots=SlotBitmap.from_record(availability),
             day_of_week=availability.day_of_week.value
         )
-        slot_details = [
-            SlotDetail(
-                start_time=slot["start_time"],
-                end_time=slot["end_time"],
-                status=slot["status"],
-                appointment_id=slot.get("appointment_id")
-            )
-            for slot in updated_slots_with_status
-        ]
+        slot_details = [SlotDetail(**slot) for slot in slots_to_dicts(updated_slots_with_status)]
         
         return AvailabilityResponse(
             id=str(availability.id),
             doctor_id=str(availability.doctor_id),
             day_of_week=availability.day_of_week,
+            slot_date=next_date_for_weekday(availability.day_of_week.value),
             is_available=availability.is_available,
             slots=slot_details
         )
@@ -567,13 +898,15 @@ def delete_availability(
         raise HTTPException(status_code=404, detail="Availability not found")
     
     # Check if any slots are booked
-    booked_slots = [slot for slot in (availability.slots or []) if slot.get("status") == SlotStatus.BOOKED]
-    if booked_slots:
+    booked_count = SlotBitmap.from_record(availability).booked.bit_count()
+    if booked_count:
         raise HTTPException(
             status_code=400,
-            detail=f"Cannot delete availability with {len(booked_slots)} booked slot(s). Cancel appointments first."
+            detail=f"Cannot delete availability with {booked_count} booked slot(s). Cancel appointments first."
         )
     
     db.delete(availability)
     db.commit()
+    refresh_doctor_slots(db, doctor.id)
+    invalidate_availability(doctor.id)
     return {"message": "Availability deleted"}
@@ -1,23 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, func
+from sqlalchemy import false, or_, func
 from typing import List, Optional
 from uuid import UUID
+from datetime import date, datetime, time, timedelta
 from app.database import get_db
 from app.models.user import User
 from app.models.doctor import Doctor, DoctorStatus
-from app.models.appointment import Appointment
-from app.schemas.doctor import DoctorUpdate, DoctorResponse
+from app.models.appointment import Appointment, AppointmentStatus, AppointmentType
+from app.schemas.doctor import DoctorUpdate, DoctorResponse, DoctorSort
 from app.schemas.appointment import AppointmentResponse
 from app.api import deps
+from app.config import settings
+from app.core.cache import invalidate_availability
+from app.core.etag import make_etag, not_modified
+from app.core.fieldsets import AppointmentView
+from app.core.pagination import paginate
+from app.models.availability import DoctorAvailability
+from app.utils.slot_manager import SlotBitmap, slot_grid
+from app.utils.schedule_templates import get_or_create_template
+from app.utils.slot_materializer import doctors_free_in_window, horizon_date, refresh_doctor_slots
 
 router = APIRouter()
 
 @router.get("/me/appointments", response_model=List[AppointmentResponse])
 def get_my_appointments(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
     status: Optional[str] = None,
+    view: AppointmentView = Depends(),
     current_user: User = Depends(deps.get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -26,7 +39,7 @@ def get_my_appointments(
     if not doctor:
         raise HTTPException(status_code=404, detail="Doctor profile not found")
     
-    query = db.query(Appointment).filter(Appointment.doctor_id == doctor.id)
+    query = view.apply(db.query(Appointment)).filter(Appointment.doctor_id == doctor.id)
     
     if status:
         try:
@@ -35,12 +48,12 @@ def get_my_appointments(
         except KeyError:
             raise HTTPException(status_code=400, detail="Invalid status")
     
-    appointments = query.order_by(
-        Appointment.appointment_date.desc(),
-        Appointment.appointment_time.desc()
-    ).offset(skip).limit(limit).all()
-    
-    return appointments
+    appointments = paginate(
+        query,
+        [Appointment.appointment_date, Appointment.appointment_time, Appointment.id],
+        response, limit, cursor, skip
+    )
+    return view.render(appointments, response)
 
 @router.get("/me", response_model=DoctorResponse)
 def read_doctor_me(
@@ -65,9 +78,23 @@ def update_doctor_me(
     update_data = doctor_in.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(doctor, field, value)
+    
+    # A new consultation length or buffer may need finer cells; existing bookings keep theirs
+    schedule_changed = "consultation_minutes" in update_data or "buffer_minutes" in update_data
+    if schedule_changed:
+        for availability in db.query(DoctorAvailability).filter(DoctorAvailability.doctor_id == doctor.id).all():
+            slots = SlotBitmap.from_record(availability)
+            grid = slot_grid(doctor.consultation_minutes, doctor.buffer_minutes, slots.granularity)
+            if grid != slots.granularity:
+                regridded = slots.regrid(grid)
+                availability.template = get_or_create_template(db, regridded.open, grid)
+                regridded.store(availability)
         
     db.add(doctor)
     db.commit()
+    if schedule_changed:
+        refresh_doctor_slots(db, doctor.id)
+        invalidate_availability(doctor.id)
     db.refresh(doctor)
     return doctor
 
@@ -80,9 +107,19 @@ def read_doctors(
     city: Optional[str] = None,
     min_rating: Optional[float] = Query(None, ge=0.0, le=5.0),
     min_experience: Optional[int] = Query(None, ge=0),
+    available_within_days: Optional[int] = Query(None, ge=0, le=60, description="Only doctors with a free slot before the end of today + N days"),
+    available_on: Optional[date] = Query(None, description="Only doctors with a free slot on this date (default today if a time is given)"),
+    time_from: Optional[time] = Query(None, description="Free slot starting at or after this time (HH:MM)"),
+    time_to: Optional[time] = Query(None, description="Free slot starting before this time (HH:MM)"),
+    appointment_type: Optional[AppointmentType] = None,
+    sort: DoctorSort = DoctorSort.RATING,
     db: Session = Depends(get_db)
 ):
-    """List doctors with search and filters (public endpoint)"""
+    """
+    List doctors with search and filters (public endpoint)
+    
+    sort=available_soonest orders by the precomputed next free slot
+    """
     query = db.query(Doctor).filter(Doctor.status == DoctorStatus.ACTIVE)
     
     # Search by name
@@ -111,19 +148,71 @@ def read_doctors(
     if min_experience is not None:
         query = query.filter(Doctor.experience_years >= min_experience)
     
-    # Order by rating and experience
-    doctors = query.order_by(
-        Doctor.average_rating.desc(),
-        Doctor.experience_years.desc()
-    ).offset(skip).limit(limit).all()
+    # Filter by the precomputed next free slot
+    if available_within_days is not None:
+        cutoff = datetime.combine(date.today() + timedelta(days=available_within_days + 1), datetime.min.time())
+        query = query.filter(Doctor.next_available_at < cutoff)
+    
+    # Filter by a free slot in a time window, answered from doctor_slots in one query
+    if available_on is not None or time_from is not None or time_to is not None:
+        today = date.today()
+        on_date = available_on or today
+        if on_date < today:
+            raise HTTPException(status_code=400, detail="available_on cannot be in the past")
+        if on_date > horizon_date():
+            raise HTTPException(
+                status_code=400,
+                detail=f"Can only search availability up to {settings.SLOT_MATERIALIZE_DAYS} days ahead"
+            )
+        from_minute = time_from.hour * 60 + time_from.minute if time_from else 0
+        to_minute = time_to.hour * 60 + time_to.minute if time_to else 24 * 60
+        if to_minute <= from_minute:
+            raise HTTPException(status_code=400, detail="time_to must be after time_from")
+        if on_date == today:
+            # Slots that already started today are not bookable, even if still marked available
+            now = datetime.now()
+            from_minute = max(from_minute, now.hour * 60 + now.minute)
+        if from_minute < to_minute:
+            query = query.filter(Doctor.id.in_(doctors_free_in_window(on_date, from_minute, to_minute)))
+        else:
+            query = query.filter(false())
+    
+    # Filter by consultation type the doctor offers (a fee is set for it)
+    if appointment_type == AppointmentType.VIDEO:
+        query = query.filter(Doctor.video_consultation_fee.isnot(None))
+    elif appointment_type == AppointmentType.IN_PERSON:
+        query = query.filter(Doctor.in_person_consultation_fee.isnot(None))
+    
+    if sort == DoctorSort.AVAILABLE_SOONEST:
+        query = query.order_by(
+            Doctor.next_available_at.asc().nulls_last(),
+            Doctor.average_rating.desc()
+        )
+    else:
+        # Order by rating and experience
+        query = query.order_by(
+            Doctor.average_rating.desc(),
+            Doctor.experience_years.desc()
+        )
+    doctors = query.offset(skip).limit(limit).all()
     
     return doctors
 
 @router.get("/{doctor_id}", response_model=DoctorResponse)
 def read_doctor(
     doctor_id: UUID,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db)
 ):
+    # The summary columns are listed too since the availability job rewrites them in bulk
+    version = db.query(Doctor.updated_at, Doctor.next_available_at, Doctor.free_slots_7d).filter(Doctor.id == doctor_id).first()
+    if not version:
+        raise HTTPException(status_code=404, detail="Doctor not found")
+    cached = not_modified(request, response, make_etag("doctor", doctor_id, *version))
+    if cached:
+        return cached
+    
     doctor = db.query(Doctor).filter(Doctor.id == doctor_id).first()
     if not doctor:
         raise HTTPException(status_code=404, detail="Doctor not found")
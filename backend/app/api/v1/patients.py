@@ -1,22 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.orm import Session
+from typing import List, Optional
 from app.database import get_db
 from app.models.user import User
 from app.models.patient import Patient
 from app.models.appointment import Appointment
+from app.models.doctor import Doctor
 from app.schemas.patient import PatientUpdate, PatientResponse
-from app.schemas.appointment import AppointmentResponse
+from app.schemas.appointment import AppointmentHistoryResponse, AppointmentResponse
 from app.api import deps
+from app.core.etag import make_etag, not_modified
+from app.core.fieldsets import AppointmentView
+from app.core.pagination import NEXT_CURSOR_HEADER, paginate
 
 router = APIRouter()
 
 @router.get("/me", response_model=PatientResponse)
 def read_patient_me(
+    request: Request,
+    response: Response,
     current_user: User = Depends(deps.get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    patient = db.query(Patient).filter(Patient.user_id == current_user.id).first()
+    version = db.query(Patient.id, Patient.updated_at).filter(Patient.user_id == current_user.id).first()
+    if not version:
+        raise HTTPException(status_code=404, detail="Patient profile not found")
+    cached = not_modified(request, response, make_etag("patient", *version))
+    if cached:
+        return cached
+    
+    patient = db.query(Patient).filter(Patient.id == version.id).first()
     if not patient:
         raise HTTPException(status_code=404, detail="Patient profile not found")
     return patient
@@ -42,6 +55,8 @@ def update_patient_me(
 
 @router.get("/me/appointments", response_model=List[AppointmentResponse])
 def read_my_appointments(
+    response: Response,
+    view: AppointmentView = Depends(),
     current_user: User = Depends(deps.get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -55,16 +70,48 @@ def read_my_appointments(
     patient = db.query(Patient).filter(Patient.user_id == current_user.id).first()
     if not patient:
         # Gracefully handle missing patient profile for logged-in users
-        return []
+        return view.render([], response)
         
-    appointments = db.query(Appointment).options(
-        joinedload(Appointment.doctor),
-        joinedload(Appointment.patient)
-    ).filter(
+    appointments = view.apply(db.query(Appointment)).filter(
         Appointment.patient_id == patient.id
     ).order_by(
         Appointment.appointment_date.desc(),
         Appointment.appointment_time.desc()
     ).all()
     
-    return appointments
+    return view.render(appointments, response)
+
+@router.get("/me/appointments/history", response_model=AppointmentHistoryResponse)
+def read_my_appointment_history(
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    current_user: User = Depends(deps.get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Paginated appointment history for the current patient, newest first
+    
+    Appointments carry no nested objects: the caller's own patient profile is
+    left out and each distinct doctor appears once in the doctors map, so the
+    response grows with the number of doctors rather than appointments.
+    """
+    patient_id = db.query(Patient.id).filter(Patient.user_id == current_user.id).scalar()
+    if not patient_id:
+        return {"appointments": [], "doctors": {}, "next_cursor": None}
+    
+    appointments = paginate(
+        db.query(Appointment).filter(Appointment.patient_id == patient_id),
+        [Appointment.appointment_date, Appointment.appointment_time, Appointment.id],
+        response, limit, cursor
+    )
+    
+    # One IN query for the page's distinct doctors instead of a join per row
+    doctor_ids = {appointment.doctor_id for appointment in appointments}
+    doctors = db.query(Doctor).filter(Doctor.id.in_(doctor_ids)).all() if doctor_ids else []
+    
+    return {
+        "appointments": appointments,
+        "doctors": {str(doctor.id): doctor for doctor in doctors},
+        "next_cursor": response.headers.get(NEXT_CURSOR_HEADER)
+    }
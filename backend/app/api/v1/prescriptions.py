@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 from uuid import UUID
@@ -11,13 +11,17 @@ from app.models.prescription import Prescription
 from app.models.appointment import Appointment
 from app.schemas.prescription import PrescriptionCreate, PrescriptionResponse
 from app.api import deps
+from app.core.pagination import paginate
+from app.utils.number_allocator import prescription_numbers
 
 router = APIRouter()
 
 @router.get("/", response_model=List[PrescriptionResponse])
 def list_prescriptions(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
     appointment_id: Optional[UUID] = None,
     current_user: User = Depends(deps.get_current_active_user),
     db: Session = Depends(get_db)
@@ -42,17 +46,15 @@ def list_prescriptions(
     if appointment_id:
         query = query.filter(Prescription.appointment_id == appointment_id)
     
-    prescriptions = query.order_by(
-        Prescription.created_at.desc()
-    ).offset(skip).limit(limit).all()
-    
-    return prescriptions
+    return paginate(query, [Prescription.created_at, Prescription.id], response, limit, cursor, skip)
 
 
 @router.get("/me", response_model=List[PrescriptionResponse])
 def get_my_prescriptions(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
     current_user: User = Depends(deps.get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -72,11 +74,7 @@ def get_my_prescriptions(
     else:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    prescriptions = query.order_by(
-        Prescription.created_at.desc()
-    ).offset(skip).limit(limit).all()
-    
-    return prescriptions
+    return paginate(query, [Prescription.created_at, Prescription.id], response, limit, cursor, skip)
 
 
 @router.post("/", response_model=PrescriptionResponse)
@@ -109,8 +107,7 @@ def create_prescription(
         raise HTTPException(status_code=400, detail="Prescription already exists for this appointment")
     
     # Generate prescription number
-    count = db.query(Prescription).count()
-    rx_number = f"RX-{str(count + 1).zfill(6)}"
+    rx_number = prescription_numbers.next(db)
     
     prescription = Prescription(
         **prescription_in.dict(),
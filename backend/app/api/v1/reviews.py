@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List, Optional
@@ -12,6 +12,8 @@ from app.models.review import Review
 from app.schemas.review import ReviewCreate, ReviewResponse
 from pydantic import BaseModel
 from app.api import deps
+from app.core.etag import make_etag, not_modified
+from app.core.pagination import paginate
 
 router = APIRouter()
 
@@ -21,8 +23,10 @@ class ReviewUpdate(BaseModel):
 
 @router.get("/me", response_model=List[ReviewResponse])
 def get_my_reviews(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
     current_user: User = Depends(deps.get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -31,20 +35,16 @@ def get_my_reviews(
         patient = db.query(Patient).filter(Patient.user_id == current_user.id).first()
         if not patient:
             raise HTTPException(status_code=404, detail="Patient profile not found")
-        reviews = db.query(Review).filter(
-            Review.patient_id == patient.id
-        ).order_by(Review.created_at.desc()).offset(skip).limit(limit).all()
+        query = db.query(Review).filter(Review.patient_id == patient.id)
     elif current_user.role == UserRole.DOCTOR:
         doctor = db.query(Doctor).filter(Doctor.user_id == current_user.id).first()
         if not doctor:
             raise HTTPException(status_code=404, detail="Doctor profile not found")
-        reviews = db.query(Review).filter(
-            Review.doctor_id == doctor.id
-        ).order_by(Review.created_at.desc()).offset(skip).limit(limit).all()
+        query = db.query(Review).filter(Review.doctor_id == doctor.id)
     else:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    return reviews
+    return paginate(query, [Review.created_at, Review.id], response, limit, cursor, skip)
 
 
 @router.post("/", response_model=ReviewResponse)
@@ -101,15 +101,24 @@ def create_review(
 @router.get("/doctor/{doctor_id}", response_model=List[ReviewResponse])
 def read_doctor_reviews(
     doctor_id: UUID,
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
     db: Session = Depends(get_db)
 ):
     """Get reviews for a specific doctor (public endpoint)"""
-    reviews = db.query(Review).filter(
+    # Count and latest update change on every create, edit and delete
+    count, last_updated = db.query(func.count(Review.id), func.max(Review.updated_at)).filter(
         Review.doctor_id == doctor_id
-    ).order_by(Review.created_at.desc()).offset(skip).limit(limit).all()
-    return reviews
+    ).one()
+    cached = not_modified(request, response, make_etag("reviews", doctor_id, count, last_updated, skip, limit, cursor))
+    if cached:
+        return cached
+    
+    query = db.query(Review).filter(Review.doctor_id == doctor_id)
+    return paginate(query, [Review.created_at, Review.id], response, limit, cursor, skip)
 
 
 @router.put("/{review_id}", response_model=ReviewResponse)
@@ -14,6 +14,44 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
     
+    # Availability
+    SLOT_GRANULARITY_MINUTES: int = 30
+    SLOT_MATERIALIZE_DAYS: int = 60
+    SLOT_ROLL_FORWARD_ENABLED: bool = True
+    SLOT_ROLL_FORWARD_INTERVAL_SECONDS: int = 3600
+    AVAILABILITY_SUMMARY_INTERVAL_SECONDS: int = 300  # Refresh of next_available_at values that have passed
+    SLOT_HOLD_MINUTES: int = 10  # How long POST /availability/hold reserves a slot during checkout
+    SLOT_STREAM_HEARTBEAT_SECONDS: int = 15  # Keep-alive comment interval on availability streams
+    
+    # Appointment reminders
+    REMINDERS_ENABLED: bool = True
+    REMINDER_OFFSETS_MINUTES: list[int] = [1440, 60]  # Reminders sent this long before each appointment
+    REMINDER_INTERVAL_SECONDS: int = 60
+    
+    # Stale appointment sweeper
+    APPOINTMENT_SWEEP_ENABLED: bool = True
+    APPOINTMENT_SWEEP_STATUS: str = "NO_SHOW"  # AppointmentStatus name given to active appointments left in the past
+    APPOINTMENT_SWEEP_GRACE_MINUTES: int = 120  # Time after the start before an appointment counts as stale
+    APPOINTMENT_SWEEP_INTERVAL_SECONDS: int = 600
+    
+    # Background jobs
+    CELERY_BROKER_URL: Optional[str] = None  # When set, Celery beat runs reminders and sweeps instead of the API process
+    
+    # Caching
+    REDIS_URL: Optional[str] = None
+    AVAILABILITY_CACHE_SIZE: int = 4096
+    AVAILABILITY_CACHE_TTL_SECONDS: int = 300
+    AVAILABILITY_LOCAL_CACHE_TTL_SECONDS: int = 5
+    
+    # Numbering (values reserved per worker per round trip; 1 = plain nextval)
+    NUMBER_BLOCK_SIZE: int = 1
+    
+    # Logging
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: str = ""  # Per-module overrides, e.g. "app.utils.slot_manager=DEBUG"
+    LOG_FORMAT: str = "json"  # "json" or "text"
+    LOG_DEBUG_SAMPLE_RATE: float = 0.01  # Share of requests whose DEBUG records are kept
+    
     # CORS
     BACKEND_CORS_ORIGINS: list[str] = ["http://localhost:3000", "http://localhost:8000"]
     
@@ -0,0 +1,177 @@
+"""
+Two-tier cache: an in-process LRU with TTL in front of an optional Redis
+
+Local entries use a short TTL so other workers' invalidations are picked up
+quickly; Redis holds the shared copy for longer. If REDIS_URL is not set or
+Redis is unreachable the cache silently runs local-only.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from app.config import settings
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - redis is in requirements.txt
+    redis = None
+
+
+class LRUCache:
+    """Thread-safe LRU cache whose entries expire after ttl seconds"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_prefix(self, prefix: str) -> None:
+        with self._lock:
+            for key in [k for k in self._data if k.startswith(prefix)]:
+                del self._data[key]
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class TwoTierCache:
+    """
+    Local LRU + Redis cache for JSON-serializable values
+
+    Keeps global and per-key hit/miss counters (per-key counters are capped
+    at maxsize keys, least recently touched dropped first).
+    """
+
+    def __init__(self, namespace: str, maxsize: int, local_ttl: float, ttl: int, redis_url: Optional[str] = None):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.local = LRUCache(maxsize, local_ttl)
+        self._redis = None
+        if redis_url and redis is not None:
+            self._redis = redis.Redis.from_url(redis_url, socket_timeout=0.2, socket_connect_timeout=0.2)
+        self._lock = threading.Lock()
+        self._counters: "OrderedDict[str, list]" = OrderedDict()
+        self._maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _count(self, key: str, hit: bool) -> None:
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None:
+                counter = self._counters[key] = [0, 0]
+            else:
+                self._counters.move_to_end(key)
+            counter[0 if hit else 1] += 1
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            while len(self._counters) > self._maxsize:
+                self._counters.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.local.get(key)
+        if value is None and self._redis is not None:
+            try:
+                raw = self._redis.get(self._key(key))
+            except redis.RedisError:
+                raw = None
+            if raw is not None:
+                value = json.loads(raw)
+                self.local.set(key, value)
+        self._count(key, value is not None)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self.local.set(key, value)
+        if self._redis is not None:
+            try:
+                self._redis.set(self._key(key), json.dumps(value), ex=self.ttl)
+            except redis.RedisError:
+                pass
+
+    def delete(self, key: str) -> None:
+        self.local.delete(key)
+        if self._redis is not None:
+            try:
+                self._redis.delete(self._key(key))
+            except redis.RedisError:
+                pass
+
+    def delete_prefix(self, prefix: str) -> None:
+        self.local.delete_prefix(prefix)
+        if self._redis is not None:
+            try:
+                keys = list(self._redis.scan_iter(match=f"{self._key(prefix)}*", count=500))
+                if keys:
+                    self._redis.delete(*keys)
+            except redis.RedisError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            keys = {key: {"hits": hits, "misses": misses} for key, (hits, misses) in self._counters.items()}
+            total = self.hits + self.misses
+            return {
+                "namespace": self.namespace,
+                "redis": self._redis is not None,
+                "local_entries": len(self.local),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+                "keys": keys
+            }
+
+
+# Computed free slots per (doctor_id, date)
+availability_cache = TwoTierCache(
+    namespace="availability",
+    maxsize=settings.AVAILABILITY_CACHE_SIZE,
+    local_ttl=settings.AVAILABILITY_LOCAL_CACHE_TTL_SECONDS,
+    ttl=settings.AVAILABILITY_CACHE_TTL_SECONDS,
+    redis_url=settings.REDIS_URL
+)
+
+
+def availability_key(doctor_id: UUID, on_date: date) -> str:
+    return f"{doctor_id}:{on_date.isoformat()}"
+
+
+def invalidate_availability(doctor_id: UUID, on_date: Optional[date] = None) -> None:
+    """Drop cached slots for one date, or for every date when on_date is None"""
+    if on_date is None:
+        availability_cache.delete_prefix(f"{doctor_id}:")
+    else:
+        availability_cache.delete(availability_key(doctor_id, on_date))
@@ -0,0 +1,59 @@
+"""
+Conditional request helpers (ETag / If-None-Match / If-Match)
+
+Read endpoints derive a version for the resource as cheaply as they can: a
+single-row query on updated_at, an aggregate over a collection, or the data
+already sitting in a cache. The version becomes an ETag, and a matching
+If-None-Match is answered with 304 before ORM objects are loaded or response
+models are built.
+
+    etag = make_etag("doctor", doctor_id, updated_at)
+    cached = not_modified(request, response, etag)
+    if cached:
+        return cached
+
+Writes guarded by If-Match use a strong ETag over the row's version column and
+fail with 412 when the client's copy is out of date:
+
+    check_if_match(request, make_etag("appointment", appointment.id, appointment.version, weak=False))
+"""
+import hashlib
+import json
+from typing import Any, Optional
+
+from fastapi import HTTPException, Request, Response
+
+
+def make_etag(*parts: Any, weak: bool = True) -> str:
+    """ETag over JSON-serializable parts (dates, UUIDs and enums are stringified)"""
+    payload = json.dumps(parts, default=str, sort_keys=True, separators=(",", ":"))
+    tag = f'"{hashlib.sha1(payload.encode()).hexdigest()}"'
+    return f"W/{tag}" if weak else tag
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Weak comparison of the If-None-Match header against etag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Set the ETag on the response; a 304 to return instead if the client already has it"""
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return None
+
+
+def check_if_match(request: Request, etag: str) -> None:
+    """412 unless If-Match is absent, "*" or lists etag (strong comparison)"""
+    header = request.headers.get("if-match")
+    if not header or header.strip() == "*":
+        return
+    if etag not in [tag.strip() for tag in header.split(",")]:
+        raise HTTPException(status_code=412, detail="Precondition Failed: the resource has changed; reload it and try again")
@@ -0,0 +1,200 @@
+"""
+Slot change events for live availability streams
+
+Endpoints that change a doctor's slots call slot_events.publish(doctor_id, date)
+after committing. With REDIS_URL set the notice goes out on a Redis pub/sub
+channel so every worker hears it; otherwise it is delivered in-process.
+
+Each worker that has stream subscribers for a (doctor, date) reloads the free
+slots once per notice, on a background thread, and hands the same snapshot to
+all of them; the stream turns consecutive snapshots into diffs. Workers without
+subscribers ignore the notice, so publishing costs nothing when nobody listens.
+
+Holds that time out are never published by anyone, so each snapshot also
+schedules a local reload at the earliest hold expiry for its (doctor, date).
+"""
+import asyncio
+import heapq
+import json
+import queue
+import threading
+import time
+from datetime import date
+from typing import Dict, List, Optional, Set, Tuple
+from uuid import UUID
+
+from app.config import settings
+from app.core.holds import slot_holds, without_held
+from app.core.log import get_logger
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - redis is in requirements.txt
+    redis = None
+
+logger = get_logger(__name__)
+
+Key = Tuple[str, str]
+
+# Reload this long after a hold's expires_at, so it is no longer live when the snapshot is read
+EXPIRY_GRACE_SECONDS = 0.05
+
+
+def load_free_slots(doctor_id: UUID, on_date: date) -> List[Dict]:
+    """Free, unheld slots for one doctor's date, read in a short-lived session"""
+    from app.database import SessionLocal
+    from app.utils.slot_materializer import free_slots
+
+    db = SessionLocal()
+    try:
+        slots = free_slots(db, [doctor_id], on_date, on_date).get((doctor_id, on_date), [])
+    finally:
+        db.close()
+    return without_held(doctor_id, on_date, slots)
+
+
+class SlotEventHub:
+    """In-process fan-out of slot snapshots to asyncio subscribers, with optional Redis relay"""
+
+    def __init__(self, channel: str, redis_url: Optional[str] = None):
+        self.channel = channel
+        self.redis_url = redis_url
+        self._redis = None
+        if redis_url and redis is not None:
+            self._redis = redis.Redis.from_url(redis_url, socket_timeout=0.2, socket_connect_timeout=0.2)
+        self._lock = threading.Lock()
+        self._subscribers: Dict[Key, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._pending: Set[Key] = set()
+        self._notices: "queue.Queue[Optional[Key]]" = queue.Queue()
+        # (when, key) reloads for hold expiries, and the earliest one scheduled per key
+        self._timers: List[Tuple[float, Key]] = []
+        self._expiries: Dict[Key, float] = {}
+        self._started = False
+
+    @staticmethod
+    def _key(doctor_id, on_date) -> Key:
+        return str(doctor_id), on_date.isoformat() if isinstance(on_date, date) else str(on_date)
+
+    def _start(self) -> None:
+        # Threads are started by the first subscriber, so workers that never stream run none
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        threading.Thread(target=self._dispatch, name="slot-events", daemon=True).start()
+        if self._redis is not None:
+            threading.Thread(target=self._listen, name="slot-events-redis", daemon=True).start()
+
+    def subscribe(self, doctor_id: UUID, on_date: date) -> asyncio.Queue:
+        """Queue of slot snapshots for one doctor's date; call from the event loop"""
+        self._start()
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(maxsize=16))
+        with self._lock:
+            self._subscribers.setdefault(self._key(doctor_id, on_date), set()).add(subscriber)
+        return subscriber[1]
+
+    def unsubscribe(self, doctor_id: UUID, on_date: date, snapshots: asyncio.Queue) -> None:
+        key = self._key(doctor_id, on_date)
+        with self._lock:
+            subscribers = self._subscribers.get(key, set())
+            subscribers.difference_update({s for s in subscribers if s[1] is snapshots})
+            if not subscribers:
+                self._subscribers.pop(key, None)
+
+    def snapshot(self, doctor_id: UUID, on_date: date) -> List[Dict]:
+        """Free slots for a stream, with a reload scheduled for when the next hold runs out"""
+        slots = load_free_slots(doctor_id, on_date)
+        expiries = [hold["expires_at"] for hold in slot_holds.holds_for(doctor_id, on_date)]
+        if expiries:
+            self._schedule(self._key(doctor_id, on_date), min(expiries) + EXPIRY_GRACE_SECONDS)
+        return slots
+
+    def _schedule(self, key: Key, when: float) -> None:
+        with self._lock:
+            scheduled = self._expiries.get(key)
+            if scheduled is not None and scheduled <= when:
+                return
+            self._expiries[key] = when
+            heapq.heappush(self._timers, (when, key))
+            earliest = self._timers[0][0] == when
+        if earliest:
+            # Wake the dispatch thread so it waits for the new deadline
+            self._notices.put(None)
+
+    def _due_timers(self) -> Optional[float]:
+        """Notify keys whose expiry reload is due; seconds until the next one (None if none)"""
+        now = time.time()
+        due = []
+        with self._lock:
+            while self._timers and self._timers[0][0] <= now:
+                when, key = heapq.heappop(self._timers)
+                if self._expiries.get(key) == when:
+                    del self._expiries[key]
+                    due.append(key)
+            timeout = self._timers[0][0] - now if self._timers else None
+        for key in due:
+            self._notify(key)
+        return timeout
+
+    def publish(self, doctor_id: UUID, on_date: date) -> None:
+        """Announce that a doctor's slots on a date changed"""
+        key = self._key(doctor_id, on_date)
+        if self._redis is not None:
+            try:
+                self._redis.publish(self.channel, json.dumps(key))
+                return
+            except redis.RedisError:
+                logger.warning("slot_events.publish_failed", extra={"fields": {"doctor_id": key[0], "date": key[1]}})
+        self._notify(key)
+
+    def _notify(self, key: Key) -> None:
+        with self._lock:
+            if key not in self._subscribers or key in self._pending:
+                return
+            # Notices for a key that is already queued collapse into one reload
+            self._pending.add(key)
+        self._notices.put(key)
+
+    def _dispatch(self) -> None:
+        while True:
+            try:
+                key = self._notices.get(timeout=self._due_timers())
+            except queue.Empty:
+                continue
+            if key is None:
+                continue
+            with self._lock:
+                self._pending.discard(key)
+                subscribers = list(self._subscribers.get(key, ()))
+            if not subscribers:
+                continue
+            try:
+                slots = self.snapshot(UUID(key[0]), date.fromisoformat(key[1]))
+            except Exception:
+                logger.exception("slot_events.load_failed", extra={"fields": {"doctor_id": key[0], "date": key[1]}})
+                continue
+            for loop, snapshots in subscribers:
+                loop.call_soon_threadsafe(self._offer, snapshots, slots)
+
+    @staticmethod
+    def _offer(snapshots: asyncio.Queue, slots: List[Dict]) -> None:
+        # A slow client only needs the latest snapshot
+        if snapshots.full():
+            snapshots.get_nowait()
+        snapshots.put_nowait(slots)
+
+    def _listen(self) -> None:
+        # Separate connection without a socket timeout, since it blocks waiting for messages
+        while True:
+            try:
+                pubsub = redis.Redis.from_url(self.redis_url).pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    doctor_id, on_date = json.loads(message["data"])
+                    self._notify((doctor_id, on_date))
+            except Exception:
+                logger.exception("slot_events.listen_failed")
+                time.sleep(1)
+
+
+slot_events = SlotEventHub(channel="slot_events", redis_url=settings.REDIS_URL)
@@ -0,0 +1,90 @@
+"""
+Sparse fieldsets (?fields=) and opt-in expansion (?expand=) for appointment endpoints
+
+    GET /appointments/?fields=appointment_date,appointment_time,status
+    GET /appointments/?expand=doctor
+    GET /appointments/{id}?fields=status&expand=doctor,patient
+
+Without either parameter responses keep their full AppointmentResponse shape
+with doctor and patient nested. Once either is given only the listed columns
+are selected (load_only), only the listed relationships are joined, and the
+rows are serialized straight to JSON without building response models for the
+parts that were not asked for.
+"""
+from typing import Any, Dict, List, Optional, Union
+
+from fastapi import HTTPException, Query, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Query as ORMQuery, joinedload, load_only, noload
+
+from app.models.appointment import Appointment
+from app.schemas.appointment import AppointmentResponse
+from app.schemas.doctor import DoctorResponse
+from app.schemas.patient import PatientResponse
+
+EXPANDABLE = {
+    "doctor": (Appointment.doctor, DoctorResponse),
+    "patient": (Appointment.patient, PatientResponse),
+}
+APPOINTMENT_FIELDS = [name for name in AppointmentResponse.model_fields if name not in EXPANDABLE]
+
+# Always selected: the primary key, the keyset sort columns, the owners used in permission checks
+# and the version (ETag)
+ALWAYS_LOADED = ("id", "appointment_date", "appointment_time", "doctor_id", "patient_id", "version")
+
+
+def _split(value: Optional[str]) -> List[str]:
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+
+class AppointmentView:
+    """Parsed ?fields= and ?expand= (use as a FastAPI dependency)"""
+
+    def __init__(
+        self,
+        fields: Optional[str] = Query(None, description="Comma-separated appointment fields, e.g. appointment_date,appointment_time,status"),
+        expand: Optional[str] = Query(None, description="Comma-separated relationships to include: doctor, patient")
+    ):
+        self.full = fields is None and expand is None
+        self.fields = _split(fields) or list(APPOINTMENT_FIELDS)
+        self.expand = list(EXPANDABLE) if self.full else _split(expand)
+
+        unknown = [name for name in self.fields if name not in APPOINTMENT_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown field(s): {', '.join(unknown)}")
+        unknown = [name for name in self.expand if name not in EXPANDABLE]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Cannot expand: {', '.join(unknown)}")
+
+    def apply(self, query: ORMQuery) -> ORMQuery:
+        """Join the expanded relationships only, and narrow the SELECT to the requested columns"""
+        options = [
+            joinedload(relationship) if name in self.expand else noload(relationship)
+            for name, (relationship, _) in EXPANDABLE.items()
+        ]
+        if not self.full:
+            columns = dict.fromkeys([*ALWAYS_LOADED, *self.fields])
+            options.append(load_only(*[getattr(Appointment, name) for name in columns]))
+        return query.options(*options)
+
+    def _dump(self, appointment: Appointment) -> Dict[str, Any]:
+        data = {"id": appointment.id}
+        for name in self.fields:
+            data[name] = getattr(appointment, name)
+        for name in self.expand:
+            related = getattr(appointment, name)
+            data[name] = EXPANDABLE[name][1].model_validate(related).model_dump() if related is not None else None
+        return data
+
+    def render(self, result: Union[Appointment, List[Appointment]], response: Response) -> Any:
+        """
+        The ORM result as-is for full responses, otherwise a JSONResponse of the selected parts
+
+        Headers already set on response (ETag, X-Next-Cursor) are carried over.
+        """
+        if self.full:
+            return result
+        content = [self._dump(item) for item in result] if isinstance(result, list) else self._dump(result)
+        headers = {key: value for key, value in response.headers.items() if key.lower() != "content-length"}
+        return JSONResponse(jsonable_encoder(content), headers=headers)
@@ -0,0 +1,209 @@
+"""
+Slot holds: short-lived reservations of a doctor's time while a patient checks out
+
+A hold covers [start_minute, end_minute) on one doctor's date and expires after
+SLOT_HOLD_MINUTES. Holds live in Redis when REDIS_URL is set (so every worker
+sees them) and in process memory otherwise. Availability reads hide held
+slots and booking refuses them unless the caller presents the hold token.
+"""
+import json
+import secrets
+import threading
+import time
+from datetime import date
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from app.config import settings
+from app.utils.slot_manager import time_to_minutes
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - redis is in requirements.txt
+    redis = None
+
+
+class SlotHeld(Exception):
+    """The requested time overlaps another patient's hold"""
+
+
+class SlotHoldStore:
+    """Expiring holds per (doctor_id, date), looked up by token"""
+
+    def __init__(self, namespace: str, redis_url: Optional[str] = None):
+        self.namespace = namespace
+        self._redis = None
+        if redis_url and redis is not None:
+            self._redis = redis.Redis.from_url(redis_url, socket_timeout=0.2, socket_connect_timeout=0.2)
+        self._lock = threading.Lock()
+        self._by_day: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._by_token: Dict[str, Dict[str, Any]] = {}
+
+    def _day_key(self, doctor_id: UUID, on_date: date) -> str:
+        return f"{self.namespace}:{doctor_id}:{on_date.isoformat()}"
+
+    def _token_key(self, token: str) -> str:
+        return f"{self.namespace}:token:{token}"
+
+    @staticmethod
+    def _live(holds: Dict[str, Dict[str, Any]], now: float) -> Dict[str, Dict[str, Any]]:
+        return {token: hold for token, hold in holds.items() if hold["expires_at"] > now}
+
+    @staticmethod
+    def _check_free(holds: Dict[str, Dict[str, Any]], start_minute: int, end_minute: int, patient_id: UUID) -> None:
+        # A day has a handful of holds at most, so a scan is enough; the patient's own holds never conflict
+        for hold in holds.values():
+            if hold["patient_id"] != str(patient_id) and hold["start_minute"] < end_minute and hold["end_minute"] > start_minute:
+                raise SlotHeld()
+
+    def create(
+        self,
+        doctor_id: UUID,
+        on_date: date,
+        start_minute: int,
+        end_minute: int,
+        patient_id: UUID,
+        ttl_seconds: int,
+        buffer_minutes: int = 0
+    ) -> Dict[str, Any]:
+        """
+        Place a hold on [start_minute, end_minute), the appointment plus its buffer
+
+        Raises SlotHeld if another patient holds an overlapping time. A patient
+        keeps at most one hold per doctor and date; a new one replaces the old.
+        """
+        now = time.time()
+        token = secrets.token_urlsafe(24)
+        hold = {
+            "token": token,
+            "doctor_id": str(doctor_id),
+            "date": on_date.isoformat(),
+            "start_minute": start_minute,
+            "end_minute": end_minute,
+            "buffer_minutes": buffer_minutes,
+            "patient_id": str(patient_id),
+            "expires_at": now + ttl_seconds
+        }
+        day_key = self._day_key(doctor_id, on_date)
+
+        if self._redis is not None:
+            try:
+                return self._create_redis(day_key, hold, ttl_seconds, now)
+            except redis.RedisError:
+                pass
+
+        with self._lock:
+            holds = self._live(self._by_day.get(day_key, {}), now)
+            self._check_free(holds, start_minute, end_minute, patient_id)
+            for old_token, old in list(holds.items()):
+                if old["patient_id"] == str(patient_id):
+                    del holds[old_token]
+                    self._by_token.pop(old_token, None)
+            holds[token] = hold
+            self._by_day[day_key] = holds
+            self._by_token[token] = hold
+            for stale in [t for t, h in self._by_token.items() if h["expires_at"] <= now]:
+                del self._by_token[stale]
+        return hold
+
+    def _create_redis(self, day_key: str, hold: Dict[str, Any], ttl_seconds: int, now: float) -> Dict[str, Any]:
+        # Optimistic check-and-set on the day's hash so two workers cannot hold overlapping times
+        with self._redis.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(day_key)
+                    holds = self._live(
+                        {token.decode(): json.loads(raw) for token, raw in pipe.hgetall(day_key).items()}, now
+                    )
+                    self._check_free(holds, hold["start_minute"], hold["end_minute"], hold["patient_id"])
+                    replaced = [token for token, old in holds.items() if old["patient_id"] == hold["patient_id"]]
+                    expired = [token for token in pipe.hkeys(day_key) if token.decode() not in holds]
+                    pipe.multi()
+                    for token in replaced:
+                        pipe.hdel(day_key, token)
+                        pipe.delete(self._token_key(token))
+                    if expired:
+                        pipe.hdel(day_key, *expired)
+                    pipe.hset(day_key, hold["token"], json.dumps(hold))
+                    pipe.expire(day_key, ttl_seconds)
+                    pipe.set(self._token_key(hold["token"]), json.dumps(hold), ex=ttl_seconds)
+                    pipe.execute()
+                    return hold
+                except redis.WatchError:
+                    continue
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """A live hold by token, or None"""
+        hold = None
+        if self._redis is not None:
+            try:
+                raw = self._redis.get(self._token_key(token))
+                hold = json.loads(raw) if raw is not None else None
+            except redis.RedisError:
+                hold = None
+        if hold is None:
+            with self._lock:
+                hold = self._by_token.get(token)
+        if hold is None or hold["expires_at"] <= time.time():
+            return None
+        return hold
+
+    def release(self, token: str) -> None:
+        hold = self.get(token)
+        if hold is None:
+            return
+        day_key = f"{self.namespace}:{hold['doctor_id']}:{hold['date']}"
+        if self._redis is not None:
+            try:
+                self._redis.hdel(day_key, token)
+                self._redis.delete(self._token_key(token))
+            except redis.RedisError:
+                pass
+        with self._lock:
+            self._by_day.get(day_key, {}).pop(token, None)
+            self._by_token.pop(token, None)
+
+    def holds_for(self, doctor_id: UUID, on_date: date) -> List[Dict[str, Any]]:
+        """Live holds on one doctor's date"""
+        day_key = self._day_key(doctor_id, on_date)
+        now = time.time()
+        if self._redis is not None:
+            try:
+                raw = self._redis.hgetall(day_key)
+                return list(self._live({token.decode(): json.loads(value) for token, value in raw.items()}, now).values())
+            except redis.RedisError:
+                pass
+        with self._lock:
+            return list(self._live(self._by_day.get(day_key, {}), now).values())
+
+
+slot_holds = SlotHoldStore(namespace="slot_holds", redis_url=settings.REDIS_URL)
+
+
+def held_by_others(doctor_id: UUID, on_date: date, start_minute: int, end_minute: int, patient_id: UUID) -> bool:
+    """Whether [start_minute, end_minute) overlaps a live hold of another patient"""
+    try:
+        SlotHoldStore._check_free(
+            {hold["token"]: hold for hold in slot_holds.holds_for(doctor_id, on_date)},
+            start_minute, end_minute, patient_id
+        )
+    except SlotHeld:
+        return True
+    return False
+
+
+def without_held(doctor_id: UUID, on_date: date, slots: List[Dict]) -> List[Dict]:
+    """Drop slot dicts that overlap a live hold"""
+    holds = slot_holds.holds_for(doctor_id, on_date)
+    if not holds:
+        return slots
+    # A free slot's own buffer must not run into the held time either, so each
+    # hold is widened by the doctor's buffer on the left
+    held = [(hold["start_minute"] - hold.get("buffer_minutes", 0), hold["end_minute"]) for hold in holds]
+    return [
+        slot for slot in slots
+        if not any(
+            start < time_to_minutes(slot["end_time"]) and end > time_to_minutes(slot["start_time"])
+            for start, end in held
+        )
+    ]
@@ -0,0 +1,148 @@
+"""
+Structured logging: one JSON object per line, correlated by request id
+
+- configure_logging() installs the handler once at startup. LOG_LEVEL sets the
+  root level and LOG_LEVELS overrides it per module
+  ("app.utils.slot_manager=DEBUG,app.api.v1.availability=INFO").
+- The request id comes from the X-Request-ID header (or is generated) and is
+  attached to every record logged while that request is being handled.
+- DEBUG records are sampled per request (LOG_DEBUG_SAMPLE_RATE), so a sampled
+  request logs its whole debug trail and the others log none of it.
+- Structured fields go in extra={"fields": {...}}; StageTimer turns stage
+  timings into "<stage>_ms" fields.
+"""
+import json
+import logging
+import random
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from app.config import settings
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+debug_sampled_var: ContextVar[Optional[bool]] = ContextVar("debug_sampled", default=None)
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(name)
+
+
+def start_request_context(request_id: str):
+    """Bind a request id (and the debug sampling decision) to the current context"""
+    sampled = random.random() < settings.LOG_DEBUG_SAMPLE_RATE
+    return request_id_var.set(request_id), debug_sampled_var.set(sampled)
+
+
+def end_request_context(tokens) -> None:
+    request_token, sampled_token = tokens
+    request_id_var.reset(request_token)
+    debug_sampled_var.reset(sampled_token)
+
+
+class ContextFilter(logging.Filter):
+    """Attach the request id and drop DEBUG records from unsampled requests"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        if record.levelno <= logging.DEBUG:
+            sampled = debug_sampled_var.get()
+            if sampled is None:
+                # Outside a request (background jobs): sample record by record
+                sampled = random.random() < settings.LOG_DEBUG_SAMPLE_RATE
+            return sampled
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            payload.update(fields)
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable variant for local development (LOG_FORMAT=text)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = getattr(record, "fields", None) or {}
+        extras = " ".join(f"{key}={value}" for key, value in fields.items())
+        line = f"{self.formatTime(record)} {record.levelname:<7} {record.name} [{getattr(record, 'request_id', None) or '-'}] {record.getMessage()}"
+        if extras:
+            line = f"{line} {extras}"
+        if record.exc_info:
+            line = f"{line}\n{self.formatException(record.exc_info)}"
+        return line
+
+
+def parse_levels(spec: str) -> Dict[str, str]:
+    """Parse "module=LEVEL,module=LEVEL" into a dict"""
+    levels = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        name, level = item.split("=", 1)
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+_configured = False
+
+
+def configure_logging() -> None:
+    """Install the structured handler on the root logger (idempotent)"""
+    global _configured
+    if _configured:
+        return
+    _configured = True
+
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(TextFormatter() if settings.LOG_FORMAT == "text" else JsonFormatter())
+    handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(settings.LOG_LEVEL.upper())
+    for name, level in parse_levels(settings.LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level)
+
+
+class StageTimer:
+    """
+    Collect per-stage wall-clock timings for one operation
+
+        timer = StageTimer()
+        with timer.stage("query"):
+            ...
+        logger.info("done", extra={"fields": timer.fields()})  # {"query_ms": 1.83, "total_ms": ...}
+    """
+
+    def __init__(self):
+        self._started = time.perf_counter()
+        self.timings: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - started
+
+    def fields(self) -> Dict[str, float]:
+        result = {f"{name}_ms": round(seconds * 1000, 3) for name, seconds in self.timings.items()}
+        result["total_ms"] = round((time.perf_counter() - self._started) * 1000, 3)
+        return result
@@ -1,9 +1,15 @@
-from fastapi import FastAPI
+import time
+import uuid
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
+from app.core.log import configure_logging, end_request_context, get_logger, start_request_context
 
 from app.api.v1.api import api_router
 
+configure_logging()
+logger = get_logger(__name__)
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json"
@@ -17,10 +23,47 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "X-Request-ID", "ETag"],
     )
 
+@app.middleware("http")
+async def request_context(request: Request, call_next):
+    # Correlate every log record of a request by its id
+    request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+    tokens = start_request_context(request_id)
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+        response.headers["X-Request-ID"] = request_id
+        logger.info("request.completed", extra={"fields": {
+            "method": request.method,
+            "path": request.url.path,
+            "status": response.status_code,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 3)
+        }})
+        return response
+    except Exception:
+        logger.exception("request.failed", extra={"fields": {"method": request.method, "path": request.url.path}})
+        raise
+    finally:
+        end_request_context(tokens)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+@app.on_event("startup")
+def start_background_jobs():
+    # Keep doctor_slots materialized ahead of today
+    if settings.SLOT_ROLL_FORWARD_ENABLED:
+        from app.utils.slot_materializer import start_roll_forward_thread
+        start_roll_forward_thread()
+    # Reminders and sweeps run on Celery beat when a broker is configured (app.worker)
+    if settings.REMINDERS_ENABLED and not settings.CELERY_BROKER_URL:
+        from app.utils.reminders import start_reminder_thread
+        start_reminder_thread()
+    if settings.APPOINTMENT_SWEEP_ENABLED and not settings.CELERY_BROKER_URL:
+        from app.utils.appointment_sweeper import start_sweeper_thread
+        start_sweeper_thread()
+
 @app.get("/")
 def root():
     return {"message": "Welcome to Sahayak API"}
@@ -9,3 +9,5 @@ from app.models.payment import Payment, PaymentStatus, PaymentMethod
 from app.models.lab_report import LabReport
 from app.models.specialty import Specialty
 from app.models.notification import Notification, NotificationType
+from app.models.doctor_slot import DoctorSlot, DoctorSlotStatus
+from app.models.schedule_template import ScheduleTemplate
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Date, Time, Text, DateTime, ForeignKey, ARRAY, Integer, Boolean, Enum
+from sqlalchemy import Column, String, Date, Time, Text, DateTime, ForeignKey, ARRAY, Integer, Boolean, Enum, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -64,9 +64,34 @@ class Appointment(Base):
     cancelled_at = Column(DateTime, nullable=True)
     cancellation_reason = Column(Text, nullable=True)
     
+    # Optimistic concurrency: every ORM UPDATE is "... WHERE id = :id AND version = :loaded" and bumps it
+    version = Column(Integer, nullable=False, server_default="1")
+    
     # Relationships
     patient = relationship("Patient", back_populates="appointments")
     doctor = relationship("Doctor", back_populates="appointments")
     prescription = relationship("Prescription", back_populates="appointment", uselist=False)
     payment = relationship("Payment", back_populates="appointment", uselist=False)
     lab_reports = relationship("LabReport", back_populates="appointment")
+    
+    __mapper_args__ = {"version_id_col": version}
+    
+    # At most one active (pending/confirmed) appointment per doctor slot and per patient slot
+    __table_args__ = (
+        Index(
+            "uq_appointments_doctor_active_slot",
+            "doctor_id", "appointment_date", "appointment_time",
+            unique=True,
+            postgresql_where=text("status IN ('PENDING', 'CONFIRMED')")
+        ),
+        Index(
+            "uq_appointments_patient_active_slot",
+            "patient_id", "appointment_date", "appointment_time",
+            unique=True,
+            postgresql_where=text("status IN ('PENDING', 'CONFIRMED')")
+        ),
+        # List endpoints, ordered by (appointment_date, appointment_time, id)
+        Index("ix_appointments_patient_date_time", "patient_id", "appointment_date", "appointment_time", "id"),
+        Index("ix_appointments_doctor_date_time", "doctor_id", "appointment_date", "appointment_time", "id"),
+        Index("ix_appointments_status_date_time", "status", "appointment_date", "appointment_time", "id"),
+    )
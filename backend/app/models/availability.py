@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Boolean, DateTime, ForeignKey, JSON, Enum, UniqueConstraint
+from sqlalchemy import Column, Boolean, DateTime, ForeignKey, Integer, LargeBinary, String, Enum, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -24,13 +24,21 @@ class DoctorAvailability(Base):
     day_of_week = Column(Enum(DayOfWeek), nullable=False)
     is_available = Column(Boolean, default=True)
     
-    # Time Slots
-    slots = Column(JSON, nullable=False)
+    # Time Slots: fixed-width bitmaps, bit i = slot starting at i * slot_granularity minutes
+    # (see app.utils.slot_manager.SlotBitmap). Open slots are the shared template's slots
+    # plus added_slots minus removed_slots, so most rows store an empty delta.
+    slot_granularity = Column(Integer, nullable=False, default=30)
+    template_id = Column(String(40), ForeignKey("schedule_templates.id"), nullable=True, index=True)
+    added_slots = Column(LargeBinary, nullable=False)
+    removed_slots = Column(LargeBinary, nullable=False)
+    booked_slots = Column(LargeBinary, nullable=False)
+    blocked_slots = Column(LargeBinary, nullable=False)
     
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     doctor = relationship("Doctor", back_populates="availability")
+    template = relationship("ScheduleTemplate", lazy="joined")
     
     __table_args__ = (UniqueConstraint('doctor_id', 'day_of_week', name='_doctor_day_uc'),)
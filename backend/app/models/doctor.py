@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Date, Text, DateTime, ForeignKey, ARRAY, Integer, Float, Enum
+from sqlalchemy import Column, String, Date, Text, DateTime, ForeignKey, ARRAY, Integer, Float, Enum, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -47,6 +47,14 @@ class Doctor(Base):
     video_consultation_fee = Column(Integer, default=1500)
     in_person_consultation_fee = Column(Integer, default=2000)
     
+    # Scheduling: default consultation length and the gap kept after each appointment
+    consultation_minutes = Column(Integer, nullable=False, default=30, server_default="30")
+    buffer_minutes = Column(Integer, nullable=False, default=0, server_default="0")
+    
+    # Availability summary, maintained by app.utils.slot_materializer.update_availability_summary
+    next_available_at = Column(DateTime, nullable=True)
+    free_slots_7d = Column(Integer, nullable=False, default=0, server_default="0")
+    
     # Documents
     certificate_url = Column(String, nullable=True)
     id_proof_url = Column(String, nullable=True)
@@ -73,3 +81,11 @@ class Doctor(Base):
     availability = relationship("DoctorAvailability", back_populates="doctor")
     reviews = relationship("Review", back_populates="doctor")
     prescriptions = relationship("Prescription", back_populates="doctor")
+    
+    # "Available soonest" listing: active doctors ordered by next_available_at
+    __table_args__ = (
+        Index("ix_doctors_status_next_available_at", "status", "next_available_at"),
+        # Admin listing, optionally filtered by status
+        Index("ix_doctors_created_at_id", "created_at", "id"),
+        Index("ix_doctors_status_created_at_id", "status", "created_at", "id"),
+    )
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Date, Integer, DateTime, ForeignKey, Enum, Index, text
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+import enum
+from app.database import Base
+
+class DoctorSlotStatus(str, enum.Enum):
+    AVAILABLE = "available"
+    BOOKED = "booked"
+    BLOCKED = "blocked"
+
+class DoctorSlot(Base):
+    """One bookable slot on a concrete date, materialized from DoctorAvailability"""
+    __tablename__ = "doctor_slots"
+    
+    doctor_id = Column(UUID(as_uuid=True), ForeignKey("doctors.id"), primary_key=True)
+    slot_date = Column(Date, primary_key=True)
+    start_minute = Column(Integer, primary_key=True)  # minutes since midnight
+    duration_minutes = Column(Integer, nullable=False, default=30)
+    
+    status = Column(Enum(DoctorSlotStatus), nullable=False, default=DoctorSlotStatus.AVAILABLE)
+    appointment_id = Column(UUID(as_uuid=True), ForeignKey("appointments.id"), nullable=True)
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_doctor_slots_appointment_id", "appointment_id"),
+        # Cross-doctor search for free slots on one date
+        Index(
+            "ix_doctor_slots_free_by_date",
+            "slot_date", "doctor_id", "start_minute",
+            postgresql_where=text("status = 'AVAILABLE'")
+        ),
+    )
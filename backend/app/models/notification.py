@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, Boolean, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, String, Text, Boolean, DateTime, ForeignKey, Enum, Index, Integer
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 from datetime import datetime
@@ -28,5 +28,14 @@ class Notification(Base):
     # Link/Action
     action_url = Column(String, nullable=True)
     
+    # Appointment reminders: one row per (appointment, minutes before start)
+    appointment_id = Column(UUID(as_uuid=True), ForeignKey("appointments.id"), nullable=True)
+    reminder_offset_minutes = Column(Integer, nullable=True)
+    
     is_read = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    
+    __table_args__ = (
+        Index("ix_notifications_user_created_at", "user_id", "created_at"),
+        Index("uq_notifications_appointment_reminder", "appointment_id", "reminder_offset_minutes", unique=True),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Date, Text, DateTime, ForeignKey, ARRAY
+from sqlalchemy import Column, String, Date, Text, DateTime, ForeignKey, ARRAY, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -41,3 +41,7 @@ class Patient(Base):
     user = relationship("User", back_populates="patient")
     appointments = relationship("Appointment", back_populates="patient")
     reviews = relationship("Review", back_populates="patient")
+    
+    __table_args__ = (
+        Index("ix_patients_created_at_id", "created_at", "id"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, JSON, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -27,3 +27,8 @@ class Prescription(Base):
     # Relationships
     appointment = relationship("Appointment", back_populates="prescription")
     doctor = relationship("Doctor", back_populates="prescriptions")
+    
+    __table_args__ = (
+        Index("ix_prescriptions_patient_created_at", "patient_id", "created_at", "id"),
+        Index("ix_prescriptions_doctor_created_at", "doctor_id", "created_at", "id"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Text, Boolean, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, Text, Boolean, String, DateTime, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -28,3 +28,8 @@ class Review(Base):
     # Relationships
     doctor = relationship("Doctor", back_populates="reviews")
     patient = relationship("Patient", back_populates="reviews")
+    
+    __table_args__ = (
+        Index("ix_reviews_doctor_created_at", "doctor_id", "created_at", "id"),
+        Index("ix_reviews_patient_created_at", "patient_id", "created_at", "id"),
+    )
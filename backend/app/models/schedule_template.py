@@ -0,0 +1,19 @@
+from sqlalchemy import Column, String, Integer, LargeBinary, DateTime, JSON
+from datetime import datetime
+from app.database import Base
+
+class ScheduleTemplate(Base):
+    """
+    A day's open slots shared by every DoctorAvailability row with the same schedule
+    
+    The id is a content hash of (slot_duration, time_ranges) (see
+    app.utils.slot_manager.template_key), so rows are immutable and deduplicated.
+    """
+    __tablename__ = "schedule_templates"
+    
+    id = Column(String(40), primary_key=True)
+    slot_granularity = Column(Integer, nullable=False)
+    time_ranges = Column(JSON, nullable=False)  # e.g. [{"start_time": "09:00", "end_time": "17:00"}]
+    open_slots = Column(LargeBinary, nullable=False)
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
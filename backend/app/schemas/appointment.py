@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, Field
+from typing import Dict, Optional, List
 from uuid import UUID
 from datetime import date, time, datetime
 from app.models.appointment import AppointmentType, AppointmentStatus
@@ -10,12 +10,13 @@ class AppointmentBase(BaseModel):
     doctor_id: UUID
     appointment_date: date
     appointment_time: time
+    duration_minutes: Optional[int] = Field(None, ge=5, le=240)  # Default: the doctor's consultation length
     appointment_type: AppointmentType
     chief_complaint: str
     symptoms: Optional[List[str]] = []
 
 class AppointmentCreate(AppointmentBase):
-    pass
+    hold_token: Optional[str] = None  # From POST /availability/hold; released once the appointment is created
 
 class AppointmentUpdate(BaseModel):
     status: Optional[AppointmentStatus] = None
@@ -27,6 +28,7 @@ class AppointmentUpdate(BaseModel):
     weight: Optional[str] = None
     follow_up_required: Optional[bool] = None
     follow_up_date: Optional[date] = None
+    version: Optional[int] = None  # Expected current version (alternative to If-Match); 409 if it has moved on
 
 class AppointmentResponse(AppointmentBase):
     id: UUID
@@ -34,6 +36,7 @@ class AppointmentResponse(AppointmentBase):
     patient_id: UUID
     status: AppointmentStatus
     created_at: datetime
+    version: int
     
     # Optional nested objects for detailed views
     doctor: Optional[DoctorResponse] = None
@@ -41,3 +44,19 @@ class AppointmentResponse(AppointmentBase):
     
     class Config:
         from_attributes = True
+
+class AppointmentHistoryItem(AppointmentBase):
+    """An appointment without nested objects; the doctor is in AppointmentHistoryResponse.doctors"""
+    id: UUID
+    appointment_number: str
+    status: AppointmentStatus
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+class AppointmentHistoryResponse(BaseModel):
+    """One page of a patient's appointments with each distinct doctor included once"""
+    appointments: List[AppointmentHistoryItem]
+    doctors: Dict[str, DoctorResponse]  # Keyed by doctor id
+    next_cursor: Optional[str] = None
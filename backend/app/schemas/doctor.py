@@ -1,3 +1,4 @@
+import enum
 from pydantic import BaseModel, Field, validator, model_validator
 from typing import Optional, List, Union
 from uuid import UUID
@@ -19,6 +20,12 @@ class DoctorBase(BaseModel):
     pincode: Optional[str] = None
     video_consultation_fee: Optional[int] = 1500
     in_person_consultation_fee: Optional[int] = 2000
+    consultation_minutes: Optional[int] = Field(30, ge=5, le=240)
+    buffer_minutes: Optional[int] = Field(0, ge=0, le=120)
+
+class DoctorSort(str, enum.Enum):
+    RATING = "rating"
+    AVAILABLE_SOONEST = "available_soonest"
 
 class DoctorCreate(DoctorBase):
     pass
@@ -39,6 +46,8 @@ class DoctorUpdate(BaseModel):
     pincode: Optional[str] = None
     video_consultation_fee: Optional[int] = None
     in_person_consultation_fee: Optional[int] = None
+    consultation_minutes: Optional[int] = Field(None, ge=5, le=240)
+    buffer_minutes: Optional[int] = Field(None, ge=0, le=120)
 
 class DoctorResponse(DoctorBase):
     id: UUID
@@ -48,6 +57,8 @@ class DoctorResponse(DoctorBase):
     average_rating: Optional[float] = 0.0
     total_reviews: Optional[int] = 0
     created_at: Optional[datetime] = None
+    next_available_at: Optional[datetime] = None
+    free_slots_7d: Optional[int] = 0
     
     @validator('average_rating', pre=True)
     def validate_average_rating(cls, v):
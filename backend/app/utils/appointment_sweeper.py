@@ -0,0 +1,125 @@
+"""
+Appointment Sweeper
+Moves appointments that are still PENDING or CONFIRMED long after their start
+time to APPOINTMENT_SWEEP_STATUS (NO_SHOW by default)
+
+Keeps the active set that booking checks, availability and the partial unique
+indexes on active slots work with limited to appointments that can still happen.
+Each batch is one set-based UPDATE over at most BATCH_SIZE rows picked with
+FOR UPDATE SKIP LOCKED, so a sweep never blocks or waits on a booking in flight.
+Slots are left alone: they are in the past and roll_forward_slots prunes them.
+
+Runs on Celery beat (app.worker) when CELERY_BROKER_URL is set, otherwise in a
+daemon thread of the API process.
+"""
+import logging
+import threading
+import time as clock
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import literal, select, tuple_, update
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.appointment import Appointment, AppointmentStatus
+
+logger = logging.getLogger(__name__)
+
+# Appointments updated per statement (and per commit)
+BATCH_SIZE = 1000
+
+ACTIVE_STATUSES = [AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED]
+
+
+def sweep_status() -> AppointmentStatus:
+    """APPOINTMENT_SWEEP_STATUS as an AppointmentStatus; must not be an active status"""
+    try:
+        status = AppointmentStatus[settings.APPOINTMENT_SWEEP_STATUS.upper()]
+    except KeyError:
+        raise ValueError(f"Invalid APPOINTMENT_SWEEP_STATUS: {settings.APPOINTMENT_SWEEP_STATUS}")
+    if status in ACTIVE_STATUSES:
+        raise ValueError("APPOINTMENT_SWEEP_STATUS must not be an active status")
+    return status
+
+
+def stale_appointments(cutoff: datetime):
+    """SELECT of the next batch of active appointment ids starting at or before cutoff, locked"""
+    # Range on (status, appointment_date, appointment_time): ix_appointments_status_date_time
+    return select(Appointment.id).where(
+        Appointment.status.in_(ACTIVE_STATUSES),
+        tuple_(Appointment.appointment_date, Appointment.appointment_time) <= tuple_(
+            literal(cutoff.date(), Appointment.appointment_date.type),
+            literal(cutoff.time(), Appointment.appointment_time.type)
+        )
+    ).limit(BATCH_SIZE).with_for_update(skip_locked=True)
+
+
+def sweep_stale_appointments(db: Session, now: Optional[datetime] = None) -> int:
+    """
+    Transition active appointments that started APPOINTMENT_SWEEP_GRACE_MINUTES or more ago
+
+    Commits after every batch. Returns the number of appointments updated.
+    """
+    started = clock.perf_counter()
+    status = sweep_status()
+    cutoff = (now or datetime.now()) - timedelta(minutes=settings.APPOINTMENT_SWEEP_GRACE_MINUTES)
+
+    # Bulk UPDATEs bypass the ORM version check, so bump the version here to fail stale writers
+    values = {"status": status, "updated_at": datetime.utcnow(), "version": Appointment.version + 1}
+    if status == AppointmentStatus.CANCELLED:
+        values["cancelled_at"] = values["updated_at"]
+    elif status == AppointmentStatus.COMPLETED:
+        values["completed_at"] = values["updated_at"]
+
+    stale = stale_appointments(cutoff).scalar_subquery()
+    swept = 0
+    while True:
+        result = db.execute(
+            update(Appointment)
+            .where(Appointment.id.in_(stale))
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        swept += result.rowcount
+        if result.rowcount < BATCH_SIZE:
+            break
+
+    logger.info("appointments.swept", extra={"fields": {
+        "swept": swept,
+        "status": status.name,
+        "cutoff": cutoff,
+        "total_ms": round((clock.perf_counter() - started) * 1000, 3)
+    }})
+    return swept
+
+
+def run_sweep() -> int:
+    """sweep_stale_appointments in its own session (entry point for the Celery task and the thread)"""
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return sweep_stale_appointments(db)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def start_sweeper_thread() -> threading.Thread:
+    """In-process fallback: run_sweep every APPOINTMENT_SWEEP_INTERVAL_SECONDS in a daemon thread"""
+    stop = threading.Event()
+
+    def run():
+        while not stop.is_set():
+            try:
+                run_sweep()
+            except Exception:
+                logger.exception("appointments.sweep_failed")
+            stop.wait(settings.APPOINTMENT_SWEEP_INTERVAL_SECONDS)
+
+    thread = threading.Thread(target=run, name="appointment-sweeper", daemon=True)
+    thread.stop = stop
+    thread.start()
+    return thread
@@ -0,0 +1,115 @@
+"""
+Interval Utility
+Half-open [start, end) integer-minute intervals kept in sorted arrays
+
+A day's calendar (a doctor's bookings, a patient's appointments, a doctor's
+free windows) is an IntervalSet of non-overlapping intervals. Overlap checks
+and lookups are a binary search, so mixing 15, 20 and 45-minute consultations
+never needs a scan over every slot.
+"""
+from bisect import bisect_left, bisect_right
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+
+class IntervalSet:
+    """Non-overlapping [start, end) intervals, each with an optional value"""
+    __slots__ = ("starts", "ends", "values")
+
+    def __init__(self, intervals: Iterable[Tuple[int, int]] = (), values: Optional[Iterable[Any]] = None):
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        self.values: List[Any] = []
+        values = list(values) if values is not None else None
+        for index, (start, end) in enumerate(intervals):
+            self.add(start, end, values[index] if values is not None else None)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        return zip(self.starts, self.ends)
+
+    def _first_candidate(self, start: int) -> int:
+        # The only interval that can overlap [start, ...) from the left is the
+        # last one starting before it; everything earlier ends before it starts
+        return max(bisect_right(self.starts, start) - 1, 0)
+
+    def find(self, start: int, end: int) -> Optional[int]:
+        """Index of an interval overlapping [start, end), or None"""
+        index = self._first_candidate(start)
+        if index < len(self.starts) and self.starts[index] < end and self.ends[index] > start:
+            return index
+        index += 1
+        if index < len(self.starts) and self.starts[index] < end and self.ends[index] > start:
+            return index
+        return None
+
+    def overlaps(self, start: int, end: int) -> bool:
+        return self.find(start, end) is not None
+
+    def value_at(self, start: int, end: int) -> Any:
+        """Value of an interval overlapping [start, end), or None"""
+        index = self.find(start, end)
+        return self.values[index] if index is not None else None
+
+    def add(self, start: int, end: int, value: Any = None) -> None:
+        """Insert [start, end); raises ValueError if it overlaps an existing interval"""
+        if end <= start:
+            raise ValueError(f"Empty interval [{start}, {end})")
+        if self.overlaps(start, end):
+            raise ValueError(f"Interval [{start}, {end}) overlaps an existing interval")
+        index = bisect_left(self.starts, start)
+        self.starts.insert(index, start)
+        self.ends.insert(index, end)
+        self.values.insert(index, value)
+
+    def discard(self, start: int, end: int) -> None:
+        """Remove the interval exactly matching [start, end), if present"""
+        index = bisect_left(self.starts, start)
+        if index < len(self.starts) and self.starts[index] == start and self.ends[index] == end:
+            del self.starts[index], self.ends[index], self.values[index]
+
+
+def merge_cells(cells: Iterable[Tuple[int, int]]) -> IntervalSet:
+    """Merge (start, length) cells, sorted by start, into contiguous windows"""
+    windows = IntervalSet()
+    window_start = window_end = None
+    for start, length in cells:
+        if window_end is not None and start <= window_end:
+            window_end = max(window_end, start + length)
+            continue
+        if window_start is not None:
+            windows.add(window_start, window_end)
+        window_start, window_end = start, start + length
+    if window_start is not None:
+        windows.add(window_start, window_end)
+    return windows
+
+
+def round_up(minutes: int, step: int) -> int:
+    return -(-minutes // step) * step
+
+
+def free_starts(windows: IntervalSet, duration: int, buffer: int = 0, grid: int = 1, not_before: int = 0) -> List[int]:
+    """
+    Start minutes for back-to-back appointments inside free windows
+
+    Appointments are packed from the start of each window, each followed by its
+    buffer (which must fit in the window too); the stride is rounded up to the
+    grid so every start stays on a cell boundary.
+    """
+    stride = round_up(duration + buffer, grid)
+    starts = []
+    for window_start, window_end in windows:
+        start = window_start
+        if start < not_before:
+            start += round_up(not_before - start, stride)
+        while start + duration + buffer <= window_end:
+            starts.append(start)
+            start += stride
+    return starts
+
+
+def cells_covering(start: int, end: int, cell_minutes: int) -> Tuple[int, int]:
+    """First and past-the-last cell start minutes whose cells overlap [start, end)"""
+    return (start // cell_minutes) * cell_minutes, round_up(end, cell_minutes)
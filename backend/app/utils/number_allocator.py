@@ -0,0 +1,54 @@
+"""
+Number Allocator
+Formatted document numbers (APT-000123, RX-000045, ...) backed by Postgres sequences
+
+Each allocator draws from its own sequence, so numbering never counts rows and
+never races. With NUMBER_BLOCK_SIZE > 1 every worker process reserves a block
+of values in one round trip (hi/lo style) and hands them out locally; numbers
+stay unique but are no longer strictly ordered across workers, and values left
+in a block when a worker exits are skipped.
+"""
+import threading
+from typing import List
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.config import settings
+
+
+class NumberAllocator:
+    """Hands out "<prefix>-<zero padded value>" numbers from a Postgres sequence"""
+
+    def __init__(self, sequence: str, prefix: str, width: int = 6):
+        self.sequence = sequence
+        self.prefix = prefix
+        self.width = width
+        self._block: List[int] = []
+        self._lock = threading.Lock()
+
+    def _reserve(self, db: Session, count: int) -> List[int]:
+        if count == 1:
+            return [db.execute(text("SELECT nextval(:seq)"), {"seq": self.sequence}).scalar()]
+        rows = db.execute(
+            text("SELECT nextval(:seq) FROM generate_series(1, :count)"),
+            {"seq": self.sequence, "count": count}
+        ).scalars().all()
+        return sorted(rows, reverse=True)
+
+    def next_value(self, db: Session) -> int:
+        block_size = max(settings.NUMBER_BLOCK_SIZE, 1)
+        if block_size == 1:
+            return self._reserve(db, 1)[0]
+        with self._lock:
+            if not self._block:
+                self._block = self._reserve(db, block_size)
+            return self._block.pop()
+
+    def next(self, db: Session) -> str:
+        return f"{self.prefix}-{str(self.next_value(db)).zfill(self.width)}"
+
+
+appointment_numbers = NumberAllocator("appointment_number_seq", "APT")
+prescription_numbers = NumberAllocator("prescription_number_seq", "RX")
+lab_report_numbers = NumberAllocator("lab_report_number_seq", "LAB")
+# Our own payment references; payments.transaction_id may also hold gateway ids
+payment_transaction_ids = NumberAllocator("payment_transaction_id_seq", "TXN", width=10)
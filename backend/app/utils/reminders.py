@@ -0,0 +1,148 @@
+"""
+Appointment Reminders
+Creates APPOINTMENT_REMINDER notifications for upcoming pending and confirmed
+appointments, REMINDER_OFFSETS_MINUTES before each one starts
+
+Each offset owns the window between it and the next smaller offset, e.g. with
+[1440, 60] the 1440 reminder goes out for appointments starting in (now + 60m,
+now + 24h] and the 60 reminder for those in (now, now + 60m]. An appointment
+booked inside a window gets that window's reminder only. Runs are idempotent:
+the (appointment_id, reminder_offset_minutes) unique index turns repeats into
+no-ops and already reminded appointments are excluded by the scan itself.
+
+Runs on Celery beat (app.worker) when CELERY_BROKER_URL is set, otherwise in a
+daemon thread of the API process.
+"""
+import logging
+import threading
+import time as clock
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+from sqlalchemy import and_, exists
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.doctor import Doctor
+from app.models.notification import Notification, NotificationType
+from app.models.patient import Patient
+
+logger = logging.getLogger(__name__)
+
+# Appointments read and notifications inserted per round trip
+BATCH_SIZE = 1000
+
+ACTIVE_STATUSES = [AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED]
+
+
+def reminder_windows(now: datetime, offsets: Sequence[int]) -> List[tuple]:
+    """(offset, after, until): the offset's reminder is due for appointments starting in (after, until]"""
+    offsets = sorted(set(offsets), reverse=True)
+    return [
+        (offset, now + timedelta(minutes=offsets[i + 1] if i + 1 < len(offsets) else 0), now + timedelta(minutes=offset))
+        for i, offset in enumerate(offsets)
+    ]
+
+
+def due_reminders_query(db: Session, offset: int, after: datetime, until: datetime):
+    """Next batch of appointments starting in (after, until] without an offset reminder yet"""
+    starts_at = Appointment.appointment_date + Appointment.appointment_time
+    already_sent = exists().where(and_(
+        Notification.appointment_id == Appointment.id,
+        Notification.reminder_offset_minutes == offset
+    ))
+    return db.query(
+        Appointment.id, Appointment.appointment_date, Appointment.appointment_time,
+        Patient.user_id, Doctor.full_name
+    ).join(Patient, Patient.id == Appointment.patient_id).join(Doctor, Doctor.id == Appointment.doctor_id).filter(
+        # Range on (status, appointment_date, appointment_time): ix_appointments_status_date_time
+        Appointment.status.in_(ACTIVE_STATUSES),
+        Appointment.appointment_date.between(after.date(), until.date()),
+        starts_at > after,
+        starts_at <= until,
+        Patient.user_id.isnot(None),
+        ~already_sent
+    ).order_by(
+        Appointment.appointment_date, Appointment.appointment_time, Appointment.id
+    ).limit(BATCH_SIZE)
+
+
+def _reminder_row(row, offset: int, created_at: datetime) -> Dict:
+    return {
+        "id": uuid.uuid4(),
+        "user_id": row.user_id,
+        "type": NotificationType.APPOINTMENT_REMINDER,
+        "title": "Appointment reminder",
+        "message": f"Your appointment with Dr. {row.full_name} is on "
+                   f"{row.appointment_date.strftime('%d %b %Y')} at {row.appointment_time.strftime('%H:%M')}.",
+        "action_url": f"/appointments/{row.id}",
+        "is_read": False,
+        "created_at": created_at,
+        "appointment_id": row.id,
+        "reminder_offset_minutes": offset
+    }
+
+
+def send_due_reminders(db: Session, now: Optional[datetime] = None, offsets: Optional[Sequence[int]] = None) -> int:
+    """
+    Insert the reminders that are due and not yet sent, one commit per batch
+
+    Returns the number of notifications created.
+    """
+    started = clock.perf_counter()
+    now = now or datetime.now()
+    created = 0
+    for offset, after, until in reminder_windows(now, offsets if offsets is not None else settings.REMINDER_OFFSETS_MINUTES):
+        while True:
+            rows = due_reminders_query(db, offset, after, until).all()
+            if not rows:
+                break
+            created_at = datetime.utcnow()
+            result = db.execute(
+                insert(Notification)
+                .values([_reminder_row(row, offset, created_at) for row in rows])
+                .on_conflict_do_nothing(index_elements=["appointment_id", "reminder_offset_minutes"])
+            )
+            db.commit()
+            created += result.rowcount
+            if len(rows) < BATCH_SIZE:
+                break
+
+    logger.info("reminders.sent", extra={"fields": {
+        "created": created,
+        "total_ms": round((clock.perf_counter() - started) * 1000, 3)
+    }})
+    return created
+
+
+def run_reminders() -> int:
+    """send_due_reminders in its own session (entry point for the Celery task and the thread)"""
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return send_due_reminders(db)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def start_reminder_thread() -> threading.Thread:
+    """In-process fallback: run_reminders every REMINDER_INTERVAL_SECONDS in a daemon thread"""
+    stop = threading.Event()
+
+    def run():
+        while not stop.is_set():
+            try:
+                run_reminders()
+            except Exception:
+                logger.exception("reminders.failed")
+            stop.wait(settings.REMINDER_INTERVAL_SECONDS)
+
+    thread = threading.Thread(target=run, name="appointment-reminders", daemon=True)
+    thread.stop = stop
+    thread.start()
+    return thread
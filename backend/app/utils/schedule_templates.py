@@ -0,0 +1,64 @@
+"""
+Schedule Templates
+Content-addressed store of day schedules shared between DoctorAvailability rows
+
+A template is identified by template_key(open mask, granularity), so every
+doctor working "09:00-17:00" on 30-minute slots points at the same row and
+only keeps a (usually empty) delta of its own.
+"""
+import threading
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.models.schedule_template import ScheduleTemplate
+from app.utils.slot_manager import bitmap_width, mask_to_ranges, template_key
+
+# Template ids known to be committed to the database (they are never deleted)
+_known_ids = set()
+_lock = threading.Lock()
+
+# Session.info key for ids inserted in the session's open transaction
+_PENDING_KEY = "schedule_templates.pending"
+
+
+@event.listens_for(Session, "after_commit")
+def _remember_committed(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        with _lock:
+            _known_ids.update(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _insert_template(db: Session, template_id: str, open_mask: int, granularity: int) -> None:
+    db.execute(insert(ScheduleTemplate).values(
+        id=template_id,
+        slot_granularity=granularity,
+        time_ranges=mask_to_ranges(open_mask, granularity),
+        open_slots=open_mask.to_bytes(bitmap_width(granularity), "big"),
+        created_at=datetime.utcnow()
+    ).on_conflict_do_nothing())
+    # Only remembered once the transaction commits; a rollback drops it
+    db.info.setdefault(_PENDING_KEY, set()).add(template_id)
+
+
+def get_or_create_template(db: Session, open_mask: int, granularity: int) -> ScheduleTemplate:
+    """Shared template for a day's open slots; inserted on first use (does not commit)"""
+    template_id = template_key(open_mask, granularity)
+    with _lock:
+        known = template_id in _known_ids
+    if not known:
+        _insert_template(db, template_id, open_mask, granularity)
+    template = db.get(ScheduleTemplate, template_id)
+    if template is None:
+        # Known id whose row is gone (e.g. the database was reset): insert it again
+        with _lock:
+            _known_ids.discard(template_id)
+        _insert_template(db, template_id, open_mask, granularity)
+        template = db.get(ScheduleTemplate, template_id)
+    return template
@@ -1,12 +1,27 @@
 """
 Slot Management Utility
-Converts time ranges to 30-minute slots and manages slot status
+Stores each day's slots as fixed-width integer bitmaps and manages slot status
+
+Bit i of a day bitmap is the slot starting at i * granularity minutes after
+midnight. "HH:MM" strings are only parsed on input and produced on output
+(see slots_to_dicts); everything in between is bitwise arithmetic.
 """
-from typing import List, Dict, Optional
+import hashlib
+import json
+import logging
+from functools import lru_cache
+from math import gcd
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime, date, time, timedelta
 from uuid import UUID
 
 
+logger = logging.getLogger(__name__)
+
+MINUTES_PER_DAY = 24 * 60
+DEFAULT_GRANULARITY = 30
+
+
 class SlotStatus:
     """Slot status constants"""
     AVAILABLE = "available"
@@ -28,351 +43,450 @@ def minutes_to_time(minutes: int) -> str:
     return f"{hours:02d}:{mins:02d}"
 
 
-def generate_slots_from_ranges(time_ranges: List[Dict[str, str]], slot_duration: int = 30) -> List[Dict]:
+def slots_per_day(granularity: int) -> int:
+    """Number of bits in a day bitmap at the given granularity"""
+    if granularity <= 0 or MINUTES_PER_DAY % granularity:
+        raise ValueError(f"Slot granularity must divide a day evenly, got {granularity}")
+    return MINUTES_PER_DAY // granularity
+
+
+def bitmap_width(granularity: int) -> int:
+    """Number of bytes used to store a day bitmap at the given granularity"""
+    return (slots_per_day(granularity) + 7) // 8
+
+
+def iter_bits(mask: int):
+    """Yield the indexes of the set bits in mask, lowest first"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def range_mask(start_minutes: int, end_minutes: int, granularity: int = DEFAULT_GRANULARITY) -> int:
+    """
+    Bitmap of every whole slot that fits between start_minutes and end_minutes
+
+    Slots are aligned to the granularity grid, so a range starting off-grid
+    begins at the next grid point (the API rejects such ranges, see off_grid_times).
+    """
+    first = -(-start_minutes // granularity)
+    last = min(end_minutes // granularity, slots_per_day(granularity))
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << first
+
+
+def off_grid_times(time_ranges: List[Dict[str, str]], granularity: int = DEFAULT_GRANULARITY) -> List[str]:
+    """Start and end times ("HH:MM") in time_ranges that do not fall on the granularity grid"""
+    return [
+        value for item in time_ranges for value in (item["start_time"], item["end_time"])
+        if time_to_minutes(value) % granularity
+    ]
+
+
+def time_to_bit(time_value, granularity: int = DEFAULT_GRANULARITY) -> Optional[int]:
+    """Bit index for a slot start ("HH:MM" or time), or None if it is off the grid"""
+    if isinstance(time_value, time):
+        minutes = time_value.hour * 60 + time_value.minute
+    else:
+        minutes = time_to_minutes(str(time_value)[:5])
+    if minutes % granularity:
+        return None
+    return minutes // granularity
+
+
+def slot_grid(consultation_minutes: int, buffer_minutes: int = 0, base: int = DEFAULT_GRANULARITY) -> int:
+    """
+    Cell size that lines up with a doctor's consultations and buffers
+
+    e.g. 20-minute consultations on a 30-minute base grid use 10-minute cells,
+    so back-to-back 20-minute appointments start on cell boundaries.
+    """
+    return gcd(gcd(base, consultation_minutes or base), buffer_minutes or 0)
+
+
+class SlotBitmap:
     """
-    Convert time ranges to 30-minute slots
-    
+    One day of slots as integer bitmaps
+
+    open:    slots the doctor offers
+    booked:  slots held by an appointment (always a subset of open)
+    blocked: slots manually blocked (always a subset of open)
+    past:    slots whose time has passed; computed, never stored
+    """
+    __slots__ = ("granularity", "open", "booked", "blocked", "past", "appointment_ids")
+
+    def __init__(
+        self,
+        granularity: int = DEFAULT_GRANULARITY,
+        open: int = 0,
+        booked: int = 0,
+        blocked: int = 0,
+        past: int = 0,
+        appointment_ids: Optional[Dict[int, str]] = None
+    ):
+        self.granularity = granularity
+        self.open = open
+        self.booked = booked & open
+        self.blocked = blocked & open & ~booked
+        self.past = past
+        self.appointment_ids = appointment_ids or {}
+
+    @property
+    def available(self) -> int:
+        return self.open & ~self.booked & ~self.blocked & ~self.past
+
+    def copy(self) -> "SlotBitmap":
+        return SlotBitmap(
+            self.granularity, self.open, self.booked, self.blocked,
+            self.past, dict(self.appointment_ids)
+        )
+
+    def is_bookable(self, time_value) -> bool:
+        """True if the slot starting at time_value is open and not booked or blocked"""
+        bit = time_to_bit(time_value, self.granularity)
+        if bit is None:
+            return False
+        return bool((self.open & ~self.booked & ~self.blocked) >> bit & 1)
+
+    def regrid(self, granularity: int) -> "SlotBitmap":
+        """Same slots on a finer grid (granularity must divide the current one)"""
+        if granularity == self.granularity:
+            return self.copy()
+        if self.granularity % granularity:
+            raise ValueError(f"Cannot regrid {self.granularity}-minute slots to {granularity} minutes")
+        factor = self.granularity // granularity
+        cell = (1 << factor) - 1
+
+        def expand(mask: int) -> int:
+            result = 0
+            for bit in iter_bits(mask):
+                result |= cell << (bit * factor)
+            return result
+
+        return SlotBitmap(
+            granularity, expand(self.open), expand(self.booked), expand(self.blocked), expand(self.past),
+            {bit * factor + offset: apt_id for bit, apt_id in self.appointment_ids.items() for offset in range(factor)}
+        )
+
+    @classmethod
+    def from_record(cls, record) -> "SlotBitmap":
+        """Load the bitmaps stored on a DoctorAvailability row (template plus per-day delta)"""
+        granularity = record.slot_granularity or DEFAULT_GRANULARITY
+        base = template_mask(record.template, granularity)
+        added = int.from_bytes(record.added_slots or b"", "big")
+        removed = int.from_bytes(record.removed_slots or b"", "big")
+        return cls(
+            granularity=granularity,
+            open=(base & ~removed) | added,
+            booked=int.from_bytes(record.booked_slots or b"", "big"),
+            blocked=int.from_bytes(record.blocked_slots or b"", "big")
+        )
+
+    def store(self, record) -> None:
+        """Write the bitmaps back onto a DoctorAvailability row as a delta against its template"""
+        width = bitmap_width(self.granularity)
+        base = template_mask(record.template, self.granularity)
+        record.slot_granularity = self.granularity
+        record.added_slots = (self.open & ~base).to_bytes(width, "big")
+        record.removed_slots = (base & ~self.open).to_bytes(width, "big")
+        record.booked_slots = self.booked.to_bytes(width, "big")
+        record.blocked_slots = self.blocked.to_bytes(width, "big")
+
+
+@lru_cache(maxsize=1024)
+def _template_open(template_id: str, open_slots: bytes) -> int:
+    return int.from_bytes(open_slots, "big")
+
+
+def template_mask(template, granularity: int) -> int:
+    """Open-slot bitmap of a ScheduleTemplate, or 0 if there is none or it uses another grid"""
+    if template is None or template.slot_granularity != granularity:
+        return 0
+    # Template ids are content hashes, so the parsed mask can be memoized by id
+    return _template_open(template.id, template.open_slots)
+
+
+def mask_to_ranges(mask: int, granularity: int = DEFAULT_GRANULARITY) -> List[Dict[str, str]]:
+    """Canonical time ranges for a bitmap: one range per run of consecutive slots"""
+    ranges = []
+    run_start = previous = None
+    for bit in iter_bits(mask):
+        if previous is not None and bit == previous + 1:
+            previous = bit
+            continue
+        if run_start is not None:
+            ranges.append({"start_time": minutes_to_time(run_start * granularity), "end_time": minutes_to_time((previous + 1) * granularity)})
+        run_start = previous = bit
+    if run_start is not None:
+        ranges.append({"start_time": minutes_to_time(run_start * granularity), "end_time": minutes_to_time((previous + 1) * granularity)})
+    return ranges
+
+
+def template_key(mask: int, granularity: int = DEFAULT_GRANULARITY) -> str:
+    """Content hash of (slot_duration, canonical time_ranges) used as the ScheduleTemplate id"""
+    canonical = json.dumps({"slot_duration": granularity, "time_ranges": mask_to_ranges(mask, granularity)}, sort_keys=True)
+    return hashlib.sha1(canonical.encode()).hexdigest()
+
+
+WEEKDAY_INDEX = {
+    "monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3,
+    "friday": 4, "saturday": 5, "sunday": 6
+}
+
+
+def next_date_for_weekday(day_of_week: str, reference_date: Optional[date] = None) -> date:
+    """First date on or after reference_date (default: today) that falls on day_of_week"""
+    if reference_date is None:
+        reference_date = date.today()
+    target_weekday = WEEKDAY_INDEX.get(day_of_week.lower(), 0)
+    return reference_date + timedelta(days=(target_weekday - reference_date.weekday()) % 7)
+
+
+def slots_to_dicts(bitmap: SlotBitmap, mask: Optional[int] = None) -> List[Dict]:
+    """
+    Render a bitmap as the slot dicts returned by the API
+
     Args:
-        time_ranges: List of dicts with 'start_time' and 'end_time' (e.g., [{"start_time": "09:00", "end_time": "13:00"}])
-        slot_duration: Duration of each slot in minutes (default: 30)
-    
-    Returns:
-        List of slot dicts with start_time, end_time, and initial status
+        bitmap: Day bitmap (usually the result of update_slot_statuses)
+        mask: Only render these bits (default: every open slot)
     """
+    granularity = bitmap.granularity
+    if mask is None:
+        mask = bitmap.open
     slots = []
-    
-    for range_item in time_ranges:
-        start_time = range_item["start_time"]
-        end_time = range_item["end_time"]
-        
-        start_minutes = time_to_minutes(start_time)
-        end_minutes = time_to_minutes(end_time)
-        
-        # Generate slots in 30-minute increments
-        current_minutes = start_minutes
-        while current_minutes + slot_duration <= end_minutes:
-            slot_start = minutes_to_time(current_minutes)
-            slot_end = minutes_to_time(current_minutes + slot_duration)
-            
-            slots.append({
-                "start_time": slot_start,
-                "end_time": slot_end,
-                "status": SlotStatus.AVAILABLE,
-                "appointment_id": None
-            })
-            
-            current_minutes += slot_duration
-    
+    for bit in iter_bits(mask & bitmap.open):
+        start = bit * granularity
+        flag = 1 << bit
+        if bitmap.booked & flag:
+            status = SlotStatus.BOOKED
+        elif bitmap.blocked & flag:
+            status = SlotStatus.BLOCKED
+        elif bitmap.past & flag:
+            status = SlotStatus.PAST
+        else:
+            status = SlotStatus.AVAILABLE
+        slots.append({
+            "start_time": minutes_to_time(start),
+            "end_time": minutes_to_time(start + granularity),
+            "status": status,
+            "appointment_id": bitmap.appointment_ids.get(bit)
+        })
     return slots
 
 
+def generate_slots_from_ranges(time_ranges: List[Dict[str, str]], slot_duration: int = DEFAULT_GRANULARITY) -> int:
+    """
+    Convert time ranges to an open-slot bitmap
+
+    Args:
+        time_ranges: List of dicts with 'start_time' and 'end_time' (e.g., [{"start_time": "09:00", "end_time": "13:00"}])
+        slot_duration: Duration of each slot in minutes, i.e. the bitmap granularity (default: 30)
+
+    Returns:
+        Bitmap with one bit set per generated slot
+    """
+    key = tuple(sorted((item["start_time"], item["end_time"]) for item in time_ranges))
+    return _ranges_mask(key, slot_duration)
+
+
+@lru_cache(maxsize=1024)
+def _ranges_mask(ranges: Tuple[Tuple[str, str], ...], slot_duration: int) -> int:
+    # Most doctors share a handful of schedules, so the parsed result is memoized
+    mask = 0
+    for start_time, end_time in ranges:
+        mask |= range_mask(time_to_minutes(start_time), time_to_minutes(end_time), slot_duration)
+    return mask
+
+
 def merge_slots_with_existing(
-    new_slots: List[Dict],
-    existing_slots: List[Dict],
+    new_slots: int,
+    existing: SlotBitmap,
     booked_slots_map: Dict[str, UUID] = None
-) -> List[Dict]:
+) -> SlotBitmap:
     """
-    Merge new slots with existing slots, preserving booked status
-    
+    Merge newly generated slots into an existing day, preserving booked status
+
     Args:
-        new_slots: Newly generated slots
-        existing_slots: Existing slots from database
+        new_slots: Open-slot bitmap from generate_slots_from_ranges
+        existing: Existing day bitmap from the database
         booked_slots_map: Dict mapping "start_time" -> appointment_id for booked slots
-    
+
     Returns:
-        Merged list of slots
+        Merged day bitmap
     """
-    if booked_slots_map is None:
-        booked_slots_map = {}
-    
-    # Create a map of existing slots by start_time
-    existing_map = {slot["start_time"]: slot for slot in existing_slots}
-    
-    # Create a map of new slots by start_time
-    new_map = {slot["start_time"]: slot for slot in new_slots}
-    
-    # Merge: new slots override existing, but preserve booked status
-    merged = []
-    all_start_times = set(list(existing_map.keys()) + list(new_map.keys()))
-    
-    for start_time in sorted(all_start_times):
-        if start_time in new_map:
-            # New slot takes priority
-            slot = new_map[start_time].copy()
-            # But preserve booking if it exists
-            if start_time in booked_slots_map:
-                slot["status"] = SlotStatus.BOOKED
-                slot["appointment_id"] = str(booked_slots_map[start_time])
-            elif start_time in existing_map and existing_map[start_time]["status"] == SlotStatus.BOOKED:
-                slot["status"] = SlotStatus.BOOKED
-                slot["appointment_id"] = existing_map[start_time].get("appointment_id")
-            merged.append(slot)
-        elif start_time in existing_map:
-            # Keep existing slot if not in new ranges
-            merged.append(existing_map[start_time])
-    
-    return merged
+    granularity = existing.granularity
+    booked_mask = 0
+    appointment_ids = dict(existing.appointment_ids)
+    for start_time, appointment_id in (booked_slots_map or {}).items():
+        bit = time_to_bit(start_time, granularity)
+        if bit is not None and new_slots >> bit & 1:
+            booked_mask |= 1 << bit
+            appointment_ids[bit] = str(appointment_id)
+
+    # New slots override existing ones (clearing blocks) but keep their bookings;
+    # slots outside the new ranges are kept untouched
+    return SlotBitmap(
+        granularity=granularity,
+        open=new_slots | existing.open,
+        booked=booked_mask | existing.booked,
+        blocked=existing.blocked & ~new_slots,
+        appointment_ids=appointment_ids
+    )
 
 
 def update_slot_statuses(
-    slots: List[Dict],
+    slots: SlotBitmap,
     day_of_week: str,
     appointments: List[Dict] = None,
     reference_date: Optional[date] = None,
     specific_date: Optional[date] = None
-) -> List[Dict]:
+) -> SlotBitmap:
     """
     Update slot statuses based on appointments and current date/time
-    
+
     Args:
-        slots: List of slot dicts
+        slots: Day bitmap
         day_of_week: Day of week (e.g., "monday")
         appointments: List of appointment dicts with appointment_date, appointment_time, status, id
+            (and optionally duration_minutes, default one slot)
         reference_date: Reference date for checking past slots (default: today)
         specific_date: If provided, use this exact date instead of calculating from weekday
-    
+
     Returns:
-        Updated slots with correct statuses
+        New day bitmap with booked, past and appointment_ids filled in
     """
     if reference_date is None:
         reference_date = date.today()
-    
+
     if appointments is None:
         appointments = []
-    
-    # Day mapping
-    day_map = {
-        "monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3,
-        "friday": 4, "saturday": 5, "sunday": 6
-    }
-    target_weekday = day_map.get(day_of_week.lower(), 0)
-    
+
+    granularity = slots.granularity
+
+    target_weekday = WEEKDAY_INDEX.get(day_of_week.lower(), 0)
+
     # If specific_date is provided (e.g., when booking for a specific date), use it directly
-    # Otherwise, calculate the next occurrence of the target weekday
+    # Otherwise, calculate the next occurrence of the target weekday from reference_date
     if specific_date is not None:
         target_date = specific_date
     else:
-        # Use reference_date as the base date for comparison
-        today = reference_date
-        today_weekday = today.weekday()  # 0=Monday, 6=Sunday
-        
-        # If reference_date matches the target weekday, use it directly
-        # Otherwise, calculate the next occurrence of the target weekday from reference_date
-        if today_weekday == target_weekday:
-            target_date = today
-        else:
-            # Calculate days until target day (next occurrence from reference_date)
-            days_until = (target_weekday - today_weekday) % 7
-            if days_until == 0:
-                target_date = today
-            else:
-                target_date = today + timedelta(days=days_until)
-    
-    # Create a map of booked slots for this specific day: "HH:MM" -> appointment_id
-    booked_map = {}
+        target_date = next_date_for_weekday(day_of_week, reference_date)
+
+    # Booked bits for this specific day
+    booked = 0
+    appointment_ids = {}
     for apt in appointments:
-        if apt.get("status") in ["pending", "confirmed"]:
-            apt_date = apt.get("appointment_date")
-            if isinstance(apt_date, date):
-                apt_date_obj = apt_date
-            elif isinstance(apt_date, str):
-                apt_date_obj = datetime.strptime(apt_date, "%Y-%m-%d").date()
-            else:
+        if apt.get("status") not in ["pending", "confirmed"]:
+            continue
+        apt_date = apt.get("appointment_date")
+        if isinstance(apt_date, str):
+            apt_date = datetime.strptime(apt_date, "%Y-%m-%d").date()
+        elif not isinstance(apt_date, date):
+            continue
+
+        # If specific_date is provided, only include appointments on that exact date
+        # Otherwise, include appointments on the target weekday from target_date onwards
+        if specific_date is not None:
+            if apt_date != target_date:
                 continue
-            
-            # If specific_date is provided, only include appointments on that exact date
-            # Otherwise, include appointments on the target weekday
-            if specific_date is not None:
-                # Only appointments on the exact target date
-                if apt_date_obj == target_date:
-                    apt_time = apt["appointment_time"]
-                    if isinstance(apt_time, time):
-                        time_str = apt_time.strftime("%H:%M")
-                    elif isinstance(apt_time, str):
-                        time_str = apt_time
-                    else:
-                        continue
-                    booked_map[time_str] = apt["id"]
-            else:
-                # Check if appointment is on the target day (or same weekday in future)
-                apt_weekday = apt_date_obj.weekday()
-                if apt_weekday == target_weekday:
-                    # Same weekday - check if it's the same week or future
-                    if apt_date_obj >= target_date:
-                        apt_time = apt["appointment_time"]
-                        if isinstance(apt_time, time):
-                            time_str = apt_time.strftime("%H:%M")
-                        elif isinstance(apt_time, str):
-                            time_str = apt_time
-                        else:
-                            continue
-                        booked_map[time_str] = apt["id"]
-    
-    # Update slot statuses with proper date+time checking
-    updated_slots = []
+        elif apt_date.weekday() != target_weekday or apt_date < target_date:
+            continue
+
+        # Every cell the appointment overlaps is booked, so longer consultations span several
+        apt_time = apt["appointment_time"]
+        if isinstance(apt_time, time):
+            start = apt_time.hour * 60 + apt_time.minute
+        else:
+            start = time_to_minutes(str(apt_time)[:5])
+        first = start // granularity
+        last = max(-(-(start + (apt.get("duration_minutes") or granularity)) // granularity), first + 1)
+        booked |= ((1 << (last - first)) - 1) << first
+        for bit in range(first, last):
+            appointment_ids[bit] = str(apt["id"])
+    booked &= slots.open
+
+    # Past bits: the whole day for past dates, slots that already started for today
     now = datetime.now()
-    current_datetime = now
     current_date = now.date()
-    current_time_str = now.strftime("%H:%M")
-    current_time_minutes = time_to_minutes(current_time_str)
-    
-    # When specific_date is provided (booking for a specific date), use it as target_date
-    if specific_date is not None:
-        # CRITICAL: Use the exact appointment date - don't calculate anything
-        target_date = specific_date
-        print(f"[Slot Manager] ===== BOOKING MODE =====")
-        print(f"[Slot Manager] specific_date provided: {specific_date}")
+    if target_date < current_date:
+        past = slots.open
+    elif target_date == current_date:
+        current_minutes = now.hour * 60 + now.minute
+        past = slots.open & ((1 << -(-current_minutes // granularity)) - 1)
     else:
-        # Calculate target_date from weekday (for weekly view)
-        target_date = reference_date
-        today_weekday = reference_date.weekday()
-        if today_weekday != target_weekday:
-            days_until = (target_weekday - today_weekday) % 7
-            if days_until > 0:
-                target_date = reference_date + timedelta(days=days_until)
-        print(f"[Slot Manager] ===== WEEKLY VIEW MODE =====")
-    
-    # CRITICAL: Determine date relationship - compare dates only
-    # Make sure we're comparing date objects
-    if not isinstance(target_date, date):
-        raise ValueError(f"target_date must be a date object, got {type(target_date)}")
-    if not isinstance(current_date, date):
-        raise ValueError(f"current_date must be a date object, got {type(current_date)}")
-    
-    is_past_date = (target_date < current_date)
-    is_today = (target_date == current_date)
-    is_future_date = (target_date > current_date)
-    
-    # Verify the comparison
-    direct_compare = target_date > current_date
-    print(f"[Slot Manager] ===== DATE COMPARISON =====")
-    print(f"[Slot Manager] target_date: {target_date} (type: {type(target_date).__name__})")
-    print(f"[Slot Manager] current_date: {current_date} (type: {type(current_date).__name__})")
-    print(f"[Slot Manager] Direct comparison: target_date > current_date = {direct_compare}")
-    print(f"[Slot Manager] is_past_date: {is_past_date}")
-    print(f"[Slot Manager] is_today: {is_today}")
-    print(f"[Slot Manager] is_future_date: {is_future_date}")
-    print(f"[Slot Manager] Current time: {current_time_str}")
-    print(f"[Slot Manager] Total slots: {len(slots)}, Booked slots: {len(booked_map)}")
-    
-    if specific_date is not None:
-        if is_future_date:
-            print(f"[Slot Manager] ✓✓✓ FUTURE DATE - All slots will be AVAILABLE (NO time check) ✓✓✓")
-        elif is_today:
-            print(f"[Slot Manager] ✓ TODAY - Will check time for each slot")
-        else:
-            print(f"[Slot Manager] ✗✗✗ ERROR: PAST DATE detected for {specific_date}! ✗✗✗")
-            print(f"[Slot Manager] This should not happen if you selected a future date!")
-    
-    # Process each slot
-    for slot in slots:
-        slot_copy = slot.copy()
-        start_time_str = slot["start_time"]
-        start_time_minutes = time_to_minutes(start_time_str)
-        
-        # Check if booked first
-        if start_time_str in booked_map:
-            slot_copy["status"] = SlotStatus.BOOKED
-            slot_copy["appointment_id"] = str(booked_map[start_time_str])
-        else:
-            # Determine slot status based on DATE + TIME
-            # CRITICAL: Check FUTURE first - if future, ALL slots available (NO time check)
-            if is_future_date:
-                # FUTURE DATE: All slots are available (NO time check whatsoever)
-                # This is the key: for future dates, we don't care about current time
-                slot_copy["status"] = SlotStatus.AVAILABLE
-                slot_copy["appointment_id"] = None
-            elif is_today:
-                # TODAY: Check if time has passed (slot_time < current_time)
-                if start_time_minutes < current_time_minutes:
-                    slot_copy["status"] = SlotStatus.PAST
-                    slot_copy["appointment_id"] = None
-                else:
-                    slot_copy["status"] = SlotStatus.AVAILABLE
-                    slot_copy["appointment_id"] = None
-            elif is_past_date:
-                # PAST DATE: All slots are past
-                slot_copy["status"] = SlotStatus.PAST
-                slot_copy["appointment_id"] = None
-            else:
-                # Fallback: mark as available (should never happen)
-                print(f"[Slot Manager] WARNING: Unexpected date state for slot {start_time_str}")
-                slot_copy["status"] = SlotStatus.AVAILABLE
-                slot_copy["appointment_id"] = None
-        
-        updated_slots.append(slot_copy)
-    
-    # Final counts and verification
-    available_count = sum(1 for s in updated_slots if s.get("status") == SlotStatus.AVAILABLE)
-    booked_count = sum(1 for s in updated_slots if s.get("status") == SlotStatus.BOOKED)
-    past_count = sum(1 for s in updated_slots if s.get("status") == SlotStatus.PAST)
-    
-    print(f"[Slot Manager] ===== FINAL RESULTS =====")
-    print(f"[Slot Manager] Available: {available_count}")
-    print(f"[Slot Manager] Booked: {booked_count}")
-    print(f"[Slot Manager] Past: {past_count}")
-    print(f"[Slot Manager] Total: {len(updated_slots)}")
-    
-    if specific_date is not None and is_future_date:
-        expected_available = len(updated_slots) - booked_count
-        if available_count == expected_available:
-            print(f"[Slot Manager] ✓✓✓ SUCCESS: All {expected_available} non-booked slots are AVAILABLE ✓✓✓")
-        else:
-            print(f"[Slot Manager] ⚠️  WARNING: Expected {expected_available} available, got {available_count}")
-    
-    return updated_slots
+        past = 0
+    past &= ~booked
+
+    result = SlotBitmap(
+        granularity=granularity,
+        open=slots.open,
+        booked=booked,
+        blocked=slots.blocked,
+        past=past,
+        appointment_ids=appointment_ids
+    )
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("slots.statuses", extra={"fields": {
+            "mode": "date" if specific_date is not None else "weekly",
+            "target_date": target_date,
+            "available": result.available.bit_count(),
+            "booked": result.booked.bit_count(),
+            "past": result.past.bit_count(),
+            "total": result.open.bit_count()
+        }})
+
+    return result
 
 
 def add_individual_slot(
-    existing_slots: List[Dict],
+    existing: SlotBitmap,
     start_time: str,
-    end_time: str,
-    slot_duration: int = 30
-) -> List[Dict]:
+    end_time: str
+) -> SlotBitmap:
     """
-    Add individual slot(s) to existing slots
-    
+    Add individual slot(s) to an existing day
+
     Args:
-        existing_slots: Existing slots
+        existing: Existing day bitmap
         start_time: Start time (HH:MM)
         end_time: End time (HH:MM)
-        slot_duration: Duration in minutes
-    
+
     Returns:
-        Updated slots list
+        Updated day bitmap (slots already present keep their status)
     """
-    new_slots = generate_slots_from_ranges([{"start_time": start_time, "end_time": end_time}], slot_duration)
-    
-    # Merge with existing, avoiding duplicates
-    existing_start_times = {slot["start_time"] for slot in existing_slots}
-    for new_slot in new_slots:
-        if new_slot["start_time"] not in existing_start_times:
-            existing_slots.append(new_slot)
-    
-    # Sort by start_time
-    existing_slots.sort(key=lambda x: time_to_minutes(x["start_time"]))
-    return existing_slots
+    updated = existing.copy()
+    updated.open |= range_mask(time_to_minutes(start_time), time_to_minutes(end_time), existing.granularity)
+    return updated
 
 
 def remove_individual_slot(
-    existing_slots: List[Dict],
+    existing: SlotBitmap,
     start_time: str
-) -> List[Dict]:
+) -> SlotBitmap:
     """
-    Remove individual slot from existing slots
-    
+    Remove individual slot from an existing day
+
     Args:
-        existing_slots: Existing slots
+        existing: Existing day bitmap
         start_time: Start time of slot to remove (HH:MM)
-    
+
     Returns:
-        Updated slots list
+        Updated day bitmap
     """
+    bit = time_to_bit(start_time, existing.granularity)
+    if bit is None:
+        return existing.copy()
+    flag = 1 << bit
+
     # Don't remove if booked
-    for slot in existing_slots:
-        if slot["start_time"] == start_time:
-            if slot.get("status") == SlotStatus.BOOKED:
-                raise ValueError(f"Cannot remove booked slot at {start_time}")
-    
-    return [slot for slot in existing_slots if slot["start_time"] != start_time]
+    if existing.booked & flag:
+        raise ValueError(f"Cannot remove booked slot at {start_time}")
 
+    updated = existing.copy()
+    updated.open &= ~flag
+    updated.blocked &= ~flag
+    updated.appointment_ids.pop(bit, None)
+    return updated
@@ -0,0 +1,448 @@
+"""
+Slot Materializer
+Expands each doctor's weekly DoctorAvailability template into doctor_slots rows
+
+Rows are kept SLOT_MATERIALIZE_DAYS ahead of today by roll_forward_slots (run
+periodically in the background) and refreshed for a doctor whenever their
+template changes. Booking claims a row with one conditional UPDATE.
+"""
+import logging
+import threading
+import time as clock
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import date, datetime, time, timedelta
+from uuid import UUID
+from sqlalchemy import column, text, tuple_, update
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID, insert
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.availability import DoctorAvailability
+from app.models.doctor import Doctor, DoctorStatus
+from app.models.doctor_slot import DoctorSlot, DoctorSlotStatus
+from app.utils.intervals import IntervalSet, free_starts, merge_cells
+from app.utils.slot_manager import SlotBitmap, SlotStatus, iter_bits, minutes_to_time, time_to_minutes
+
+logger = logging.getLogger(__name__)
+
+# Rows per bulk INSERT / tuple IN (...) statement
+BATCH_SIZE = 1000
+
+# Days counted in Doctor.free_slots_7d
+SUMMARY_DAYS = 7
+
+
+def horizon_date(today: Optional[date] = None) -> date:
+    """Last date that roll_forward_slots keeps materialized"""
+    return (today or date.today()) + timedelta(days=settings.SLOT_MATERIALIZE_DAYS)
+
+
+def _chunks(items: List, size: int = BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def materialize_slots(db: Session, doctor_ids: Iterable[UUID], from_date: date, to_date: date) -> None:
+    """
+    Bring doctor_slots in line with the weekly templates for a date window
+
+    Missing slots are inserted (booked if an active appointment already holds
+    them), slots no longer offered are deleted unless booked, and blocked
+    flags follow the template. Does not commit.
+    """
+    doctor_ids = list(doctor_ids)
+    if not doctor_ids or to_date < from_date:
+        return
+
+    templates = {
+        (avail.doctor_id, avail.day_of_week.value): SlotBitmap.from_record(avail)
+        for avail in db.query(DoctorAvailability).filter(
+            DoctorAvailability.doctor_id.in_(doctor_ids),
+            DoctorAvailability.is_available == True
+        ).all()
+    }
+
+    existing: Dict[Tuple[UUID, date], Dict[int, Tuple[DoctorSlotStatus, int]]] = {}
+    for row in db.query(
+        DoctorSlot.doctor_id, DoctorSlot.slot_date, DoctorSlot.start_minute, DoctorSlot.status, DoctorSlot.duration_minutes
+    ).filter(
+        DoctorSlot.doctor_id.in_(doctor_ids),
+        DoctorSlot.slot_date.between(from_date, to_date)
+    ).all():
+        existing.setdefault((row.doctor_id, row.slot_date), {})[row.start_minute] = (row.status, row.duration_minutes)
+
+    # Each active appointment holds [start, start + duration + buffer)
+    buffers = dict(db.query(Doctor.id, Doctor.buffer_minutes).filter(Doctor.id.in_(doctor_ids)).all())
+    booked: Dict[Tuple[UUID, date], IntervalSet] = {}
+    for apt in db.query(
+        Appointment.id, Appointment.doctor_id, Appointment.appointment_date, Appointment.appointment_time, Appointment.duration_minutes
+    ).filter(
+        Appointment.doctor_id.in_(doctor_ids),
+        Appointment.appointment_date.between(from_date, to_date),
+        Appointment.status.in_([AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED])
+    ).all():
+        start = apt.appointment_time.hour * 60 + apt.appointment_time.minute
+        end = start + (apt.duration_minutes or 30) + (buffers.get(apt.doctor_id) or 0)
+        try:
+            booked.setdefault((apt.doctor_id, apt.appointment_date), IntervalSet()).add(start, end, apt.id)
+        except ValueError:
+            pass  # Overlapping legacy bookings: the first one keeps the cells
+
+    inserts = []
+    deletes = []
+    to_block = []
+    to_unblock = []
+    to_resize = {}
+    day_count = (to_date - from_date).days + 1
+    for doctor_id in doctor_ids:
+        for offset in range(day_count):
+            current = from_date + timedelta(days=offset)
+            template = templates.get((doctor_id, current.strftime("%A").lower()))
+            current_rows = existing.get((doctor_id, current), {})
+            day_bookings = booked.get((doctor_id, current))
+
+            wanted = {}
+            if template is not None:
+                granularity = template.granularity
+                for bit in iter_bits(template.open):
+                    wanted[bit * granularity] = bool(template.blocked >> bit & 1)
+
+            for minute, blocked in wanted.items():
+                status, duration = current_rows.get(minute, (None, None))
+                key = (doctor_id, current, minute)
+                if status is not None and duration != template.granularity:
+                    to_resize.setdefault(template.granularity, []).append(key)
+                if status is None:
+                    appointment_id = day_bookings.value_at(minute, minute + template.granularity) if day_bookings else None
+                    if appointment_id is not None:
+                        status = DoctorSlotStatus.BOOKED
+                    elif blocked:
+                        status = DoctorSlotStatus.BLOCKED
+                    else:
+                        status = DoctorSlotStatus.AVAILABLE
+                    inserts.append({
+                        "doctor_id": doctor_id,
+                        "slot_date": current,
+                        "start_minute": minute,
+                        "duration_minutes": template.granularity,
+                        "status": status,
+                        "appointment_id": appointment_id
+                    })
+                elif status == DoctorSlotStatus.AVAILABLE and blocked:
+                    to_block.append(key)
+                elif status == DoctorSlotStatus.BLOCKED and not blocked:
+                    to_unblock.append(key)
+
+            for minute, (status, _) in current_rows.items():
+                if minute not in wanted and status != DoctorSlotStatus.BOOKED:
+                    deletes.append((doctor_id, current, minute))
+
+    slot_key = tuple_(DoctorSlot.doctor_id, DoctorSlot.slot_date, DoctorSlot.start_minute)
+    for chunk in _chunks(inserts):
+        db.execute(insert(DoctorSlot).values(chunk).on_conflict_do_nothing())
+    for chunk in _chunks(deletes):
+        db.query(DoctorSlot).filter(
+            slot_key.in_(chunk),
+            DoctorSlot.status != DoctorSlotStatus.BOOKED
+        ).delete(synchronize_session=False)
+    for keys, old_status, new_status in (
+        (to_block, DoctorSlotStatus.AVAILABLE, DoctorSlotStatus.BLOCKED),
+        (to_unblock, DoctorSlotStatus.BLOCKED, DoctorSlotStatus.AVAILABLE),
+    ):
+        for chunk in _chunks(keys):
+            db.query(DoctorSlot).filter(
+                slot_key.in_(chunk),
+                DoctorSlot.status == old_status
+            ).update({DoctorSlot.status: new_status}, synchronize_session=False)
+    # Cells whose template moved to a finer grid
+    for duration, keys in to_resize.items():
+        for chunk in _chunks(keys):
+            db.query(DoctorSlot).filter(slot_key.in_(chunk)).update(
+                {DoctorSlot.duration_minutes: duration}, synchronize_session=False
+            )
+
+
+def refresh_doctor_slots(db: Session, doctor_id: UUID) -> None:
+    """Re-materialize one doctor's slots after their template changed, and commit"""
+    today = date.today()
+    materialize_slots(db, [doctor_id], today, horizon_date(today))
+    update_availability_summary(db, [doctor_id])
+    db.commit()
+
+
+def update_availability_summary(db: Session, doctor_ids: Iterable[UUID]) -> None:
+    """
+    Recompute Doctor.next_available_at and Doctor.free_slots_7d from doctor_slots
+
+    Doctors with nothing free this week are looked up again over the rest of the
+    horizon for next_available_at. Does not commit.
+    """
+    doctor_ids = list(doctor_ids)
+    if not doctor_ids:
+        return
+    today = date.today()
+
+    def slot_start(slot_date: date, slot: Dict) -> datetime:
+        return datetime.combine(slot_date, time()) + timedelta(minutes=time_to_minutes(slot["start_time"]))
+
+    counts: Dict[UUID, int] = {}
+    first: Dict[UUID, datetime] = {}
+    week = free_slots(db, doctor_ids, today, today + timedelta(days=SUMMARY_DAYS - 1))
+    for (doctor_id, slot_date), slots in sorted(week.items(), key=lambda item: item[0][1]):
+        counts[doctor_id] = counts.get(doctor_id, 0) + len(slots)
+        first.setdefault(doctor_id, slot_start(slot_date, slots[0]))
+
+    later = [doctor_id for doctor_id in doctor_ids if doctor_id not in first]
+    if later:
+        beyond = free_slots(db, later, today + timedelta(days=SUMMARY_DAYS), horizon_date(today))
+        for (doctor_id, slot_date), slots in sorted(beyond.items(), key=lambda item: item[0][1]):
+            first.setdefault(doctor_id, slot_start(slot_date, slots[0]))
+
+    db.bulk_update_mappings(Doctor, [
+        {"id": doctor_id, "next_available_at": first.get(doctor_id), "free_slots_7d": counts.get(doctor_id, 0)}
+        for doctor_id in doctor_ids
+    ])
+
+
+def refresh_availability_summary(db: Session, doctor_id: UUID) -> None:
+    """Update one doctor's summary after a booking or cancellation, and commit"""
+    update_availability_summary(db, [doctor_id])
+    db.commit()
+
+
+def refresh_stale_summaries(db: Session) -> None:
+    """Recompute summaries whose next_available_at has already started"""
+    stale = [
+        doctor_id for (doctor_id,) in db.query(Doctor.id).filter(
+            Doctor.status == DoctorStatus.ACTIVE,
+            Doctor.next_available_at < datetime.now()
+        ).all()
+    ]
+    for chunk in _chunks(stale, 200):
+        update_availability_summary(db, chunk)
+        db.commit()
+
+
+def ensure_slots_materialized(db: Session, doctor_ids: Iterable[UUID], to_date: date) -> None:
+    """Materialize dates past the rolling horizon on demand (e.g. bookings far ahead), and commit"""
+    horizon = horizon_date()
+    if to_date <= horizon:
+        return
+    materialize_slots(db, doctor_ids, max(horizon + timedelta(days=1), date.today()), to_date)
+    db.commit()
+
+
+def roll_forward_slots(db: Session, days: Optional[int] = None) -> None:
+    """Extend every active doctor's slots to the horizon and drop rows for past dates"""
+    started = clock.perf_counter()
+    today = date.today()
+    to_date = today + timedelta(days=days if days is not None else settings.SLOT_MATERIALIZE_DAYS)
+
+    pruned = db.query(DoctorSlot).filter(DoctorSlot.slot_date < today).delete(synchronize_session=False)
+    db.commit()
+
+    doctor_ids = [doctor_id for (doctor_id,) in db.query(Doctor.id).filter(Doctor.status == DoctorStatus.ACTIVE).all()]
+    for chunk in _chunks(doctor_ids, 200):
+        materialize_slots(db, chunk, today, to_date)
+        update_availability_summary(db, chunk)
+        db.commit()
+
+    logger.info("slots.roll_forward", extra={"fields": {
+        "doctors": len(doctor_ids),
+        "to_date": to_date,
+        "pruned": pruned,
+        "total_ms": round((clock.perf_counter() - started) * 1000, 3)
+    }})
+
+
+def start_roll_forward_thread() -> threading.Thread:
+    """
+    Background job in a daemon thread
+
+    Runs roll_forward_slots now and every SLOT_ROLL_FORWARD_INTERVAL_SECONDS, and
+    refreshes stale availability summaries every AVAILABILITY_SUMMARY_INTERVAL_SECONDS
+    in between.
+    """
+    from app.database import SessionLocal
+
+    stop = threading.Event()
+
+    def run():
+        last_roll_forward = None
+        while not stop.is_set():
+            db = SessionLocal()
+            try:
+                now = clock.monotonic()
+                if last_roll_forward is None or now - last_roll_forward >= settings.SLOT_ROLL_FORWARD_INTERVAL_SECONDS:
+                    last_roll_forward = now
+                    roll_forward_slots(db)
+                else:
+                    refresh_stale_summaries(db)
+            except Exception:
+                db.rollback()
+                logger.exception("slots.roll_forward.failed")
+            finally:
+                db.close()
+            stop.wait(min(settings.AVAILABILITY_SUMMARY_INTERVAL_SECONDS, settings.SLOT_ROLL_FORWARD_INTERVAL_SECONDS))
+
+    thread = threading.Thread(target=run, name="slot-roll-forward", daemon=True)
+    thread.stop = stop
+    thread.start()
+    return thread
+
+
+def claim_slot(
+    db: Session,
+    doctor_id: UUID,
+    on_date: date,
+    at_time: time,
+    appointment_id: UUID,
+    duration_minutes: int = 30,
+    buffer_minutes: int = 0
+) -> bool:
+    """
+    Atomically mark every cell of [at_time, at_time + duration + buffer) as booked
+
+    One conditional UPDATE claims the available cells in the range; the claim
+    only counts if those cells cover the whole range without gaps (a gap is a
+    cell that is booked, blocked or not offered). Returns False in that case and
+    the caller must roll back.
+    """
+    start = at_time.hour * 60 + at_time.minute
+    end = start + duration_minutes + buffer_minutes
+    claimed = db.execute(
+        update(DoctorSlot).where(
+            DoctorSlot.doctor_id == doctor_id,
+            DoctorSlot.slot_date == on_date,
+            DoctorSlot.start_minute >= start,
+            DoctorSlot.start_minute < end,
+            DoctorSlot.status == DoctorSlotStatus.AVAILABLE
+        ).values(
+            status=DoctorSlotStatus.BOOKED,
+            appointment_id=appointment_id
+        ).returning(DoctorSlot.start_minute, DoctorSlot.duration_minutes),
+        execution_options={"synchronize_session": False}
+    ).all()
+    windows = merge_cells(sorted((row.start_minute, row.duration_minutes) for row in claimed))
+    return len(windows) == 1 and windows.starts[0] == start and windows.ends[0] >= end
+
+
+def release_slot(db: Session, appointment_id: UUID) -> None:
+    """Free the slot held by an appointment, if any"""
+    db.query(DoctorSlot).filter(
+        DoctorSlot.appointment_id == appointment_id
+    ).update({
+        DoctorSlot.status: DoctorSlotStatus.AVAILABLE,
+        DoctorSlot.appointment_id: None
+    }, synchronize_session=False)
+
+
+def free_slots(
+    db: Session,
+    doctor_ids: Iterable[UUID],
+    from_date: date,
+    to_date: date
+) -> Dict[Tuple[UUID, date], List[Dict]]:
+    """
+    Bookable start times per (doctor_id, date) via an indexed range scan
+
+    Slots are as long as the doctor's consultation and leave their buffer free
+    after them. Slots on past dates, or that already started today, are left out.
+    """
+    today = date.today()
+    from_date = max(from_date, today)
+    result: Dict[Tuple[UUID, date], List[Dict]] = {}
+    doctor_ids = list(doctor_ids)
+    if not doctor_ids or to_date < from_date:
+        return result
+
+    lengths = {
+        row.id: (row.consultation_minutes or 30, row.buffer_minutes or 0)
+        for row in db.query(Doctor.id, Doctor.consultation_minutes, Doctor.buffer_minutes).filter(Doctor.id.in_(doctor_ids)).all()
+    }
+    cells: Dict[Tuple[UUID, date], List[Tuple[int, int]]] = {}
+    for row in db.query(DoctorSlot.doctor_id, DoctorSlot.slot_date, DoctorSlot.start_minute, DoctorSlot.duration_minutes).filter(
+        DoctorSlot.doctor_id.in_(doctor_ids),
+        DoctorSlot.slot_date.between(from_date, to_date),
+        DoctorSlot.status == DoctorSlotStatus.AVAILABLE
+    ).order_by(DoctorSlot.doctor_id, DoctorSlot.slot_date, DoctorSlot.start_minute).all():
+        cells.setdefault((row.doctor_id, row.slot_date), []).append((row.start_minute, row.duration_minutes))
+
+    # Free cells merge into windows, which are packed with the doctor's consultation length
+    now = datetime.now()
+    for (doctor_id, slot_date), day_cells in cells.items():
+        duration, buffer = lengths.get(doctor_id, (30, 0))
+        grid = min(length for _, length in day_cells)
+        not_before = now.hour * 60 + now.minute if slot_date == today else 0
+        starts = free_starts(merge_cells(day_cells), duration, buffer, grid, not_before)
+        if starts:
+            result[(doctor_id, slot_date)] = [
+                {
+                    "start_time": minutes_to_time(start),
+                    "end_time": minutes_to_time(start + duration),
+                    "status": SlotStatus.AVAILABLE,
+                    "appointment_id": None
+                }
+                for start in starts
+            ]
+    return result
+
+
+# Doctors with at least one bookable consultation starting in [from_minute, to_minute) on a
+# date, using the same packing as free_slots: free cells are merged into islands
+# (gaps-and-islands on a running sum of cell lengths) and packed from each island start.
+FREE_IN_WINDOW_SQL = """
+WITH cells AS (
+    SELECT doctor_id, start_minute, duration_minutes,
+           start_minute + duration_minutes
+               - SUM(duration_minutes) OVER (PARTITION BY doctor_id ORDER BY start_minute) AS island
+    FROM doctor_slots
+    WHERE slot_date = :on_date AND status = 'AVAILABLE' AND start_minute < :scan_to
+),
+islands AS (
+    SELECT doctor_id,
+           MIN(start_minute) AS island_start,
+           MAX(start_minute + duration_minutes) AS island_end,
+           MIN(duration_minutes) AS grid
+    FROM cells
+    GROUP BY doctor_id, island
+),
+packed AS (
+    SELECT i.doctor_id, i.island_start, i.island_end,
+           d.consultation_minutes + d.buffer_minutes AS needed,
+           (d.consultation_minutes + d.buffer_minutes + i.grid - 1) / i.grid * i.grid AS stride
+    FROM islands i
+    JOIN doctors d ON d.id = i.doctor_id
+)
+SELECT DISTINCT doctor_id
+FROM (
+    SELECT doctor_id, island_end, needed,
+           island_start + (GREATEST(:from_minute, island_start) - island_start + stride - 1) / stride * stride AS first_start
+    FROM packed
+) candidates
+WHERE first_start < :to_minute AND first_start + needed <= island_end
+"""
+
+# Longest consultation plus buffer a slot starting before to_minute can need
+MAX_SLOT_SPAN = 240 + 120
+
+
+def doctors_free_in_window(on_date: date, from_minute: int, to_minute: int):
+    """Subquery of doctor ids with a free slot starting in [from_minute, to_minute) on on_date"""
+    return text(FREE_IN_WINDOW_SQL).bindparams(
+        on_date=on_date,
+        from_minute=from_minute,
+        to_minute=to_minute,
+        scan_to=to_minute + MAX_SLOT_SPAN
+    ).columns(column("doctor_id", PG_UUID(as_uuid=True)))
+
+
+if __name__ == "__main__":
+    # One-off roll forward, e.g. from cron: python -m app.utils.slot_materializer
+    from app.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        roll_forward_slots(session)
+    finally:
+        session.close()
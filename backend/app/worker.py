@@ -0,0 +1,43 @@
+"""
+Celery app for scheduled background jobs
+
+    celery -A app.worker worker --beat --loglevel=info
+
+Requires CELERY_BROKER_URL. Without it the API process runs the same jobs in
+daemon threads instead (see app.main).
+"""
+from celery import Celery
+from app.config import settings
+from app.core.log import configure_logging
+from app.utils.appointment_sweeper import run_sweep
+from app.utils.reminders import run_reminders
+
+configure_logging()
+
+celery_app = Celery("wecure", broker=settings.CELERY_BROKER_URL)
+celery_app.conf.update(
+    task_ignore_result=True,
+    # Overlapping runs are safe: duplicate reminders hit ON CONFLICT DO NOTHING, sweeps skip locked rows
+    beat_schedule={
+        "send-appointment-reminders": {
+            "task": "app.worker.send_appointment_reminders",
+            "schedule": settings.REMINDER_INTERVAL_SECONDS,
+            "options": {"expires": settings.REMINDER_INTERVAL_SECONDS},
+        },
+        "sweep-stale-appointments": {
+            "task": "app.worker.sweep_stale_appointments",
+            "schedule": settings.APPOINTMENT_SWEEP_INTERVAL_SECONDS,
+            "options": {"expires": settings.APPOINTMENT_SWEEP_INTERVAL_SECONDS},
+        },
+    },
+)
+
+
+@celery_app.task(name="app.worker.send_appointment_reminders")
+def send_appointment_reminders() -> int:
+    return run_reminders()
+
+
+@celery_app.task(name="app.worker.sweep_stale_appointments")
+def sweep_stale_appointments() -> int:
+    return run_sweep()
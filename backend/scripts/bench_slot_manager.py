@@ -0,0 +1,195 @@
+"""
+Microbenchmarks for app/utils/slot_manager.py
+Reports ops/sec and peak allocation per pass, and compares against a stored baseline
+
+Runs without a database or a running API:
+
+    python scripts/bench_slot_manager.py                    # run and compare with the baseline
+    python scripts/bench_slot_manager.py --save-baseline    # record a new baseline
+    python scripts/bench_slot_manager.py --doctors 200      # smaller run
+
+Exits with code 1 if any benchmark is more than --tolerance slower than the baseline.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+from pathlib import Path
+from uuid import uuid4
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.utils.slot_manager import (
+    SlotBitmap,
+    add_individual_slot,
+    generate_slots_from_ranges,
+    merge_slots_with_existing,
+    minutes_to_time,
+    remove_individual_slot,
+    update_slot_statuses,
+)
+
+BASELINE_PATH = Path(__file__).parent / "bench_slot_manager_baseline.json"
+
+# 48 slots per day (30-min grid) and 288 slots per day (5-min grid)
+GRANULARITIES = (30, 5)
+
+RANGE_SHAPES = [
+    [{"start_time": "09:00", "end_time": "17:00"}],
+    [{"start_time": "09:00", "end_time": "13:00"}, {"start_time": "15:00", "end_time": "21:00"}],
+    [{"start_time": "00:00", "end_time": "23:55"}],
+]
+
+def make_doctors(count: int, granularity: int, rng: random.Random):
+    """One day bitmap per doctor, with some slots booked and blocked"""
+    doctors = []
+    for _ in range(count):
+        ranges = rng.choice(RANGE_SHAPES)
+        open_mask = generate_slots_from_ranges(ranges, granularity)
+        booked = open_mask & rng.getrandbits(open_mask.bit_length() or 1) & rng.getrandbits(open_mask.bit_length() or 1)
+        blocked = open_mask & ~booked & rng.getrandbits(open_mask.bit_length() or 1) & rng.getrandbits(8)
+        doctors.append((ranges, SlotBitmap(granularity, open=open_mask, booked=booked, blocked=blocked)))
+    return doctors
+
+def make_appointments(count: int, granularity: int, rng: random.Random):
+    """Active appointments spread over the next year, as update_slot_statuses receives them"""
+    today = date.today()
+    appointments = []
+    for _ in range(count):
+        minute = rng.randrange(9 * 60, 17 * 60, granularity)
+        appointments.append({
+            "id": str(uuid4()),
+            "appointment_date": today + timedelta(days=rng.randrange(365)),
+            "appointment_time": f"{minutes_to_time(minute)}:00",
+            "status": rng.choice(["pending", "confirmed", "cancelled"])
+        })
+    return appointments
+
+def build_cases(doctor_count: int, appointment_count: int, seed: int):
+    """(name, calls per pass, pass function) for every benchmark"""
+    cases = []
+    for granularity in GRANULARITIES:
+        rng = random.Random(seed)
+        slots = 1440 // granularity
+        doctors = make_doctors(doctor_count, granularity, rng)
+        appointments = make_appointments(appointment_count, granularity, rng)
+        target = date.today() + timedelta(days=7)
+        day_appointments = [apt for apt in appointments if apt["appointment_date"] == target]
+        booked_map = {apt["appointment_time"][:5]: apt["id"] for apt in day_appointments}
+        free_start = [
+            minutes_to_time(((bitmap.open & ~bitmap.booked).bit_length() - 1) * granularity) if bitmap.open & ~bitmap.booked else "00:00"
+            for _, bitmap in doctors
+        ]
+
+        def generate(doctors=doctors, granularity=granularity):
+            for ranges, _ in doctors:
+                generate_slots_from_ranges(ranges, granularity)
+
+        def merge(doctors=doctors, granularity=granularity, booked_map=booked_map):
+            for ranges, bitmap in doctors:
+                merge_slots_with_existing(generate_slots_from_ranges(ranges, granularity), bitmap, booked_map)
+
+        def statuses_date(doctors=doctors, day_appointments=day_appointments, target=target):
+            for _, bitmap in doctors:
+                update_slot_statuses(bitmap, target.strftime("%A").lower(), day_appointments, specific_date=target)
+
+        def statuses_weekly(doctors=doctors, appointments=appointments):
+            for _, bitmap in doctors:
+                update_slot_statuses(bitmap, "monday", appointments)
+
+        def add(doctors=doctors):
+            for _, bitmap in doctors:
+                add_individual_slot(bitmap, "21:00", "22:00")
+
+        def remove(doctors=doctors, free_start=free_start):
+            for (_, bitmap), start_time in zip(doctors, free_start):
+                remove_individual_slot(bitmap, start_time)
+
+        suffix = f"{slots}_slots"
+        cases += [
+            (f"generate_slots_from_ranges[{suffix}]", doctor_count, generate),
+            (f"merge_slots_with_existing[{suffix}]", doctor_count, merge),
+            (f"update_slot_statuses.date[{suffix}]", doctor_count, statuses_date),
+            (f"update_slot_statuses.weekly[{suffix},{appointment_count}_appointments]", doctor_count, statuses_weekly),
+            (f"add_individual_slot[{suffix}]", doctor_count, add),
+            (f"remove_individual_slot[{suffix}]", doctor_count, remove),
+        ]
+    return cases
+
+def measure(calls: int, run, repeat: int):
+    """Best-of-repeat ops/sec, then peak traced memory for one pass"""
+    run()  # warm up
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - started)
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"ops_per_sec": round(calls / best, 1), "peak_kib": round(peak / 1024, 1)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--doctors", type=int, default=2000)
+    parser.add_argument("--appointments", type=int, default=2000, help="Appointments per doctor for the weekly view")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed ops/sec drop before failing (0.25 = 25%%)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline.exists() and not args.save_baseline:
+        stored = json.loads(args.baseline.read_text())
+        if (stored.get("doctors"), stored.get("appointments")) != (args.doctors, args.appointments):
+            print(f"⚠️  Baseline was recorded with {stored.get('doctors')} doctors and "
+                  f"{stored.get('appointments')} appointments; not comparing")
+        else:
+            baseline = stored.get("results", {})
+
+    print(f"⏱  slot_manager benchmarks: {args.doctors} doctors, {args.appointments} appointments, best of {args.repeat}")
+    print(f"{'benchmark':<62} {'ops/sec':>12} {'peak KiB':>10} {'vs baseline':>12}")
+
+    results = {}
+    regressions = []
+    for name, calls, run in build_cases(args.doctors, args.appointments, args.seed):
+        result = results[name] = measure(calls, run, args.repeat)
+        change = ""
+        previous = baseline.get(name)
+        if previous:
+            ratio = result["ops_per_sec"] / previous["ops_per_sec"]
+            change = f"{(ratio - 1) * 100:+.1f}%"
+            if ratio < 1 - args.tolerance:
+                regressions.append(name)
+                change += " ❌"
+        print(f"{name:<62} {result['ops_per_sec']:>12,.1f} {result['peak_kib']:>10,.1f} {change:>12}")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps({
+            "doctors": args.doctors,
+            "appointments": args.appointments,
+            "python": sys.version.split()[0],
+            "results": results
+        }, indent=2) + "\n")
+        print(f"\n✅ Baseline saved to {args.baseline}")
+        return
+
+    if not baseline:
+        print(f"\nℹ️  No baseline at {args.baseline}; run with --save-baseline to record one")
+    elif regressions:
+        print(f"\n❌ {len(regressions)} benchmark(s) regressed by more than {args.tolerance:.0%}")
+        sys.exit(1)
+    else:
+        print(f"\n✅ No regressions beyond {args.tolerance:.0%}")
+
+if __name__ == "__main__":
+    main()
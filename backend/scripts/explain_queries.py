@@ -0,0 +1,217 @@
+"""
+EXPLAIN regression check for the API's hot queries
+Runs EXPLAIN on each endpoint's query shape against a seeded database and fails
+if any of them falls back to a sequential scan
+
+    python scripts/explain_queries.py                      # every query must be able to use an index
+    python scripts/explain_queries.py --planner-defaults   # real plans; only flag big tables
+    python scripts/explain_queries.py --verbose            # print each plan
+
+By default sequential scans are disabled for the session (enable_seqscan = off),
+so a small seeded database still shows whether an index can serve each query:
+a Seq Scan that remains means no index fits. With --planner-defaults the planner
+runs as in production and only Seq Scans on tables with at least --min-rows
+estimated rows are reported.
+
+Exits with code 1 if any query regresses.
+"""
+import argparse
+import json
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import func, literal, text, tuple_
+from app.database import SessionLocal
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.availability import DoctorAvailability
+from app.models.doctor import Doctor, DoctorStatus
+from app.models.doctor_slot import DoctorSlot, DoctorSlotStatus
+from app.models.patient import Patient
+from app.models.prescription import Prescription
+from app.models.review import Review
+from app.utils.appointment_sweeper import stale_appointments
+from app.utils.reminders import due_reminders_query, reminder_windows
+
+PAGE = 101  # limit + 1, as the list endpoints fetch it
+ACTIVE = [AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED]
+
+# Lookup tables that stay small; a scan of these is never a regression
+SMALL_TABLES = {"specialties", "schedule_templates"}
+
+
+def appointment_page(query):
+    return query.order_by(
+        Appointment.appointment_date.desc(),
+        Appointment.appointment_time.desc(),
+        Appointment.id.desc()
+    ).limit(PAGE)
+
+
+def build_cases(db, sample):
+    """(name, query) for every endpoint query shape, bound to sample ids"""
+    today = date.today()
+    day = sample["appointment_date"]
+    reminder_offset, reminder_after, reminder_until = reminder_windows(datetime.now(), [1440, 60])[0]
+    return [
+        ("appointments.list[patient]", appointment_page(db.query(Appointment).filter(Appointment.patient_id == sample["patient_id"]))),
+        ("appointments.list[doctor]", appointment_page(db.query(Appointment).filter(Appointment.doctor_id == sample["doctor_id"]))),
+        ("appointments.list[patient,cursor]", appointment_page(db.query(Appointment).filter(
+            Appointment.patient_id == sample["patient_id"],
+            tuple_(Appointment.appointment_date, Appointment.appointment_time, Appointment.id) < tuple_(
+                literal(sample["appointment_date"], Appointment.appointment_date.type),
+                literal(sample["appointment_time"], Appointment.appointment_time.type),
+                literal(sample["appointment_id"], Appointment.id.type)
+            )
+        ))),
+        ("appointments.patient_calendar", db.query(Appointment.id, Appointment.appointment_time, Appointment.duration_minutes).filter(
+            Appointment.patient_id == sample["patient_id"],
+            Appointment.appointment_date == day,
+            Appointment.status.in_(ACTIVE)
+        )),
+        ("appointments.doctor_calendar", db.query(Appointment.id, Appointment.appointment_time, Appointment.duration_minutes).filter(
+            Appointment.doctor_id == sample["doctor_id"],
+            Appointment.appointment_date == day,
+            Appointment.status.in_(ACTIVE)
+        )),
+        ("admin.appointments", appointment_page(db.query(Appointment))),
+        ("admin.appointments[status]", appointment_page(db.query(Appointment).filter(Appointment.status == AppointmentStatus.PENDING))),
+        ("availability.week", db.query(Appointment.id, Appointment.appointment_date, Appointment.appointment_time).filter(
+            Appointment.doctor_id == sample["doctor_id"],
+            Appointment.appointment_date.between(today, today + timedelta(days=6)),
+            Appointment.status.in_(ACTIVE)
+        )),
+        ("reminders.due", due_reminders_query(db, reminder_offset, reminder_after, reminder_until)),
+        ("appointments.sweep", stale_appointments(datetime.now() - timedelta(hours=2))),
+        ("availability.rows", db.query(DoctorAvailability).filter(DoctorAvailability.doctor_id == sample["doctor_id"])),
+        ("slots.free", db.query(DoctorSlot.doctor_id, DoctorSlot.slot_date, DoctorSlot.start_minute).filter(
+            DoctorSlot.doctor_id.in_([sample["doctor_id"]]),
+            DoctorSlot.slot_date.between(today, today + timedelta(days=6)),
+            DoctorSlot.status == DoctorSlotStatus.AVAILABLE
+        )),
+        ("slots.search_by_date", db.query(DoctorSlot.doctor_id).filter(
+            DoctorSlot.slot_date == today,
+            DoctorSlot.status == DoctorSlotStatus.AVAILABLE
+        )),
+        ("slots.by_appointment", db.query(DoctorSlot.appointment_id).filter(DoctorSlot.appointment_id == sample["appointment_id"])),
+        ("doctors.available_soonest", db.query(Doctor).filter(Doctor.status == DoctorStatus.ACTIVE).order_by(
+            Doctor.next_available_at.asc()
+        ).limit(20)),
+        ("doctors.me", db.query(Doctor).filter(Doctor.user_id == sample["doctor_user_id"])),
+        ("patients.me", db.query(Patient).filter(Patient.user_id == sample["patient_user_id"])),
+        ("admin.patients", db.query(Patient).order_by(Patient.created_at.desc(), Patient.id.desc()).limit(PAGE)),
+        ("admin.doctors", db.query(Doctor).order_by(Doctor.created_at.desc(), Doctor.id.desc()).limit(PAGE)),
+        ("admin.doctors[status]", db.query(Doctor).filter(Doctor.status == DoctorStatus.ACTIVE).order_by(
+            Doctor.created_at.desc(), Doctor.id.desc()
+        ).limit(PAGE)),
+        ("reviews.doctor", db.query(Review).filter(Review.doctor_id == sample["doctor_id"]).order_by(
+            Review.created_at.desc(), Review.id.desc()
+        ).limit(PAGE)),
+        ("reviews.doctor.etag", db.query(func.count(Review.id), func.max(Review.updated_at)).filter(Review.doctor_id == sample["doctor_id"])),
+        ("reviews.me[patient]", db.query(Review).filter(Review.patient_id == sample["patient_id"]).order_by(
+            Review.created_at.desc(), Review.id.desc()
+        ).limit(PAGE)),
+        ("prescriptions.list[patient]", db.query(Prescription).filter(Prescription.patient_id == sample["patient_id"]).order_by(
+            Prescription.created_at.desc(), Prescription.id.desc()
+        ).limit(PAGE)),
+        ("prescriptions.list[doctor]", db.query(Prescription).filter(Prescription.doctor_id == sample["doctor_id"]).order_by(
+            Prescription.created_at.desc(), Prescription.id.desc()
+        ).limit(PAGE)),
+    ]
+
+
+def load_sample(db):
+    """Ids of a real appointment's doctor and patient, so every case has matching rows"""
+    row = db.query(
+        Appointment.id, Appointment.doctor_id, Appointment.patient_id,
+        Appointment.appointment_date, Appointment.appointment_time,
+        Doctor.user_id.label("doctor_user_id"), Patient.user_id.label("patient_user_id")
+    ).join(Doctor, Doctor.id == Appointment.doctor_id).join(Patient, Patient.id == Appointment.patient_id).first()
+    if row is None:
+        return None
+    return {
+        "appointment_id": row.id,
+        "doctor_id": row.doctor_id,
+        "patient_id": row.patient_id,
+        "appointment_date": row.appointment_date,
+        "appointment_time": row.appointment_time,
+        "doctor_user_id": row.doctor_user_id,
+        "patient_user_id": row.patient_user_id,
+    }
+
+
+def explain(db, query):
+    statement = getattr(query, "statement", query)  # ORM Query or Core select
+    sql = str(statement.compile(dialect=db.bind.dialect, compile_kwargs={"literal_binds": True}))
+    # Sent as-is: the compiled SQL contains literal values, not bind parameters
+    return db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}").scalar()[0]["Plan"]
+
+
+def walk(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from walk(child)
+
+
+def table_rows(db):
+    """Planner row estimates per table"""
+    return {
+        name: rows for name, rows in db.execute(text(
+            "SELECT relname, reltuples FROM pg_class WHERE relkind = 'r' AND relnamespace = 'public'::regnamespace"
+        )).all()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--planner-defaults", action="store_true", help="Keep enable_seqscan on and only flag large tables")
+    parser.add_argument("--min-rows", type=int, default=10000, help="Table size that counts as large with --planner-defaults")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        sample = load_sample(db)
+        if sample is None:
+            print("❌ No appointments found; seed the database first (python scripts/seed_dummy_data.py)")
+            sys.exit(1)
+
+        if not args.planner_defaults:
+            db.execute(text("SET LOCAL enable_seqscan = off"))
+        rows = table_rows(db)
+
+        print(f"🔎 EXPLAIN check ({'planner defaults' if args.planner_defaults else 'enable_seqscan = off'})")
+        print(f"{'query':<38} {'indexes':<60} {'result':>8}")
+
+        regressions = []
+        for name, query in build_cases(db, sample):
+            plan = explain(db, query)
+            nodes = list(walk(plan))
+            indexes = sorted({node["Index Name"] for node in nodes if "Index Name" in node})
+            scans = [
+                node["Relation Name"] for node in nodes
+                if node["Node Type"] == "Seq Scan"
+                and node["Relation Name"] not in SMALL_TABLES
+                and (not args.planner_defaults or rows.get(node["Relation Name"], 0) >= args.min_rows)
+            ]
+            if scans:
+                regressions.append(name)
+            result = f"❌ seq scan on {', '.join(sorted(set(scans)))}" if scans else "✅"
+            print(f"{name:<38} {', '.join(indexes) or '-':<60} {result:>8}")
+            if args.verbose:
+                print(json.dumps(plan, indent=2))
+    finally:
+        db.rollback()
+        db.close()
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} query(s) fall back to a sequential scan")
+        sys.exit(1)
+    print("\n✅ Every query is served by an index")
+
+
+if __name__ == "__main__":
+    main()
@@ -19,7 +19,10 @@ from app.models.availability import DoctorAvailability, DayOfWeek
 from app.models.review import Review
 from app.models.prescription import Prescription
 from app.core.security import get_password_hash
-from app.utils.slot_manager import generate_slots_from_ranges
+from app.utils.slot_manager import generate_slots_from_ranges, SlotBitmap
+from app.utils.schedule_templates import get_or_create_template
+from app.utils.slot_materializer import roll_forward_slots
+from app.utils.number_allocator import appointment_numbers, prescription_numbers
 from datetime import date, time, datetime, timedelta
 import uuid
 
@@ -164,15 +167,17 @@ def create_dummy_users(db: Session):
             weekdays = [DayOfWeek.MONDAY, DayOfWeek.TUESDAY, DayOfWeek.WEDNESDAY, 
                        DayOfWeek.THURSDAY, DayOfWeek.FRIDAY]
             time_ranges = [{"start_time": "09:00", "end_time": "17:00"}]
-            slots = generate_slots_from_ranges(time_ranges)
+            slots = SlotBitmap(open=generate_slots_from_ranges(time_ranges))
+            template = get_or_create_template(db, slots.open, slots.granularity)
             
             for day in weekdays:
                 availability = DoctorAvailability(
                     doctor_id=doctor.id,
                     day_of_week=day,
                     is_available=True,
-                    slots=slots
+                    template=template
                 )
+                slots.store(availability)
                 db.add(availability)
             
             created_users[user_data["email"]] = {"user": user, "doctor": doctor}
@@ -256,7 +261,7 @@ def create_dummy_appointments(db: Session, users_data: dict):
     for i, apt_data in enumerate(appointments_data, 1):
         appointment = Appointment(
             id=uuid.uuid4(),
-            appointment_number=f"APT-{str(i).zfill(6)}",
+            appointment_number=appointment_numbers.next(db),
             patient_id=apt_data["patient"].id,
             doctor_id=apt_data["doctor"].id,
             appointment_date=apt_data["date"],
@@ -344,7 +349,7 @@ def create_dummy_prescriptions(db: Session):
     
     prescription = Prescription(
         id=uuid.uuid4(),
-        prescription_number="RX-000001",
+        prescription_number=prescription_numbers.next(db),
         doctor_id=completed_apt.doctor_id,
         patient_id=completed_apt.patient_id,
         appointment_id=completed_apt.id,
@@ -389,6 +394,10 @@ def main():
         # Create prescriptions
         create_dummy_prescriptions(db)
         
+        # Materialize bookable slots for the seeded doctors
+        roll_forward_slots(db)
+        print("✓ Doctor slots materialized successfully")
+        
         print("=" * 50)
         print("✅ Database seeding completed successfully!")
         print("\n📋 Test Credentials:")
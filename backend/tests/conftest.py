@@ -0,0 +1,41 @@
+"""
+Shared fixtures for tests that need a real Postgres database
+
+Set TEST_DATABASE_URL to a disposable database; it is migrated to head once
+per run. Tests that need it are skipped when it is not set, so the default
+DATABASE_URL is never touched.
+"""
+import os
+from pathlib import Path
+
+import pytest
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+if TEST_DATABASE_URL:
+    # Before app.config is imported: settings, the engine, SessionLocal and alembic all use it
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture(scope="session")
+def migrated_db():
+    """Run alembic upgrade head on the test database"""
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    from alembic import command
+    from alembic.config import Config
+
+    command.upgrade(Config(str(BACKEND_DIR / "alembic.ini")), "head")
+
+
+@pytest.fixture
+def db(migrated_db):
+    from app.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
@@ -0,0 +1,137 @@
+"""
+Concurrent bookings of one slot: exactly one wins
+
+Many threads post the same doctor, date and time through the API at once.
+Half the patients send two requests each, so both the doctor's and the
+patient's active-slot unique indexes are contended.
+"""
+import threading
+import uuid
+from collections import Counter
+from datetime import date, time, timedelta
+
+import pytest
+
+THREADS = 24
+PATIENTS = THREADS // 2
+SLOT = time(10, 0)
+
+
+@pytest.fixture
+def booking_setup(db):
+    """An active doctor open 09:00-17:00 tomorrow, PATIENTS patients and their tokens"""
+    from app.core.security import create_access_token
+    from app.models.availability import DayOfWeek, DoctorAvailability
+    from app.models.doctor import Doctor, DoctorStatus
+    from app.models.doctor_slot import DoctorSlot
+    from app.models.patient import Patient
+    from app.models.user import User, UserRole
+    from app.models.appointment import Appointment
+    from app.utils.schedule_templates import get_or_create_template
+    from app.utils.slot_manager import SlotBitmap, generate_slots_from_ranges
+    from app.utils.slot_materializer import refresh_doctor_slots
+
+    run_id = uuid.uuid4().hex[:8]
+    on_date = date.today() + timedelta(days=1)
+
+    doctor_user = User(email=f"race-doctor-{run_id}@wecure.com", hashed_password="-", role=UserRole.DOCTOR)
+    db.add(doctor_user)
+    db.flush()
+    doctor = Doctor(
+        user_id=doctor_user.id,
+        full_name="Dr. Race",
+        phone="+10000000000",
+        registration_number=f"REG-RACE-{run_id}",
+        qualification="MD",
+        specialties=["General Medicine"],
+        experience_years=5,
+        status=DoctorStatus.ACTIVE
+    )
+    db.add(doctor)
+    db.flush()
+
+    slots = SlotBitmap(open=generate_slots_from_ranges([{"start_time": "09:00", "end_time": "17:00"}]))
+    availability = DoctorAvailability(
+        doctor_id=doctor.id,
+        day_of_week=DayOfWeek(on_date.strftime("%A").lower()),
+        is_available=True,
+        template=get_or_create_template(db, slots.open, slots.granularity)
+    )
+    slots.store(availability)
+    db.add(availability)
+
+    users = []
+    for i in range(PATIENTS):
+        user = User(email=f"race-patient-{run_id}-{i}@wecure.com", hashed_password="-", role=UserRole.PATIENT)
+        db.add(user)
+        db.flush()
+        db.add(Patient(user_id=user.id, full_name=f"Race Patient {i}", phone="+10000000000"))
+        users.append(user)
+    db.commit()
+    refresh_doctor_slots(db, doctor.id)
+
+    tokens = [create_access_token(data={"sub": str(user.id), "role": user.role}) for user in users]
+    yield doctor.id, on_date, tokens
+
+    db.rollback()
+    db.query(DoctorSlot).filter(DoctorSlot.doctor_id == doctor.id).delete(synchronize_session=False)
+    db.query(Appointment).filter(Appointment.doctor_id == doctor.id).delete(synchronize_session=False)
+    db.query(DoctorAvailability).filter(DoctorAvailability.doctor_id == doctor.id).delete(synchronize_session=False)
+    db.query(Doctor).filter(Doctor.id == doctor.id).delete(synchronize_session=False)
+    user_ids = [doctor_user.id] + [user.id for user in users]
+    db.query(Patient).filter(Patient.user_id.in_(user_ids)).delete(synchronize_session=False)
+    db.query(User).filter(User.id.in_(user_ids)).delete(synchronize_session=False)
+    db.commit()
+
+
+def test_one_slot_many_threads_books_exactly_once(db, booking_setup):
+    from fastapi.testclient import TestClient
+    from app.api.v1.appointments import DOCTOR_SLOT_TAKEN, PATIENT_SLOT_TAKEN
+    from app.main import app
+    from app.models.appointment import Appointment, AppointmentStatus
+
+    doctor_id, on_date, tokens = booking_setup
+    # No `with`: startup background jobs are not started
+    client = TestClient(app)
+    barrier = threading.Barrier(THREADS)
+    results = []
+    lock = threading.Lock()
+
+    def book(token: str):
+        barrier.wait()
+        response = client.post(
+            "/api/v1/appointments/",
+            headers={"Authorization": f"Bearer {token}"},
+            json={
+                "doctor_id": str(doctor_id),
+                "appointment_date": on_date.isoformat(),
+                "appointment_time": SLOT.isoformat(),
+                "appointment_type": "video",
+                "chief_complaint": "Concurrency check"
+            }
+        )
+        detail = response.json().get("detail") if response.status_code != 200 else None
+        with lock:
+            results.append((response.status_code, detail))
+
+    threads = [threading.Thread(target=book, args=(tokens[i % len(tokens)],)) for i in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    outcomes = Counter(results)
+    assert sum(count for (status_code, _), count in outcomes.items() if status_code == 200) == 1, outcomes
+    assert all(
+        status_code == 400 and detail in (DOCTOR_SLOT_TAKEN, PATIENT_SLOT_TAKEN)
+        for status_code, detail in outcomes if status_code != 200
+    ), outcomes
+    assert len(results) == THREADS
+
+    active = db.query(Appointment).filter(
+        Appointment.doctor_id == doctor_id,
+        Appointment.appointment_date == on_date,
+        Appointment.appointment_time == SLOT,
+        Appointment.status.in_([AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED])
+    ).count()
+    assert active == 1